@@ -1,25 +1,201 @@
-from fastapi import APIRouter, Depends, HTTPException
-from schemas.Benchmark import SGenerateRequest, SGenerateResponse, SListModels
+import tempfile
 
-from api.dependencies.services import get_benchmark_service
-from typing import Any
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from schemas.Benchmark import (
+    SBatchItemResult,
+    SBatchRequest,
+    SBenchmarkRequest,
+    SBenchmarkResponse,
+    EHistogramMetric,
+    SHistogramResponse,
+    SGenerateRequest,
+    SGenerateResponse,
+    SModelsPage,
+    SModelsQuery,
+    SLoadTestRequest,
+    SLoadTestResponse,
+    SResilienceStats,
+)
 
+from api.dependencies.services import (
+    get_batch_service,
+    get_benchmark_service,
+    get_histogram_service,
+    get_load_test_service,
+    get_resilience,
+)
+from typing import IO, Annotated, AsyncIterator, Optional
+
+from config import settings
+from services.Batch import BatchService
 from services.Benchmark import BenchmarkService
+from services.Histograms import HistogramService
+from services.LoadTest import LoadTestService
+from services.Resilience import ResilientCaller
 
 router = APIRouter()
 
 
-@router.get("/models", response_model=SListModels)
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {
+        tag.strip().removeprefix("W/").strip('"') for tag in if_none_match.split(",")
+    }
+    return "*" in candidates or etag in candidates
+
+
+@router.get("/models", response_model=SModelsPage)
 async def get_models(
+    query: Annotated[SModelsQuery, Query()],
+    if_none_match: Annotated[Optional[str], Header()] = None,
     benchmark_service: BenchmarkService = Depends(get_benchmark_service),
-) -> SListModels:
-    models: SListModels = await benchmark_service.get_models()
-    return models
+) -> Response:
+    # Тела ответов собираются из заранее сериализованных моделей каталога,
+    # фильтры отвечают по индексам, построенным при обновлении каталога
+    catalog = await benchmark_service.get_model_catalog()
+    body, etag = catalog.query(query)
+    headers = {"ETag": f'W/"{etag}"'}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
-@router.post("/generate")
+async def _prepend(first: str, rest: AsyncIterator[str]) -> AsyncIterator[str]:
+    yield first
+    async for item in rest:
+        yield item
+
+
+@router.post("/generate", response_model=SGenerateResponse)
 async def generate(
     params: SGenerateRequest,
     benchmark_service: BenchmarkService = Depends(get_benchmark_service),
-) -> SGenerateResponse:
+) -> SGenerateResponse | StreamingResponse:
+    if params.stream:
+        events = benchmark_service.generate_stream(params)
+        # Забираем первый чанк до отправки заголовков, чтобы ошибка OpenRouter
+        # вернулась клиенту обычным HTTP-статусом, а не оборвала поток
+        first_event = await anext(events)
+        return StreamingResponse(
+            _prepend(first_event, events), media_type="text/event-stream"
+        )
     return await benchmark_service.generate(params)
+
+
+def _ndjson(lines: AsyncIterator[str]) -> StreamingResponse:
+    # GZipMiddleware копит сжатый поток блоками, и строки доходили бы до
+    # клиента пачками; identity отключает сжатие для этого ответа
+    return StreamingResponse(
+        lines,
+        media_type="application/x-ndjson",
+        headers={"Content-Encoding": "identity"},
+    )
+
+
+@router.post(
+    "/generate/batch",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"application/x-ndjson": {}}, "model": SBatchItemResult}
+    },
+)
+async def generate_batch(
+    params: SBatchRequest,
+    batch_service: BatchService = Depends(get_batch_service),
+) -> StreamingResponse:
+    """
+    Пакет запросов генерации: результат каждого - строка NDJSON
+    с SBatchItemResult сразу по готовности, в порядке завершения
+    """
+    return _ndjson(batch_service.run(params.items, params.concurrency))
+
+
+async def _run_spooled(
+    batch_service: BatchService, body: IO[bytes], concurrency: Optional[int]
+) -> AsyncIterator[str]:
+    try:
+        async for line in batch_service.run(
+            batch_service.parse_jsonl(body), concurrency
+        ):
+            yield line
+    finally:
+        body.close()
+
+
+@router.post(
+    "/generate/batch/jsonl",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"application/x-ndjson": {}}, "model": SBatchItemResult}
+    },
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/x-ndjson": {"schema": {"type": "string"}}},
+        }
+    },
+)
+async def generate_batch_jsonl(
+    request: Request,
+    concurrency: Optional[int] = Query(
+        default=None, ge=1, le=256, description="Максимум одновременных запросов"
+    ),
+    batch_service: BatchService = Depends(get_batch_service),
+) -> StreamingResponse:
+    """
+    Пакет из тела JSONL (одна строка - один SGenerateRequest). Тело
+    дочитывается до начала генерации: одновременное чтение тела и отправка
+    ответа в Starlette ненадежны. Сверх BATCH_SPOOL_MAX_SIZE оно хранится во
+    временном файле, а строки разбираются по мере выполнения пакета
+    """
+    body = tempfile.SpooledTemporaryFile(max_size=settings.BATCH_SPOOL_MAX_SIZE)
+    async for chunk in request.stream():
+        body.write(chunk)
+    if body.tell() == 0:
+        body.close()
+        raise HTTPException(status_code=422, detail="Пустой пакет")
+    body.seek(0)
+    return _ndjson(_run_spooled(batch_service, body, concurrency))
+
+
+@router.post("/benchmark", response_model=SBenchmarkResponse)
+async def benchmark(
+    params: SBenchmarkRequest,
+    benchmark_service: BenchmarkService = Depends(get_benchmark_service),
+) -> SBenchmarkResponse:
+    return await benchmark_service.benchmark(params)
+
+
+@router.post("/load-test", response_model=SLoadTestResponse)
+async def load_test(
+    params: SLoadTestRequest,
+    load_test_service: LoadTestService = Depends(get_load_test_service),
+) -> SLoadTestResponse:
+    return await load_test_service.run(params)
+
+
+@router.get("/histograms/{metric}", response_model=SHistogramResponse)
+async def get_histogram(
+    metric: EHistogramMetric,
+    models: list[str] = Query(default=..., description="Идентификаторы моделей"),
+    percentiles: list[float] = Query(
+        default=[50, 90, 95, 99, 99.9], description="Перцентили от 0 до 100"
+    ),
+    histogram_service: HistogramService = Depends(get_histogram_service),
+) -> SHistogramResponse:
+    histogram = await histogram_service.get(metric.value, models)
+    return SHistogramResponse(
+        metric=metric,
+        models=models,
+        summary=histogram.summary(),
+        percentiles={f"p{q:g}": histogram.percentile(q) for q in percentiles},
+    )
+
+
+@router.get("/resilience/stats", response_model=SResilienceStats)
+async def resilience_stats(
+    resilient_caller: ResilientCaller = Depends(get_resilience),
+) -> SResilienceStats:
+    return resilient_caller.stats()
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from schemas.Benchmark import SBenchmarkRequest
+from schemas.Jobs import SJob
+
+from api.Benchmark import _prepend
+from api.dependencies.services import get_job_service
+
+from services.Jobs import JobService
+
+router = APIRouter()
+
+
+@router.post("/jobs", response_model=SJob, status_code=202)
+async def submit_job(
+    params: SBenchmarkRequest,
+    job_service: JobService = Depends(get_job_service),
+) -> SJob:
+    return await job_service.submit(params)
+
+
+@router.get("/jobs/{job_id}", response_model=SJob)
+async def get_job(
+    job_id: str,
+    result: bool = Query(default=True, description="Включить сводку по замерам"),
+    job_service: JobService = Depends(get_job_service),
+) -> SJob:
+    return await job_service.get(job_id, with_result=result)
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(
+    job_id: str,
+    job_service: JobService = Depends(get_job_service),
+) -> StreamingResponse:
+    events = job_service.events(job_id)
+    # Первое событие до отправки заголовков: неизвестная задача вернет 404
+    first_event = await anext(events)
+    return StreamingResponse(
+        _prepend(first_event, events), media_type="text/event-stream"
+    )
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=SJob)
+async def cancel_job(
+    job_id: str,
+    job_service: JobService = Depends(get_job_service),
+) -> SJob:
+    return await job_service.cancel(job_id)
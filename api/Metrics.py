@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from api.dependencies.services import get_metrics_service
+from services.Metrics import MetricsService
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics(
+    metrics_service: MetricsService = Depends(get_metrics_service),
+) -> PlainTextResponse:
+    return PlainTextResponse(
+        await metrics_service.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -1,16 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException
-from schemas.Benchmark import SListModels
+from fastapi import APIRouter, Depends, HTTPException, Query
+from schemas.Benchmark import ECacheCategory, SCompletionCacheStats, SListModels
 
-from api.dependencies.services import get_benchmark_service, get_redis_cache
-from typing import Any
+from api.dependencies.services import (
+    get_benchmark_service,
+    get_completion_cache,
+    get_models_cache,
+    get_redis_cache,
+)
+from typing import Any, Optional
 
 from services.Benchmark import BenchmarkService
+from services.CompletionCache import CompletionCache
+from services.LocalCache import LocalCache
 from services.Redis import RedisCacheService
 
 router = APIRouter()
 
 
 @router.get("/clear-cache")
-async def clear_cache(redis_cache: RedisCacheService = Depends(get_redis_cache)):
-    await redis_cache.flush()
-    return {"message": "Cache cleared successfully"}
+async def clear_cache(
+    category: Optional[ECacheCategory] = Query(
+        default=None, description="Очистить только одну категорию кеша"
+    ),
+    redis_cache: RedisCacheService = Depends(get_redis_cache),
+    models_cache: LocalCache = Depends(get_models_cache),
+):
+    if category is None:
+        deleted = await redis_cache.flush()
+    else:
+        deleted = await redis_cache.delete_prefix(f"{category.value}:")
+    if category in (None, ECacheCategory.MODELS):
+        await models_cache.invalidate()
+    return {"message": "Cache cleared successfully", "deleted": deleted}
+
+
+@router.get("/completion-cache/stats", response_model=SCompletionCacheStats)
+async def completion_cache_stats(
+    completion_cache: CompletionCache = Depends(get_completion_cache),
+) -> SCompletionCacheStats:
+    return completion_cache.stats()
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import HTMLResponse
+from schemas.Results import (
+    SLeaderboard,
+    SLeaderboardQuery,
+    SResultSeries,
+    SResultSeriesQuery,
+    SResultsPage,
+    SResultsQuery,
+)
+
+from api.dependencies.services import get_leaderboard_service, get_result_service
+from typing import Annotated
+
+from services.Leaderboard import LeaderboardService
+from services.Results import ResultService
+
+router = APIRouter()
+
+
+@router.get("/results", response_model=SResultsPage)
+async def get_results(
+    query: Annotated[SResultsQuery, Query()],
+    result_service: ResultService = Depends(get_result_service),
+) -> SResultsPage:
+    return await result_service.page(query)
+
+
+@router.get("/results/series", response_model=SResultSeries)
+async def get_result_series(
+    query: Annotated[SResultSeriesQuery, Query()],
+    result_service: ResultService = Depends(get_result_service),
+) -> SResultSeries:
+    return await result_service.series(query)
+
+
+@router.get("/leaderboard", response_model=SLeaderboard)
+async def get_leaderboard(
+    query: Annotated[SLeaderboardQuery, Query()],
+    leaderboard_service: LeaderboardService = Depends(get_leaderboard_service),
+) -> SLeaderboard:
+    return await leaderboard_service.table(query)
+
+
+@router.get("/leaderboard/html", response_class=HTMLResponse)
+async def get_leaderboard_html(
+    query: Annotated[SLeaderboardQuery, Query()],
+    leaderboard_service: LeaderboardService = Depends(get_leaderboard_service),
+) -> HTMLResponse:
+    board = await leaderboard_service.table(query)
+    return HTMLResponse(leaderboard_service.render_html(board))
@@ -1,10 +1,15 @@
 from fastapi import APIRouter
 
 from .Benchmark import router as benchmark
+from .Jobs import router as jobs
+from .Metrics import router as metrics_router
 from .Redis import router as redis
+from .Results import router as results
 
 router = APIRouter(prefix="/api")
 
 router.include_router(redis, tags=["Redis"])
 router.include_router(benchmark, tags=["Benchmark"])
-__all__ = ["router"]
+router.include_router(results, tags=["Results"])
+router.include_router(jobs, tags=["Jobs"])
+__all__ = ["router", "metrics_router"]
@@ -1,13 +1,109 @@
+import httpx
+from fastapi import Depends
+
 from repositories.Benchmark import BenchmarkRepository
+from services.Batch import BatchService
 from services.Benchmark import BenchmarkService
-from services.Redis import RedisCacheService, redis_cache
+from services.CompletionCache import CompletionCache, completion_cache
+from services.Histograms import HistogramService, histograms
+from services.Jobs import JobService, jobs
+from services.Leaderboard import LeaderboardService, leaderboard
+from services.LoadTest import LoadTestService
+from services.LocalCache import LocalCache, models_cache
+from services.Metrics import MetricsService, metrics
+from services.RateLimit import UpstreamLimiter, upstream_limiter
+from services.Resilience import ResilientCaller, resilience
+from services.Http import HttpClientService, http_client
+from services.Redis import (
+    RedisCacheService,
+    RedisClientService,
+    redis_cache,
+    redis_client,
+)
+from services.Results import ResultService, results
+
+
+def get_redis_client_service() -> RedisClientService:
+    return redis_client
 
 
 def get_redis_cache() -> RedisCacheService:
     return redis_cache
 
 
-def get_benchmark_service() -> BenchmarkService:
-    repository = BenchmarkRepository()
+def get_http_client_service() -> HttpClientService:
+    return http_client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    return http_client.client
+
+
+def get_histogram_service() -> HistogramService:
+    return histograms
+
+
+def get_metrics_service() -> MetricsService:
+    return metrics
+
+
+def get_models_cache() -> LocalCache:
+    return models_cache
+
+
+def get_completion_cache() -> CompletionCache:
+    return completion_cache
+
+
+def get_upstream_limiter() -> UpstreamLimiter:
+    return upstream_limiter
+
+
+def get_resilience() -> ResilientCaller:
+    return resilience
+
+
+def get_result_service() -> ResultService:
+    return results
+
+
+def get_leaderboard_service() -> LeaderboardService:
+    return leaderboard
+
+
+def get_job_service() -> JobService:
+    return jobs
+
+
+def get_benchmark_service(
+    client: httpx.AsyncClient = Depends(get_http_client),
+    histogram_service: HistogramService = Depends(get_histogram_service),
+    models_local_cache: LocalCache = Depends(get_models_cache),
+    completions_cache: CompletionCache = Depends(get_completion_cache),
+    result_service: ResultService = Depends(get_result_service),
+    limiter: UpstreamLimiter = Depends(get_upstream_limiter),
+    resilient_caller: ResilientCaller = Depends(get_resilience),
+) -> BenchmarkService:
+    repository = BenchmarkRepository(
+        client=client, limiter=limiter, resilience=resilient_caller
+    )
+
+    return BenchmarkService(
+        repository=repository,
+        histograms=histogram_service,
+        models_cache=models_local_cache,
+        completion_cache=completions_cache,
+        results=result_service,
+    )
+
+
+def get_load_test_service(
+    benchmark_service: BenchmarkService = Depends(get_benchmark_service),
+) -> LoadTestService:
+    return LoadTestService(benchmark_service=benchmark_service)
+
 
-    return BenchmarkService(repository=repository)
+def get_batch_service(
+    benchmark_service: BenchmarkService = Depends(get_benchmark_service),
+) -> BatchService:
+    return BatchService(benchmark_service=benchmark_service)
@@ -0,0 +1,80 @@
+"""
+Сравнение кодеков кеша на снимке каталога моделей.
+
+    curl https://openrouter.ai/api/v1/models > models.json
+    python -m benchmarks.cache_codecs --snapshot models.json
+
+Без --snapshot каталог загружается из --url (по умолчанию OPENROUTER_BASE_URL,
+подойдет и заглушка mock.server). Для каждой комбинации формата и сжатия
+выводятся размер значения в Redis и время кодирования/декодирования.
+"""
+
+import argparse
+import json
+import time
+
+import httpx
+
+from core.codecs import COMPRESSIONS, FORMATS, CacheCodec, ECompression
+from core.statistics import summarize
+
+
+def load_catalog(snapshot: str | None, url: str) -> list[dict]:
+    if snapshot:
+        with open(snapshot, encoding="utf-8") as file:
+            payload = json.load(file)
+    else:
+        payload = httpx.get(f"{url.rstrip('/')}/models", timeout=60).json()
+    return payload["data"] if isinstance(payload, dict) else payload
+
+
+def measure(codec: CacheCodec, value: object, repeat: int) -> dict:
+    encode_times: list[float] = []
+    decode_times: list[float] = []
+    encoded = b""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        encoded = codec.encode(value)
+        encode_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        codec.decode(encoded)
+        decode_times.append(time.perf_counter() - start)
+    return {
+        "size": len(encoded),
+        "encode": summarize(encode_times),
+        "decode": summarize(decode_times),
+    }
+
+
+def main() -> None:
+    from config import settings
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--snapshot", help="JSON-файл с ответом /models")
+    parser.add_argument("--url", default=settings.OPENROUTER_BASE_URL)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    models = load_catalog(args.snapshot, args.url)
+    # Так каталог лежит в Redis: конверт cache_result вокруг списка моделей
+    value = {"value": models, "fresh_until": time.time()}
+    print(f"Моделей в каталоге: {len(models)}\n")
+
+    print(
+        f"{'format':>8} {'compression':>12} {'size KB':>9} "
+        f"{'enc p50 ms':>11} {'dec p50 ms':>11}"
+    )
+    for fmt in FORMATS:
+        for compression in (ECompression.NONE, *COMPRESSIONS):
+            codec = CacheCodec(fmt, compression, compression_threshold=0)
+            result = measure(codec, value, args.repeat)
+            print(
+                f"{fmt.name.lower():>8} {compression.name.lower():>12} "
+                f"{result['size'] / 1024:>9.1f} "
+                f"{result['encode']['p50'] * 1000:>11.3f} "
+                f"{result['decode']['p50'] * 1000:>11.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
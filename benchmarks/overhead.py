@@ -0,0 +1,84 @@
+"""
+Замер собственных накладных расходов сервиса на заглушке OpenRouter.
+
+    python -m mock.server
+    OPENROUTER_BASE_URL=http://localhost:3012/api/v1 python main.py
+    python -m benchmarks.overhead --url http://localhost:3011 --concurrency 64
+
+Накладные расходы запроса = время, увиденное клиентом, минус время вызова
+OpenRouter из SGenerateResponse.latency. С моделью mock/instant весь
+результат - это потолок RPS и задержка самого сервиса.
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from core.statistics import summarize
+
+
+async def run(url: str, model: str, concurrency: int, duration: float) -> dict:
+    client_latencies: list[float] = []
+    overheads: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+
+        async def worker() -> None:
+            nonlocal errors
+            payload = {"prompt": "ping", "model": model, "max_tokens": 16}
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.post("/api/generate", json=payload)
+                elapsed = time.perf_counter() - start
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+                client_latencies.append(elapsed)
+                latency = response.json().get("latency") or {}
+                overheads.append(elapsed - latency.get("time_total", 0.0))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(client_latencies),
+        "errors": errors,
+        "rps": len(client_latencies) / wall,
+        "client_latency": summarize(client_latencies),
+        "overhead": summarize(overheads),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:3011")
+    parser.add_argument("--model", default="mock/instant")
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 8, 32, 64, 128]
+    )
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(
+        f"{'conc':>5} {'rps':>9} {'p50 ms':>9} {'p99 ms':>9} {'ovh p50':>9} {'errors':>7}"
+    )
+    for concurrency in args.concurrency:
+        result = asyncio.run(run(args.url, args.model, concurrency, args.duration))
+        latency = result["client_latency"]
+        overhead = result["overhead"]
+        print(
+            f"{concurrency:>5} {result['rps']:>9.1f} "
+            f"{(latency['p50'] or 0) * 1000:>9.2f} {(latency['p99'] or 0) * 1000:>9.2f} "
+            f"{(overhead['p50'] or 0) * 1000:>9.2f} {result['errors']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Время запуска и масштабирование сервиса по числу процессов uvicorn.
+
+    python -m mock.server
+    python -m benchmarks.scaling --workers 1 2 4 --concurrency 64
+
+Для каждого числа воркеров запускает main.py на отдельном порту и замеряет:
+время импорта приложения в одном процессе, время до первого ответа,
+RPS и задержку на /api/generate (как benchmarks.overhead) и время
+остановки по SIGTERM. Ограничитель вызовов OpenRouter на время замера
+отключается, иначе RPS упрется в RATE_LIMIT_MODEL_RPS, а не в сервис.
+Сервис направляется на заглушку через OPENROUTER_BASE_URL.
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.overhead import run
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_time(env: dict) -> float:
+    """
+    Время старта интерпретатора и импорта core.server в одном процессе
+    """
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", "import core.server"], cwd=ROOT, env=env, check=True
+    )
+    return time.perf_counter() - start
+
+
+def wait_ready(url: str, timeout: float) -> float:
+    start = time.perf_counter()
+    deadline = start + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(f"{url}/openapi.json", timeout=1).status_code == 200:
+                return time.perf_counter() - start
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    raise TimeoutError(f"Сервис на {url} не ответил за {timeout} с")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--port", type=int, default=3021)
+    parser.add_argument("--model", default="mock/instant")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument(
+        "--openrouter-url",
+        default=os.environ.get("OPENROUTER_BASE_URL", "http://localhost:3012/api/v1"),
+    )
+    args = parser.parse_args()
+
+    env = dict(
+        os.environ,
+        OPENROUTER_BASE_URL=args.openrouter_url,
+        RATE_LIMIT_ENABLED="false",
+        SERVER_ACCESS_LOG="false",
+    )
+    print(f"Ядер: {os.cpu_count()}, импорт core.server: {import_time(env):.2f} с")
+    print(
+        f"{'workers':>7} {'ready s':>8} {'rps':>9} {'p50 ms':>9} {'p99 ms':>9} "
+        f"{'errors':>7} {'stop s':>7}"
+    )
+    for workers in args.workers:
+        url = f"http://localhost:{args.port}"
+        process = subprocess.Popen(
+            [sys.executable, "main.py", "--workers", str(workers)],
+            cwd=ROOT,
+            env=dict(env, SERVER_PORT=str(args.port)),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            ready = wait_ready(url, timeout=60)
+            # Остальные воркеры поднимаются параллельно с первым
+            time.sleep(1)
+            result = asyncio.run(run(url, args.model, args.concurrency, args.duration))
+        finally:
+            stop_start = time.perf_counter()
+            process.send_signal(signal.SIGTERM)
+            process.wait()
+            stopped = time.perf_counter() - stop_start
+        latency = result["client_latency"]
+        print(
+            f"{workers:>7} {ready:>8.2f} {result['rps']:>9.1f} "
+            f"{(latency['p50'] or 0) * 1000:>9.2f} {(latency['p99'] or 0) * 1000:>9.2f} "
+            f"{result['errors']:>7} {stopped:>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ import os
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
 from pydantic import Field
+from typing import Dict
 import logging
 
 
@@ -11,7 +12,115 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str
     BASE_DIR: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     LOG_LEVEL: int = logging.INFO
+    # Формат лога: json (одна запись - одна строка JSON) | text
+    LOG_FORMAT: str = "json"
+    # Очередь записей перед фоновым потоком записи; при переполнении записи отбрасываются
+    LOG_QUEUE_SIZE: int = 10000
+    # Доля успешных запросов, попадающих в лог (ошибки и медленные - всегда)
+    LOG_SUCCESS_SAMPLE_RATE: float = 1.0
+    LOG_SLOW_REQUEST_SECONDS: float = 1.0
     REDIS_HOST: str = Field(default=...)
+    REDIS_PORT: int = 6379
+    REDIS_MAX_CONNECTIONS: int = 50
+    # Сколько ждать свободного соединения пула, прежде чем вернуть ошибку
+    REDIS_POOL_TIMEOUT: float = 5.0
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 2.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    # Все ключи сервиса в Redis начинаются с "<REDIS_NAMESPACE>:"
+    REDIS_NAMESPACE: str = "llmbench"
+    # Кодек значений кеша: json | orjson | msgpack, сжатие: none | zlib | zstd
+    CACHE_FORMAT: str = "orjson"
+    CACHE_COMPRESSION: str = "zlib"
+    CACHE_COMPRESSION_THRESHOLD: int = 4096
+
+    OPENROUTER_BASE_URL: str = "https://openrouter.ai/api/v1"
+
+    # Пул HTTP-соединений к OpenRouter
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_CONNECT_TIMEOUT: float = 10.0
+    HTTP_READ_TIMEOUT: float = 120.0
+    HTTP_WRITE_TIMEOUT: float = 10.0
+    HTTP_POOL_TIMEOUT: float = 10.0
+
+    # Ограничение вызовов OpenRouter: token bucket в Redis на ключ и на модель
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_KEY_RPS: float = 20.0
+    RATE_LIMIT_KEY_BURST: float = 20.0
+    RATE_LIMIT_MODEL_RPS: float = 10.0
+    RATE_LIMIT_MODEL_BURST: float = 10.0
+    RATE_LIMIT_MODEL_RPS_OVERRIDES: Dict[str, float] = {}
+    # Замеры (/api/benchmark, нагрузочный тест, задачи, наборы) идут в обход
+    # ограничителя: иначе они упираются в RATE_LIMIT_MODEL_RPS и слоты AIMD
+    # и мерят ограничитель, а не провайдера
+    RATE_LIMIT_MEASUREMENTS: bool = False
+    # Адаптивный (AIMD) лимит одновременных запросов к модели в процессе
+    AIMD_INITIAL_CONCURRENCY: float = 4
+    AIMD_MAX_CONCURRENCY: float = 64
+
+    # Повторы вызовов OpenRouter: экспоненциальная задержка с джиттером
+    RETRY_MAX_ATTEMPTS: int = 3
+    RETRY_BASE_DELAY: float = 0.2
+    RETRY_MAX_DELAY: float = 5.0
+    RETRY_BUDGET_RATIO: float = 0.2
+    # Хеджирование: дубль запроса после перцентиля задержки модели
+    HEDGE_ENABLED: bool = False
+    HEDGE_PERCENTILE: float = 95
+    HEDGE_MIN_DELAY: float = 0.05
+    HEDGE_MIN_SAMPLES: int = 20
+    HEDGE_BUDGET_RATIO: float = 0.05
+
+    # Метрики /metrics: приращения воркеров сбрасываются в Redis
+    METRICS_FLUSH_INTERVAL: float = 5.0
+    METRICS_TTL: int = 7 * 24 * 3600
+
+    # L1-кеш каталога моделей внутри процесса
+    MODELS_L1_TTL: float = 60.0
+    MODELS_L1_MAXSIZE: int = 32
+    L1_VERSION_CHECK_INTERVAL: float = 1.0
+
+    # Бенчмарк
+    BENCHMARK_CONCURRENCY: int = 8
+    HISTOGRAM_FLUSH_INTERVAL: float = 5.0
+    HISTOGRAM_TTL: int = 7 * 24 * 3600
+    COMPLETION_CACHE_TTL: int = 7 * 24 * 3600
+
+    # Пакетная генерация: параллелизм по умолчанию и порог буфера загруженного
+    # JSONL в памяти (больше - во временном файле)
+    BATCH_CONCURRENCY: int = 16
+    BATCH_SPOOL_MAX_SIZE: int = 1024 * 1024
+
+    # Наборы из JSONL-файлов: период сохранения контрольной точки (в секундах)
+    SUITE_CHECKPOINT_INTERVAL: float = 1.0
+
+    # Журнал замеров: redis (Redis Streams) или sqlite (локальный файл)
+    RESULTS_BACKEND: str = "redis"
+    RESULTS_SQLITE_PATH: str = "results.sqlite3"
+    RESULTS_STREAM_MAXLEN: int = 1_000_000
+    RESULTS_BATCH_SIZE: int = 200
+    RESULTS_FLUSH_INTERVAL: float = 1.0
+    RESULTS_MAX_PENDING: int = 10_000
+    RESULTS_MAX_BUCKETS: int = 500
+    # Сравнительная таблица: агрегаты по моделям, обновляемые с каждым замером
+    LEADERBOARD_FLUSH_INTERVAL: float = 5.0
+    LEADERBOARD_TTL: int = 30 * 24 * 3600
+
+    # Фоновые задачи: redis (общая очередь) или local (в памяти процесса)
+    JOBS_BACKEND: str = "redis"
+    JOBS_WORKERS: int = 1
+    JOBS_LEASE_TTL: float = 30.0
+    JOBS_POLL_INTERVAL: float = 0.5
+    JOBS_TTL: int = 7 * 24 * 3600
+
+    # Сервер: число процессов uvicorn (0 - по числу ядер) и ожидание при остановке
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 3011
+    SERVER_WORKERS: int = 1
+    SERVER_ACCESS_LOG: bool = True
+    SHUTDOWN_DRAIN_TIMEOUT: float = 30.0
+
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
     @property
@@ -26,6 +135,10 @@ class Settings(BaseSettings):
     def TMP_DIR(self) -> str:
         return os.path.join(self.BASE_DIR, "tmp")
 
+    @property
+    def SUITES_DIR(self) -> str:
+        return os.path.join(self.BASE_DIR, "suites")
+
 
 def create_directories(settings: Settings):
     """Создает необходимые директории"""
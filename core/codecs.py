@@ -0,0 +1,202 @@
+"""
+Кодеки значений кеша.
+
+Каждое значение, записанное в Redis, начинается с байта-заголовка:
+младшие 2 бита - формат сериализации, следующие - алгоритм сжатия.
+Заголовок всегда меньше 0x20 и не совпадает с пробельными символами,
+поэтому не может быть первым байтом JSON-документа: значения, записанные
+до появления заголовка (обычный json.dumps), по-прежнему читаются. Смена формата в настройках
+не требует очистки кеша: чтение определяет формат по заголовку.
+
+orjson, msgpack и zstandard указаны в requirements.txt. Если пакет все же
+не установлен, формат нельзя выбрать в настройках (from_names сообщает об
+этом при запуске), а значения в нем при чтении считаются промахом кеша.
+"""
+
+import json
+import zlib
+from enum import IntEnum
+from typing import Any, Callable, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+class CodecError(Exception):
+    """Значение не может быть закодировано или раскодировано"""
+
+
+class EFormat(IntEnum):
+    JSON = 0x01
+    ORJSON = 0x02
+    MSGPACK = 0x03
+
+
+class ECompression(IntEnum):
+    NONE = 0x00
+    ZLIB = 0x10
+    ZSTD = 0x14
+
+
+_FORMAT_MASK = 0x03
+_COMPRESSION_MASK = 0x1C
+
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value, default=str, ensure_ascii=False).encode()
+
+
+def _json_loads(data: bytes) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson строже стандартного модуля (например, к NaN и Infinity)
+            pass
+    return json.loads(data)
+
+
+def _orjson_dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _msgpack_dumps(value: Any) -> bytes:
+    return msgpack.packb(value, default=str, use_bin_type=True)
+
+
+def _msgpack_loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+def _available_formats() -> dict[EFormat, tuple[Callable, Callable]]:
+    formats = {EFormat.JSON: (_json_dumps, _json_loads)}
+    if orjson is not None:
+        formats[EFormat.ORJSON] = (_orjson_dumps, orjson.loads)
+    if msgpack is not None:
+        formats[EFormat.MSGPACK] = (_msgpack_dumps, _msgpack_loads)
+    return formats
+
+
+def _available_compressions() -> dict[ECompression, tuple[Callable, Callable]]:
+    compressions = {
+        ECompression.ZLIB: (lambda data: zlib.compress(data, 1), zlib.decompress)
+    }
+    if zstandard is not None:
+        compressor = zstandard.ZstdCompressor(level=3)
+        decompressor = zstandard.ZstdDecompressor()
+        compressions[ECompression.ZSTD] = (
+            compressor.compress,
+            decompressor.decompress,
+        )
+    return compressions
+
+
+FORMATS = _available_formats()
+COMPRESSIONS = _available_compressions()
+
+
+class CacheCodec:
+    """
+    Кодирование значений кеша в байты с заголовком формата и сжатия
+    """
+
+    def __init__(
+        self,
+        format: EFormat = EFormat.JSON,
+        compression: ECompression = ECompression.NONE,
+        compression_threshold: int = 4096,
+    ):
+        """
+        :param format: Формат сериализации для записи
+        :param compression: Алгоритм сжатия для записи
+        :param compression_threshold: Сжимать значения не короче (в байтах)
+        """
+        if format not in FORMATS:
+            raise CodecError(f"Формат {format.name} недоступен: пакет не установлен")
+        if compression != ECompression.NONE and compression not in COMPRESSIONS:
+            raise CodecError(
+                f"Сжатие {compression.name} недоступно: пакет не установлен"
+            )
+        self.format = format
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+        self._dumps = FORMATS[format][0]
+        self._compress = (
+            COMPRESSIONS[compression][0] if compression != ECompression.NONE else None
+        )
+
+    @classmethod
+    def from_names(
+        cls, format: str, compression: str, compression_threshold: int
+    ) -> "CacheCodec":
+        """
+        Кодек по именам из настроек. Формат, чей пакет не установлен, -
+        ошибка конфигурации (CodecError): молча записывать кеш в другом
+        формате нельзя
+        """
+        fmt = EFormat[format.upper()]
+        comp = ECompression[compression.upper()]
+        return cls(fmt, comp, compression_threshold)
+
+    def encode(self, value: Any) -> bytes:
+        try:
+            payload = self._dumps(value)
+        except (TypeError, ValueError) as e:
+            raise CodecError(f"Не удалось сериализовать значение: {e}") from e
+        header = self.format
+        if self._compress is not None and len(payload) >= self.compression_threshold:
+            payload = self._compress(payload)
+            header |= self.compression
+        return bytes((header,)) + payload
+
+    @staticmethod
+    def decode(data: Optional[bytes | str]) -> Optional[Any]:
+        """
+        Раскодирование значения любого поддерживаемого формата,
+        в том числе записанного без заголовка
+        """
+        if not data:
+            return None
+        if isinstance(data, str):
+            data = data.encode()
+        header = data[0]
+        if header >= 0x20 or header in (0x09, 0x0A, 0x0D):
+            # Значение без заголовка: JSON, записанный до появления кодеков
+            try:
+                return _json_loads(data)
+            except ValueError as e:
+                raise CodecError(f"Поврежденное значение без заголовка: {e}") from e
+
+        try:
+            fmt = EFormat(header & _FORMAT_MASK)
+            comp = ECompression(header & _COMPRESSION_MASK)
+        except ValueError as e:
+            raise CodecError(f"Неизвестный заголовок значения: {header:#04x}") from e
+        if fmt not in FORMATS:
+            raise CodecError(f"Формат {fmt.name} недоступен: пакет не установлен")
+
+        payload = memoryview(data)[1:]
+        try:
+            if comp != ECompression.NONE:
+                if comp not in COMPRESSIONS:
+                    raise CodecError(
+                        f"Сжатие {comp.name} недоступно: пакет не установлен"
+                    )
+                payload = COMPRESSIONS[comp][1](payload)
+            return FORMATS[fmt][1](bytes(payload))
+        except CodecError:
+            raise
+        except Exception as e:
+            raise CodecError(f"Поврежденное значение {fmt.name}: {e}") from e
@@ -1,37 +1,16 @@
 import asyncio
-import time
 from functools import wraps
 from typing import Callable, Any
-from core.logger import logger
+from core.metrics import FUNCTION_DURATION, FUNCTION_ERRORS
 
 
 def measure_time(func: Callable) -> Callable:
     """
     Декоратор для измерения времени выполнения функции.
-    Работает с синхронными и асинхронными функциями.
+    Работает с синхронными и асинхронными функциями; замер попадает
+    в гистограмму llmbench_function_duration_seconds
     """
-
-    @wraps(func)
-    async def async_wrapper(*args, **kwargs) -> Any:
-        start_time = time.perf_counter()
-        try:
-            result = await func(*args, **kwargs)
-        finally:
-            elapsed = time.perf_counter() - start_time
-            logger.info(f"Функция {func.__name__} выполнилась за {elapsed:.6f} секунд")
-        return result
-
-    @wraps(func)
-    def sync_wrapper(*args, **kwargs) -> Any:
-        start_time = time.perf_counter()
-        try:
-            result = func(*args, **kwargs)
-        finally:
-            elapsed = time.perf_counter() - start_time
-            logger.info(f"Функция {func.__name__} выполнилась за {elapsed:.6f} секунд")
-        return result
-
-    return async_wrapper if asyncio.iscoroutinefunction(func) else sync_wrapper
+    return FUNCTION_DURATION.time(func.__qualname__)(func)
 
 
 def exception_handler(func: Callable) -> Callable:
@@ -47,6 +26,7 @@ def exception_handler(func: Callable) -> Callable:
             try:
                 result = await func(*args, **kwargs)
             except Exception as e:
+                FUNCTION_ERRORS.inc(func.__qualname__)
                 print(f"В функции {func.__name__} произошло исключение: {e}")
                 result = None
             return result
@@ -59,6 +39,7 @@ def exception_handler(func: Callable) -> Callable:
             try:
                 result = func(*args, **kwargs)
             except Exception as e:
+                FUNCTION_ERRORS.inc(func.__qualname__)
                 print(f"В функции {func.__name__} произошло исключение: {e}")
                 result = None
             return result
@@ -0,0 +1,171 @@
+import math
+from array import array
+from typing import Iterable, Mapping, Optional
+
+
+class LogHistogram:
+    """
+    Компактная сливаемая гистограмма с логарифмическими корзинами фиксированного
+    размера (в духе HDR Histogram / DDSketch).
+
+    Любое значение из [min_value, max_value] попадает в корзину с относительной
+    ошибкой не больше relative_accuracy. Значения за границами прижимаются к
+    крайним корзинам. Две гистограммы с одинаковой раскладкой сливаются
+    поэлементным сложением счетчиков, перцентиль считается за O(корзин).
+    """
+
+    __slots__ = (
+        "min_value",
+        "max_value",
+        "relative_accuracy",
+        "_gamma_log",
+        "counts",
+        "total",
+        "sum",
+    )
+
+    def __init__(
+        self,
+        min_value: float = 1e-4,
+        max_value: float = 1e4,
+        relative_accuracy: float = 0.01,
+    ):
+        """
+        :param min_value: Наименьшее различимое значение
+        :param max_value: Наибольшее различимое значение
+        :param relative_accuracy: Допустимая относительная ошибка перцентилей
+        """
+        self.min_value = min_value
+        self.max_value = max_value
+        self.relative_accuracy = relative_accuracy
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._gamma_log = math.log(gamma)
+        # Корзина 0 - всё, что меньше min_value, далее логарифмическая шкала
+        size = 2 + math.ceil(math.log(max_value / min_value) / self._gamma_log)
+        self.counts = array("Q", bytes(8 * size))
+        self.total = 0
+        self.sum = 0.0
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def index(self, value: float) -> int:
+        if value < self.min_value:
+            return 0
+        index = 1 + int(math.log(value / self.min_value) / self._gamma_log)
+        return min(index, len(self.counts) - 1)
+
+    def bucket_value(self, index: int) -> float:
+        """
+        Представительное значение корзины (геометрическая середина)
+        """
+        if index == 0:
+            return self.min_value
+        return self.min_value * math.exp((index - 0.5) * self._gamma_log)
+
+    def record(self, value: float, count: int = 1) -> None:
+        self.counts[self.index(value)] += count
+        self.total += count
+        self.sum += value * count
+
+    def record_many(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.record(value)
+
+    def merge(self, other: "LogHistogram") -> "LogHistogram":
+        if len(other) != len(self) or other.min_value != self.min_value:
+            raise ValueError("Нельзя слить гистограммы с разной раскладкой корзин")
+        counts = self.counts
+        for index, count in enumerate(other.counts):
+            if count:
+                counts[index] += count
+        self.total += other.total
+        self.sum += other.sum
+        return self
+
+    def reset(self) -> None:
+        self.counts = array("Q", bytes(8 * len(self.counts)))
+        self.total = 0
+        self.sum = 0.0
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Перцентиль по рангу ceil(q% * total) за один проход по корзинам
+        """
+        if not self.total:
+            return None
+        target = max(1, math.ceil(q / 100 * self.total))
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return self.bucket_value(index)
+        return self.bucket_value(len(self.counts) - 1)
+
+    def summary(self) -> dict[str, Optional[float]]:
+        """
+        Сводка в формате core.statistics.summarize
+        """
+        if not self.total:
+            return {
+                "count": 0,
+                "min": None,
+                "mean": None,
+                "p50": None,
+                "p95": None,
+                "p99": None,
+                "max": None,
+            }
+        non_empty = [index for index, count in enumerate(self.counts) if count]
+        return {
+            "count": self.total,
+            "min": self.bucket_value(non_empty[0]),
+            "mean": self.sum / self.total,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.bucket_value(non_empty[-1]),
+        }
+
+    def to_fields(self) -> dict[str, int | float]:
+        """
+        Разреженное представление для хранения в Redis-хэше:
+        номер корзины -> счетчик, плюс служебные поля count и sum
+        """
+        fields: dict[str, int | float] = {
+            str(index): count for index, count in enumerate(self.counts) if count
+        }
+        if self.total:
+            fields["count"] = self.total
+            fields["sum"] = self.sum
+        return fields
+
+    def load_fields(self, fields: Mapping[str, int | float]) -> "LogHistogram":
+        """
+        Добавляет к гистограмме счетчики из Redis-хэша (см. to_fields)
+        """
+        last = len(self.counts) - 1
+        for field, value in fields.items():
+            if field == "count":
+                self.total += int(value)
+            elif field == "sum":
+                self.sum += float(value)
+            else:
+                self.counts[min(int(field), last)] += int(value)
+        return self
+
+
+# Раскладки корзин для метрик: у читателей и писателей они должны совпадать
+HISTOGRAM_LAYOUTS: dict[str, dict[str, float]] = {
+    "latency": {"min_value": 1e-4, "max_value": 1e4, "relative_accuracy": 0.01},
+    "ttft": {"min_value": 1e-4, "max_value": 1e4, "relative_accuracy": 0.01},
+    "tokens_per_second": {
+        "min_value": 1e-2,
+        "max_value": 1e6,
+        "relative_accuracy": 0.01,
+    },
+}
+
+
+def make_histogram(metric: str) -> LogHistogram:
+    return LogHistogram(**HISTOGRAM_LAYOUTS[metric])
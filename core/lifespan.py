@@ -1,15 +1,64 @@
+import time
 from contextlib import asynccontextmanager
-from api.dependencies.services import get_redis_cache
+from api.dependencies.services import (
+    get_benchmark_service,
+    get_completion_cache,
+    get_histogram_service,
+    get_http_client_service,
+    get_job_service,
+    get_leaderboard_service,
+    get_metrics_service,
+    get_models_cache,
+    get_redis_client_service,
+    get_resilience,
+    get_result_service,
+    get_upstream_limiter,
+)
 from fastapi import FastAPI
 
+from config import settings
 from core.logger import logger
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Пулы соединений открываются в каждом воркере, а не при импорте
+    redis_client = get_redis_client_service()
+    await redis_client.start()
+    metrics_service = get_metrics_service()
+    await metrics_service.start()
+    http_client = get_http_client_service()
+    await http_client.start()
+    histogram_service = get_histogram_service()
+    await histogram_service.start()
+    leaderboard_service = get_leaderboard_service()
+    await leaderboard_service.start()
+    result_service = get_result_service()
+    await result_service.start()
+    job_service = get_job_service()
+    await job_service.start(
+        get_benchmark_service(
+            client=http_client.client,
+            histogram_service=histogram_service,
+            models_local_cache=get_models_cache(),
+            completions_cache=get_completion_cache(),
+            result_service=result_service,
+            limiter=get_upstream_limiter(),
+            resilient_caller=get_resilience(),
+        )
+    )
     logger.info("Сервис запущен")
 
     yield
-    redis_cache = get_redis_cache()
-    await redis_cache.close()
+    # Uvicorn уже дождался HTTP-запросов; задачи перестают брать новые вызовы,
+    # а начатые вызовы OpenRouter (включая фоновые) получают время завершиться
+    deadline = time.monotonic() + settings.SHUTDOWN_DRAIN_TIMEOUT
+    await job_service.close(drain_timeout=settings.SHUTDOWN_DRAIN_TIMEOUT)
+    await http_client.drain(max(0.0, deadline - time.monotonic()))
+    await result_service.close()
+    await leaderboard_service.close()
+    await histogram_service.close()
+    await http_client.close()
+    await metrics_service.close()
+    await redis_client.close()
     logger.info("Сервис завершил работу")
@@ -1,40 +1,125 @@
+import atexit
+import copy
+import json
 import logging
-import os
+import queue
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from typing import Optional
 
 from config import settings
+from core.metrics import LOG_RECORDS_DROPPED
+
+# Идентификатор текущего HTTP-запроса, попадает в каждую запись лога
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+@lru_cache(maxsize=1024)
+def relative_path(pathname: str) -> str:
+    """
+    Путь к файлу относительно корня проекта; resolve() обращается к файловой
+    системе, поэтому результат кешируется на каждый файл
+    """
+    path = Path(pathname).resolve()
+    try:
+        return str(path.relative_to(settings.BASE_DIR))
+    except ValueError:
+        return str(path)
 
 
 # Кастомный форматтер для логирования относительных путей
 class RelativePathFormatter(logging.Formatter):
     def format(self, record):
-        # Получаем абсолютный путь к файлу, где записан лог
-        pathname = Path(record.pathname).resolve()
-        # Преобразуем абсолютный путь к файлу в относительный относительно корня проекта
-        record.relativepath = str(pathname.relative_to(settings.BASE_DIR))
+        # Относительный путь к файлу, где записан лог (кешируется на файл)
+        record.relativepath = relative_path(record.pathname)
         return super().format(record)
 
 
+class JsonFormatter(logging.Formatter):
+    """
+    Одна запись - одна строка JSON. Поля, переданные через extra={"fields": {...}},
+    добавляются к записи как есть
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "source": f"{relative_path(record.pathname)}:{record.lineno}",
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Передача записей фоновому потоку записи через ограниченную очередь.
+    В потоке запроса остается только подготовка записи; если поток записи
+    не успевает и очередь заполнена, запись отбрасывается и учитывается
+    в dropped, а не останавливает обработку запросов
+    """
+
+    _exception_formatter = logging.Formatter()
+
+    def __init__(self, records: queue.Queue):
+        super().__init__(records)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Контекст запроса доступен только в потоке, где запись создана
+        record = copy.copy(record)
+        record.request_id = request_id.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            LOG_RECORDS_DROPPED.inc()
+
+
 def setup_base_logger():
-    # Настройка логирования с кастомным форматтером
-    formatter = RelativePathFormatter(
-        fmt="%(asctime)s [%(levelname)s] (%(relativepath)s:%(lineno)d) - %(message)s",  # Используем %(relativepath)s
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
+    if settings.LOG_FORMAT == "json":
+        formatter = JsonFormatter()
+    else:
+        # Настройка логирования с кастомным форматтером
+        formatter = RelativePathFormatter(
+            fmt="%(asctime)s [%(levelname)s] (%(relativepath)s:%(lineno)d) - %(message)s",  # Используем %(relativepath)s
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
 
-    # Настраиваем обработчики
+    # Файл пишет фоновый поток, событийный цикл не ждет диска
     file_handler = logging.FileHandler(settings.LOG_PATH, encoding="utf-8")
     file_handler.setFormatter(formatter)
 
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
+    records: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    queue_handler = BoundedQueueHandler(records)
+    listener = QueueListener(records, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
 
     # Настройка основного логгера
     logger = logging.getLogger(__name__)
     logger.setLevel(settings.LOG_LEVEL)
-    logger.addHandler(file_handler)
+    logger.addHandler(queue_handler)
 
-    return logger
+    return logger, queue_handler
 
 
-logger = setup_base_logger()
+logger, log_queue_handler = setup_base_logger()
@@ -0,0 +1,296 @@
+import asyncio
+import math
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+Labels = Tuple[str, ...]
+
+
+class Metric(ABC):
+    """
+    Метрика с метками в памяти процесса.
+
+    Запись - изменение словаря без блокировок и сетевых вызовов: все замеры
+    делаются из потока событийного цикла. Значения по меткам хранятся в
+    _values; collect забирает накопленные приращения для сброса в Redis
+    """
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """
+        :param name: Имя метрики в формате Prometheus
+        :param documentation: Описание для строки # HELP
+        :param labelnames: Имена меток в порядке передачи значений
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, Any] = {}
+
+    def collect(self) -> Dict[Labels, Any]:
+        values, self._values = self._values, {}
+        return values
+
+    @abstractmethod
+    def merge(self, values: Dict[Labels, Any]) -> None:
+        """
+        Добавить значения, собранные collect (в том числе другим процессом)
+        """
+
+    def samples(self, values: Dict[Labels, Any]) -> Iterable[Tuple[str, Dict, float]]:
+        for labels, value in values.items():
+            yield self.name, dict(zip(self.labelnames, labels)), value
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def merge(self, values: Dict[Labels, float]) -> None:
+        for labels, value in values.items():
+            self.inc(*labels, amount=value)
+
+
+class Gauge(Metric):
+    """
+    Текущее значение процесса. В отличие от счетчиков не обнуляется при
+    collect: при агрегации значения живых процессов складываются
+    """
+
+    type = "gauge"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def collect(self) -> Dict[Labels, float]:
+        return dict(self._values)
+
+    def merge(self, values: Dict[Labels, float]) -> None:
+        pass
+
+
+class Histogram(Metric):
+    """
+    Гистограмма с фиксированными границами корзин (le в Prometheus).
+    Значение по меткам - список: счетчики корзин, корзина +Inf и сумма
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = (),
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        data = self._values.get(labels)
+        if data is None:
+            data = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        data[bisect_left(self.buckets, value)] += 1
+        data[-1] += value
+
+    def merge(self, values: Dict[Labels, list]) -> None:
+        for labels, other in values.items():
+            data = self._values.get(labels)
+            if data is None:
+                self._values[labels] = list(other)
+                continue
+            for index, value in enumerate(other):
+                data[index] += value
+
+    def time(self, *labels: str) -> Callable[[Callable], Callable]:
+        """
+        Декоратор: длительность вызова функции (синхронной или асинхронной)
+        """
+
+        def decorator(func: Callable) -> Callable:
+            if asyncio.iscoroutinefunction(func):
+
+                @wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    start_time = time.perf_counter()
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        self.observe(time.perf_counter() - start_time, *labels)
+
+                return async_wrapper
+
+            @wraps(func)
+            def sync_wrapper(*args, **kwargs):
+                start_time = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - start_time, *labels)
+
+            return sync_wrapper
+
+        return decorator
+
+    def samples(self, values: Dict[Labels, list]) -> Iterable[Tuple[str, Dict, float]]:
+        bounds = [*(_format_value(bound) for bound in self.buckets), "+Inf"]
+        for labels, data in values.items():
+            names = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(bounds, data):
+                cumulative += count
+                yield f"{self.name}_bucket", {**names, "le": bound}, cumulative
+            yield f"{self.name}_sum", names, data[-1]
+            yield f"{self.name}_count", names, cumulative
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик процесса и рендер в текстовый формат Prometheus
+    """
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self.metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Any:
+        if metric.name in self.metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        return self._register(Counter(self.prefix + name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        return self._register(Gauge(self.prefix + name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = (),
+    ) -> Histogram:
+        return self._register(
+            Histogram(self.prefix + name, documentation, labelnames, buckets)
+        )
+
+    def render(self, values: Optional[Dict[str, Dict[Labels, Any]]] = None) -> str:
+        """
+        Текстовый формат Prometheus 0.0.4. values - значения по именам метрик
+        (например, слитые по всем воркерам); по умолчанию - текущие
+        значения процесса без их сброса
+        """
+        if values is None:
+            values = {
+                name: dict(metric._values) for name, metric in self.metrics.items()
+            }
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for sample, labels, value in metric.samples(values.get(name, {})):
+                lines.append(f"{sample}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+    return "{" + ",".join(escaped) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        if value.is_integer():
+            return str(int(value))
+        return repr(value)
+    return str(value)
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+UPSTREAM_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+TTFT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30)
+TOKENS_PER_SECOND_BUCKETS = (1, 5, 10, 25, 50, 100, 200, 400, 800, 1600)
+REDIS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+registry = MetricsRegistry(prefix="llmbench_")
+
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds",
+    "Время обработки запроса до заголовков ответа",
+    ("method", "route", "status"),
+    LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = registry.gauge("http_requests_in_flight", "Запросов в обработке")
+UPSTREAM_DURATION = registry.histogram(
+    "upstream_request_duration_seconds",
+    "Полное время вызова OpenRouter",
+    ("model", "provider"),
+    UPSTREAM_BUCKETS,
+)
+UPSTREAM_TTFT = registry.histogram(
+    "upstream_ttft_seconds",
+    "Время до первого токена потокового вызова",
+    ("model", "provider"),
+    TTFT_BUCKETS,
+)
+UPSTREAM_TOKENS_PER_SECOND = registry.histogram(
+    "upstream_tokens_per_second",
+    "Скорость генерации токенов",
+    ("model", "provider"),
+    TOKENS_PER_SECOND_BUCKETS,
+)
+UPSTREAM_ERRORS = registry.counter(
+    "upstream_errors_total", "Неуспешных вызовов OpenRouter", ("model", "code")
+)
+CACHE_LOOKUPS = registry.counter(
+    "cache_lookups_total",
+    "Обращений к кешам по исходу (hit, stale, miss, coalesced)",
+    ("cache", "result"),
+)
+REDIS_DURATION = registry.histogram(
+    "redis_operation_duration_seconds",
+    "Время операции Redis",
+    ("operation",),
+    REDIS_BUCKETS,
+)
+FUNCTION_DURATION = registry.histogram(
+    "function_duration_seconds",
+    "Время выполнения функций с декоратором measure_time",
+    ("function",),
+    LATENCY_BUCKETS,
+)
+FUNCTION_ERRORS = registry.counter(
+    "function_errors_total",
+    "Исключений, перехваченных декоратором exception_handler",
+    ("function",),
+)
+LOG_RECORDS_DROPPED = registry.counter(
+    "log_records_dropped_total", "Записей лога, отброшенных из-за переполнения очереди"
+)
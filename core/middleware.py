@@ -1,22 +1,74 @@
+import logging
+import random
+import time
+import uuid
+
 from fastapi import Request
-from core.logger import logger
+from config import settings
+from core.logger import logger, request_id
+from core.metrics import HTTP_IN_FLIGHT, HTTP_REQUEST_DURATION
 
 
 async def logging_middleware(request: Request, call_next):
     """
-    Middleware для логирования каждого входящего запроса
+    Middleware для логирования каждого входящего запроса: одна запись с id
+    запроса, статусом и временем до заголовков ответа. Ошибки и медленные
+    запросы пишутся всегда, успешные - с долей LOG_SUCCESS_SAMPLE_RATE
     """
+    rid = request.headers.get("x-request-id") or uuid.uuid4().hex
+    token = request_id.set(rid)
+    start_time = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["X-Request-ID"] = rid
+        return response
+    finally:
+        duration = time.perf_counter() - start_time
+        if (
+            status >= 400
+            or duration >= settings.LOG_SLOW_REQUEST_SECONDS
+            or random.random() < settings.LOG_SUCCESS_SAMPLE_RATE
+        ):
+            logger.log(
+                logging.WARNING if status >= 500 else logging.INFO,
+                f"{request.method} {request.url.path} -> {status}",
+                extra={
+                    "fields": {
+                        "method": request.method,
+                        "path": request.url.path,
+                        "status": status,
+                        "duration_ms": round(duration * 1000, 3),
+                        "user": request.headers.get(
+                            "x-user-login", "Анонимный пользователь"
+                        ),
+                        "client": request.client.host if request.client else None,
+                    }
+                },
+            )
+        request_id.reset(token)
 
-    user_login = request.headers.get("x-user-login", "Анонимный пользователь")
-
-    logger.info(
-        f"Request: Пользователь '{user_login}' -> {request.method} {request.url.path} с IP {request.client.host}"
-    )
-
-    response = await call_next(request)
 
-    logger.info(
-        f"Response: Для '{user_login}' -> {request.method} {request.url.path} | Статус: {response.status_code}"
-    )
-
-    return response
+async def metrics_middleware(request: Request, call_next):
+    """
+    Middleware для метрик запросов: время до заголовков ответа по шаблону
+    маршрута и статусу, число запросов в обработке
+    """
+    HTTP_IN_FLIGHT.inc()
+    start_time = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        # Шаблон маршрута, а не путь: id в пути не должны плодить ряды метрик
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - start_time,
+            request.method,
+            getattr(route, "path", "unmatched"),
+            str(status),
+        )
@@ -0,0 +1,46 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from core.logger import logger
+
+
+class PeriodicFlusher(ABC):
+    """
+    Фоновый сброс накопленных в процессе данных раз в flush_interval.
+
+    Наследник реализует flush. Ошибка одного сброса логируется и не
+    останавливает цикл: следующий сброс пройдет по расписанию. close
+    останавливает цикл и выполняет последний сброс
+    """
+
+    flush_interval: float
+    _flush_task: Optional[asyncio.Task] = None
+
+    @abstractmethod
+    async def flush(self) -> None:
+        """
+        Сброс накопленного в хранилище
+        """
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception(f"Фоновый сброс {type(self).__name__} не удался")
+
+    async def start(self) -> None:
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
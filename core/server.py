@@ -1,12 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from api import router
-from core.middleware import logging_middleware
+from fastapi.middleware.gzip import GZipMiddleware
+from api import metrics_router, router
+from core.middleware import logging_middleware, metrics_middleware
 from .lifespan import lifespan
 
 
 def init_routers(app_: FastAPI) -> None:
     app_.include_router(router)
+    app_.include_router(metrics_router)
 
 
 
@@ -17,6 +19,9 @@ def create_app() -> FastAPI:
     )
 
     app_.middleware("http")(logging_middleware)
+    app_.middleware("http")(metrics_middleware)
+
+    app_.add_middleware(GZipMiddleware, minimum_size=1024)
 
     app_.add_middleware(
         CORSMiddleware,
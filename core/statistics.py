@@ -0,0 +1,48 @@
+import math
+from typing import Iterable, Optional, Sequence
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> Optional[float]:
+    """
+    Перцентиль с линейной интерполяцией по уже отсортированной выборке
+
+    :param sorted_values: Отсортированные по возрастанию значения
+    :param q: Перцентиль в диапазоне [0, 100]
+    """
+    if not sorted_values:
+        return None
+    if len(sorted_values) == 1:
+        return float(sorted_values[0])
+    rank = (len(sorted_values) - 1) * q / 100
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    if low == high:
+        return float(sorted_values[low])
+    weight = rank - low
+    return sorted_values[low] * (1 - weight) + sorted_values[high] * weight
+
+
+def summarize(values: Iterable[float]) -> dict[str, Optional[float]]:
+    """
+    Сводная статистика распределения: count, min, mean, p50, p95, p99, max
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return {
+            "count": 0,
+            "min": None,
+            "mean": None,
+            "p50": None,
+            "p95": None,
+            "p99": None,
+            "max": None,
+        }
+    return {
+        "count": len(ordered),
+        "min": ordered[0],
+        "mean": sum(ordered) / len(ordered),
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1],
+    }
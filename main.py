@@ -1,11 +1,33 @@
+import argparse
+import os
+
 import uvicorn
-import config
+from config import settings
 
-if __name__ == "__main__":
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Запуск сервиса")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.SERVER_WORKERS,
+        help="Число процессов uvicorn, 0 - по числу ядер",
+    )
+    args = parser.parse_args()
+
+    # Каждый воркер импортирует приложение сам и открывает свои пулы в lifespan
     uvicorn.run(
-        host="0.0.0.0",
+        host=args.host,
         app="core.server:app",
         reload=False,
-        port=3011,
-        workers=1,
+        port=args.port,
+        workers=args.workers or os.cpu_count(),
+        access_log=settings.SERVER_ACCESS_LOG,
+        timeout_graceful_shutdown=settings.SHUTDOWN_DRAIN_TIMEOUT,
     )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+Локальная замена OpenRouter для офлайн-замеров и CI.
+
+Реализует /api/v1/models и /api/v1/chat/completions (обычный и потоковый
+режимы) с настраиваемыми TTFT, распределением задержки между токенами,
+инъекцией ошибок/429 и размером ответов.
+
+Запуск: python -m mock.server
+Сервис направляется на заглушку через OPENROUTER_BASE_URL=http://localhost:3012/api/v1
+
+Профиль выбирается по суффиксу модели: для "mock/slow" берется профиль "slow"
+из MOCK_PROFILES, для неизвестных моделей - профиль по умолчанию.
+"""
+
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import AsyncIterator, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class SMockProfile(BaseModel):
+    ttft_seconds: float = Field(default=0.3, ge=0, description="Средний TTFT")
+    ttft_jitter: float = Field(
+        default=0.1, ge=0, description="Равномерный разброс TTFT (+/-)"
+    )
+    slow_rate: float = Field(
+        default=0.0, ge=0, le=1, description="Доля ответов с хвостовой задержкой"
+    )
+    slow_factor: float = Field(
+        default=10.0, ge=1, description="Во сколько раз TTFT медленного ответа дольше"
+    )
+    token_delay_seconds: float = Field(
+        default=0.02, ge=0, description="Средняя задержка между токенами"
+    )
+    token_delay_distribution: str = Field(
+        default="exponential",
+        description="constant | uniform | exponential | lognormal",
+    )
+    completion_tokens: Optional[int] = Field(
+        default=None,
+        description="Фиксированная длина ответа (по умолчанию max_tokens запроса)",
+    )
+    token_text: str = Field(default="lorem ", description="Текст одного токена")
+    error_rate: float = Field(default=0.0, ge=0, le=1, description="Доля ответов 500")
+    rate_limit_rate: float = Field(
+        default=0.0, ge=0, le=1, description="Доля ответов 429"
+    )
+    retry_after_seconds: int = Field(default=1, description="Заголовок Retry-After")
+    max_concurrency: Optional[int] = Field(
+        default=None,
+        description="Предел одновременных запросов, сверх него - 429 (емкость провайдера)",
+    )
+
+
+class MockSettings(BaseSettings):
+    HOST: str = "0.0.0.0"
+    PORT: int = 3012
+    MODELS_COUNT: int = 300
+    MODEL_DESCRIPTION_SIZE: int = 600
+    DEFAULT_PROFILE: SMockProfile = SMockProfile()
+    PROFILES: Dict[str, SMockProfile] = {
+        "fast": SMockProfile(ttft_seconds=0.05, token_delay_seconds=0.005),
+        "slow": SMockProfile(ttft_seconds=1.5, token_delay_seconds=0.05),
+        "flaky": SMockProfile(error_rate=0.05, rate_limit_rate=0.1),
+        "instant": SMockProfile(
+            ttft_seconds=0, ttft_jitter=0, token_delay_seconds=0, completion_tokens=16
+        ),
+        "limited": SMockProfile(
+            ttft_seconds=0.1,
+            ttft_jitter=0.02,
+            token_delay_seconds=0.002,
+            completion_tokens=16,
+            max_concurrency=8,
+        ),
+        "tail": SMockProfile(
+            ttft_seconds=0.1,
+            ttft_jitter=0.02,
+            token_delay_seconds=0.002,
+            completion_tokens=16,
+            slow_rate=0.05,
+        ),
+    }
+    model_config = SettingsConfigDict(
+        env_prefix="MOCK_", env_file=".env", extra="ignore"
+    )
+
+
+mock_settings = MockSettings()
+
+
+def get_profile(model: str) -> SMockProfile:
+    _, _, name = model.rpartition("/")
+    return mock_settings.PROFILES.get(name, mock_settings.DEFAULT_PROFILE)
+
+
+def sample_ttft(profile: SMockProfile) -> float:
+    ttft = max(0.0, profile.ttft_seconds + random.uniform(-1, 1) * profile.ttft_jitter)
+    if random.random() < profile.slow_rate:
+        ttft *= profile.slow_factor
+    return ttft
+
+
+def sample_token_delay(profile: SMockProfile) -> float:
+    mean = profile.token_delay_seconds
+    if mean <= 0:
+        return 0.0
+    distribution = profile.token_delay_distribution
+    if distribution == "uniform":
+        return random.uniform(0, 2 * mean)
+    if distribution == "exponential":
+        return random.expovariate(1 / mean)
+    if distribution == "lognormal":
+        # sigma=0.5: среднее exp(mu + sigma^2/2) приводим к mean
+        return random.lognormvariate(0, 0.5) * mean / 1.1331
+    return mean
+
+
+IN_FLIGHT: Dict[str, int] = {}
+
+
+def injected_error(profile: SMockProfile, model: str) -> Optional[JSONResponse]:
+    roll = random.random()
+    over_capacity = (
+        profile.max_concurrency is not None
+        and IN_FLIGHT.get(model, 0) >= profile.max_concurrency
+    )
+    if over_capacity or roll < profile.rate_limit_rate:
+        return JSONResponse(
+            status_code=429,
+            headers={"Retry-After": str(profile.retry_after_seconds)},
+            content={"error": {"code": 429, "message": "Rate limit exceeded (mock)"}},
+        )
+    if roll < profile.rate_limit_rate + profile.error_rate:
+        return JSONResponse(
+            status_code=500,
+            content={"error": {"code": 500, "message": "Internal error (mock)"}},
+        )
+    return None
+
+
+def build_models(count: int, description_size: int) -> List[dict]:
+    description = ("Synthetic mock model. " * (description_size // 22 + 1))[
+        :description_size
+    ]
+    modalities = [("text->text", ["text"]), ("text+image->text", ["text", "image"])]
+    models = []
+    for index in range(count):
+        modality, input_modalities = modalities[index % len(modalities)]
+        name = f"mock/model-{index}"
+        models.append(
+            {
+                "id": name,
+                "canonical_slug": f"{name}-2025",
+                "hugging_face_id": None,
+                "name": f"Mock: Model {index}",
+                "created": 1757612284 - index * 3600,
+                "description": description,
+                "context_length": 4096 * (1 + index % 64),
+                "architecture": {
+                    "modality": modality,
+                    "input_modalities": input_modalities,
+                    "output_modalities": ["text"],
+                    "tokenizer": "Mock",
+                    "instruct_type": None,
+                },
+                "pricing": {
+                    "prompt": f"{0.0000001 * (1 + index % 20):.7f}",
+                    "completion": f"{0.0000004 * (1 + index % 20):.7f}",
+                    "request": "0",
+                    "image": "0",
+                },
+                "top_provider": {
+                    "context_length": 4096 * (1 + index % 64),
+                    "max_completion_tokens": 4096,
+                    "is_moderated": index % 3 == 0,
+                },
+                "per_request_limits": None,
+                "supported_parameters": ["max_tokens", "temperature", "top_p", "stop"][
+                    : 2 + index % 3
+                ],
+            }
+        )
+    for profile_name in mock_settings.PROFILES:
+        models.append(dict(models[0], id=f"mock/{profile_name}", name=profile_name))
+    return models
+
+
+app = FastAPI(title="OpenRouter mock")
+MODELS_PAYLOAD = json.dumps(
+    {
+        "data": build_models(
+            mock_settings.MODELS_COUNT, mock_settings.MODEL_DESCRIPTION_SIZE
+        )
+    }
+).encode()
+
+
+@app.get("/api/v1/models")
+async def models():
+    return Response(content=MODELS_PAYLOAD, media_type="application/json")
+
+
+def completion_tokens(profile: SMockProfile, body: dict) -> int:
+    if profile.completion_tokens is not None:
+        return profile.completion_tokens
+    return int(body.get("max_tokens") or 512)
+
+
+def usage(body: dict, tokens: int) -> dict:
+    prompt_tokens = sum(
+        len(str(message.get("content", "")).split())
+        for message in body.get("messages", [])
+    )
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": tokens,
+        "total_tokens": prompt_tokens + tokens,
+    }
+
+
+async def stream_completion(
+    profile: SMockProfile, body: dict, tokens: int
+) -> AsyncIterator[bytes]:
+    generation_id = f"gen-{uuid.uuid4().hex}"
+    model = body["model"]
+    yield b": OPENROUTER PROCESSING\n\n"
+    await asyncio.sleep(sample_ttft(profile))
+    for index in range(tokens):
+        if index:
+            await asyncio.sleep(sample_token_delay(profile))
+        chunk = {
+            "id": generation_id,
+            "provider": "Mock",
+            "model": model,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": {"role": "assistant", "content": profile.token_text},
+                    "finish_reason": None,
+                }
+            ],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n".encode()
+    final = {
+        "id": generation_id,
+        "provider": "Mock",
+        "model": model,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "choices": [{"index": 0, "delta": {}, "finish_reason": "length"}],
+        "usage": usage(body, tokens),
+    }
+    yield f"data: {json.dumps(final)}\n\n".encode()
+    yield b"data: [DONE]\n\n"
+
+
+async def tracked(model: str, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    IN_FLIGHT[model] = IN_FLIGHT.get(model, 0) + 1
+    try:
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        IN_FLIGHT[model] -= 1
+
+
+@app.post("/api/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "")
+    profile = get_profile(model)
+    error = injected_error(profile, model)
+    if error is not None:
+        return error
+    tokens = completion_tokens(profile, body)
+
+    if body.get("stream"):
+        return StreamingResponse(
+            tracked(model, stream_completion(profile, body, tokens)),
+            media_type="text/event-stream",
+        )
+
+    delay = sample_ttft(profile) + sum(
+        sample_token_delay(profile) for _ in range(max(tokens - 1, 0))
+    )
+    IN_FLIGHT[model] = IN_FLIGHT.get(model, 0) + 1
+    try:
+        await asyncio.sleep(delay)
+    finally:
+        IN_FLIGHT[model] -= 1
+    return {
+        "id": f"gen-{uuid.uuid4().hex}",
+        "provider": "Mock",
+        "model": body["model"],
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "choices": [
+            {
+                "index": 0,
+                "logprobs": None,
+                "finish_reason": "length",
+                "message": {
+                    "role": "assistant",
+                    "content": profile.token_text * tokens,
+                    "refusal": None,
+                },
+            }
+        ],
+        "usage": usage(body, tokens),
+    }
+
+
+if __name__ == "__main__":
+    uvicorn.run(
+        app="mock.server:app",
+        host=mock_settings.HOST,
+        port=mock_settings.PORT,
+        log_level="warning",
+    )
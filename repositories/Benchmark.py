@@ -1,28 +1,76 @@
 import json
 import time
-from typing import Optional, Dict
+from contextlib import nullcontext
+from typing import AsyncIterator, Optional, Dict
 from fastapi import HTTPException
-import requests
+import httpx
 from schemas.Benchmark import (
+    ECacheCategory,
     SListModels,
     SModel,
     SOpenRouterRequest,
     SOpenRouterResponse,
 )
+from config import settings
+from services.Http import RequestTracer
+from services.RateLimit import UpstreamLimiter
+from services.Resilience import ResilientCaller
 from services.Redis import cache_result
 
 
 class BenchmarkRepository:
 
-    @cache_result(prefix_key="models", ttl=3600)
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        base_url: Optional[str] = None,
+        limiter: Optional[UpstreamLimiter] = None,
+        resilience: Optional[ResilientCaller] = None,
+    ) -> None:
+        self.client = client
+        self.base_url = (base_url or settings.OPENROUTER_BASE_URL).rstrip("/")
+        self.limiter = limiter
+        self.resilience = resilience
+
+    def _limit(self, model: str, headers: Dict[str, str], limited: bool = True):
+        """
+        Слот ограничителя вызовов OpenRouter (без ограничителя - пустой)
+        """
+        if self.limiter is None or not limited:
+            return nullcontext()
+        return self.limiter.limit(model, headers.get("Authorization", ""))
+
+    @staticmethod
+    def _error_message(response: httpx.Response) -> str:
+        """
+        Текст ошибки OpenRouter; тело не в формате OpenRouter (например,
+        HTML-страница прокси на 502/503) отдается как есть
+        """
+        try:
+            return str(response.json()["error"]["message"])
+        except (ValueError, KeyError, TypeError):
+            return response.text[:500] or response.reason_phrase
+
+    @classmethod
+    def _raise_for_status(cls, response: httpx.Response) -> None:
+        if response.status_code == 200:
+            return
+        retry_after = response.headers.get("Retry-After")
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=cls._error_message(response),
+            headers={"Retry-After": retry_after} if retry_after else None,
+        )
+
+    @cache_result(prefix_key=ECacheCategory.MODELS.value, ttl=3600, stale_ttl=3600)
     async def get_models(
         self,
     ) -> SListModels:
-        models = requests.get("https://openrouter.ai/api/v1/models")
+        models = await self.client.get(f"{self.base_url}/models")
         if models.status_code != 200:
             raise HTTPException(
                 status_code=models.status_code,
-                detail=models.json()["error"]["message"],
+                detail=self._error_message(models),
             )
         return models.json()["data"]
 
@@ -30,20 +78,86 @@ class BenchmarkRepository:
         self,
         headers: Dict[str, str],
         data: SOpenRouterRequest,
-    ) -> str:
-        start_time = time.time()
-        response = requests.post(
-            url="https://openrouter.ai/api/v1/chat/completions",
-            headers=headers,
-            data=data.model_dump_json(exclude_none=True),
+        resilient: bool = True,
+        limited: bool = True,
+    ) -> SOpenRouterResponse:
+        """
+        Вызов модели; с resilience - с повторами и хеджированием
+
+        :param resilient: False - один вызов без повторов и хеджирования
+        :param limited: False - вызов в обход ограничителя
+        """
+        if self.resilience is None or not resilient:
+            return await self._chat_completions(headers, data, limited)
+        return await self.resilience.call(
+            data.model, lambda: self._chat_completions(headers, data, limited)
         )
-        # TODO доделать правильный подсчет latency
-        end_time = time.time()
-        latency_seconds = end_time - start_time
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=response.json()["error"]["message"],
+
+    async def _chat_completions(
+        self,
+        headers: Dict[str, str],
+        data: SOpenRouterRequest,
+        limited: bool = True,
+    ) -> SOpenRouterResponse:
+        async with self._limit(data.model, headers, limited) as permit:
+            # Трассировка начинается после ожидания слота ограничителя
+            tracer = RequestTracer()
+            response = await self.client.post(
+                url=f"{self.base_url}/chat/completions",
+                headers=headers,
+                content=data.model_dump_json(exclude_none=True),
+                extensions={"trace": tracer},
             )
+            if permit is not None:
+                permit.observe(
+                    response.status_code,
+                    tracer.headers_time,
+                    response.headers.get("Retry-After"),
+                )
+        self._raise_for_status(response)
+        parse_start = time.perf_counter()
         open_router_response = SOpenRouterResponse(**response.json())
+        open_router_response.latency = tracer.to_latency(
+            http_code=response.status_code,
+            response_size=response.num_bytes_downloaded,
+            parse_time=time.perf_counter() - parse_start,
+        )
         return open_router_response
+
+    async def stream_chat_completions(
+        self,
+        headers: Dict[str, str],
+        data: SOpenRouterRequest,
+        tracer: Optional[RequestTracer] = None,
+        limited: bool = True,
+    ) -> AsyncIterator[str]:
+        """
+        Потоковый запрос: отдает строки SSE по мере их поступления от OpenRouter
+        """
+        extensions = {"trace": tracer} if tracer is not None else None
+        async with self._limit(data.model, headers, limited) as permit:
+            start_time = time.perf_counter()
+            if tracer is not None:
+                # Ожидание слота ограничителя не входит в замеры вызова
+                tracer.start_time = start_time
+            async with self.client.stream(
+                "POST",
+                url=f"{self.base_url}/chat/completions",
+                headers=headers,
+                content=data.model_dump_json(exclude_none=True),
+                extensions=extensions,
+            ) as response:
+                if permit is not None:
+                    permit.observe(
+                        response.status_code,
+                        time.perf_counter() - start_time,
+                        response.headers.get("Retry-After"),
+                    )
+                if response.status_code != 200:
+                    await response.aread()
+                    self._raise_for_status(response)
+                async for line in response.aiter_lines():
+                    yield line
+                if tracer is not None:
+                    tracer.http_code = response.status_code
+                    tracer.response_size = response.num_bytes_downloaded
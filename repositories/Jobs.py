@@ -0,0 +1,306 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+from schemas.Benchmark import SBenchmarkRequest, SBenchmarkSample
+from schemas.Jobs import SJobState
+from services.Redis import RedisCacheService
+
+
+class JobStore(ABC):
+    """
+    Очередь задач и их состояние с контрольными точками.
+
+    Воркер забирает задачу из очереди под аренду (lease) и продлевает ее,
+    пока работает. Задача, чья аренда истекла (воркер упал), возвращается
+    в очередь через recover и продолжается с сохраненных замеров
+    """
+
+    @abstractmethod
+    async def create(self, state: SJobState, request: SBenchmarkRequest) -> None:
+        """
+        Сохранить новую задачу и поставить ее в очередь
+        """
+
+    @abstractmethod
+    async def claim(self, token: str, lease_ttl: float) -> Optional[str]:
+        """
+        Взять следующую задачу под аренду token; None - очередь пуста
+        """
+
+    @abstractmethod
+    async def renew(self, job_id: str, token: str, lease_ttl: float) -> bool:
+        """
+        Продлить аренду; False - аренда потеряна и задачу ведет другой воркер
+        """
+
+    @abstractmethod
+    async def release(self, job_id: str, token: str, requeue: bool = False) -> None:
+        """
+        Снять аренду: задача завершена или (requeue) возвращается в очередь
+        """
+
+    async def recover(self) -> int:
+        """
+        Вернуть в очередь задачи с истекшей арендой
+        """
+        return 0
+
+    @abstractmethod
+    async def get_state(self, job_id: str) -> Optional[SJobState]:
+        """
+        Состояние задачи без замеров; None - задачи нет
+        """
+
+    @abstractmethod
+    async def update(self, job_id: str, **fields: Any) -> None:
+        """
+        Обновить поля состояния задачи
+        """
+
+    @abstractmethod
+    async def get_request(self, job_id: str) -> Optional[SBenchmarkRequest]:
+        """
+        Параметры прогона задачи
+        """
+
+    @abstractmethod
+    async def save_sample(
+        self, job_id: str, index: int, sample: SBenchmarkSample, **fields: Any
+    ) -> None:
+        """
+        Контрольная точка: замер вызова index вместе с полями состояния
+        """
+
+    @abstractmethod
+    async def get_samples(self, job_id: str) -> dict[int, SBenchmarkSample]:
+        """
+        Сохраненные замеры по индексам вызовов
+        """
+
+
+class RedisJobStore(JobStore):
+    """
+    Очередь в Redis, общая для всех процессов API и отдельных воркеров.
+    Взятая задача атомарно переносится в список processing и получает
+    ключ аренды с TTL; recover возвращает из processing задачи без аренды
+    """
+
+    KEY_PREFIX = "jobs"
+
+    def __init__(self, cache: RedisCacheService, ttl: Optional[int] = None):
+        """
+        :param cache: Клиент Redis в отдельном от кеша пространстве имен
+        :param ttl: Время хранения задачи и ее замеров (в секундах)
+        """
+        self.cache = cache
+        self.ttl = ttl
+        self.queue_key = f"{self.KEY_PREFIX}:queue"
+        self.processing_key = f"{self.KEY_PREFIX}:processing"
+
+    def key(self, job_id: str) -> str:
+        return f"{self.KEY_PREFIX}:{job_id}"
+
+    def samples_key(self, job_id: str) -> str:
+        return f"{self.KEY_PREFIX}:{job_id}:samples"
+
+    def lease_key(self, job_id: str) -> str:
+        return f"{self.KEY_PREFIX}:{job_id}:lease"
+
+    @property
+    def _lease_affixes(self) -> tuple[str, str]:
+        """Полное имя ключа аренды в Lua собирается как prefix .. id .. suffix"""
+        return self.cache.key(f"{self.KEY_PREFIX}:"), ":lease"
+
+    async def create(self, state: SJobState, request: SBenchmarkRequest) -> None:
+        async with self.cache.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                self.key(state.id),
+                {
+                    **state.model_dump(mode="json"),
+                    "request": request.model_dump(mode="json"),
+                },
+                self.ttl,
+            )
+            pipe.lpush(self.queue_key, state.id)
+
+    async def claim(self, token: str, lease_ttl: float) -> Optional[str]:
+        prefix, suffix = self._lease_affixes
+        job_id = await self.cache.eval(
+            _CLAIM_SCRIPT,
+            keys=(self.queue_key, self.processing_key),
+            args=(prefix, suffix, token, int(lease_ttl * 1000)),
+        )
+        if job_id is None:
+            return None
+        return job_id.decode() if isinstance(job_id, bytes) else job_id
+
+    async def renew(self, job_id: str, token: str, lease_ttl: float) -> bool:
+        renewed = await self.cache.eval(
+            _RENEW_SCRIPT,
+            keys=(self.lease_key(job_id),),
+            args=(token, int(lease_ttl * 1000)),
+        )
+        return bool(renewed)
+
+    async def release(self, job_id: str, token: str, requeue: bool = False) -> None:
+        await self.cache.eval(
+            _RELEASE_SCRIPT,
+            keys=(self.lease_key(job_id), self.processing_key, self.queue_key),
+            args=(token, job_id, int(requeue)),
+        )
+
+    async def recover(self) -> int:
+        prefix, suffix = self._lease_affixes
+        return await self.cache.eval(
+            _RECOVER_SCRIPT,
+            keys=(self.queue_key, self.processing_key),
+            args=(prefix, suffix),
+        )
+
+    async def get_state(self, job_id: str) -> Optional[SJobState]:
+        fields = await self.cache.hgetall(self.key(job_id))
+        if not fields:
+            return None
+        fields = {
+            (k.decode() if isinstance(k, bytes) else k): v for k, v in fields.items()
+        }
+        fields.pop("request", None)
+        return SJobState.model_validate(fields)
+
+    async def update(self, job_id: str, **fields: Any) -> None:
+        await self.cache.hset_many(self.key(job_id), _dump(fields), self.ttl)
+
+    async def get_request(self, job_id: str) -> Optional[SBenchmarkRequest]:
+        request = await self.cache.hget(self.key(job_id), "request")
+        return SBenchmarkRequest.model_validate(request) if request else None
+
+    async def save_sample(
+        self, job_id: str, index: int, sample: SBenchmarkSample, **fields: Any
+    ) -> None:
+        async with self.cache.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                self.samples_key(job_id),
+                {str(index): sample.model_dump(mode="json")},
+                self.ttl,
+            )
+            if fields:
+                pipe.hset(self.key(job_id), _dump(fields), self.ttl)
+
+    async def get_samples(self, job_id: str) -> dict[int, SBenchmarkSample]:
+        samples = await self.cache.hgetall(self.samples_key(job_id))
+        return {
+            int(index): SBenchmarkSample.model_validate(sample)
+            for index, sample in samples.items()
+            if sample is not None
+        }
+
+
+class LocalJobStore(JobStore):
+    """
+    Очередь в памяти процесса для локального запуска без Redis.
+    Задачи не переживают перезапуск процесса
+    """
+
+    def __init__(self) -> None:
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._states: dict[str, SJobState] = {}
+        self._requests: dict[str, SBenchmarkRequest] = {}
+        self._samples: dict[str, dict[int, SBenchmarkSample]] = {}
+        self._leases: dict[str, str] = {}
+
+    async def create(self, state: SJobState, request: SBenchmarkRequest) -> None:
+        self._states[state.id] = state
+        self._requests[state.id] = request
+        self._samples[state.id] = {}
+        self._queue.put_nowait(state.id)
+
+    async def claim(self, token: str, lease_ttl: float) -> Optional[str]:
+        try:
+            job_id = self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+        self._leases[job_id] = token
+        return job_id
+
+    async def renew(self, job_id: str, token: str, lease_ttl: float) -> bool:
+        return self._leases.get(job_id) == token
+
+    async def release(self, job_id: str, token: str, requeue: bool = False) -> None:
+        if self._leases.get(job_id) != token:
+            return
+        del self._leases[job_id]
+        if requeue:
+            self._queue.put_nowait(job_id)
+
+    async def get_state(self, job_id: str) -> Optional[SJobState]:
+        return self._states.get(job_id)
+
+    async def update(self, job_id: str, **fields: Any) -> None:
+        state = self._states.get(job_id)
+        if state is not None:
+            self._states[job_id] = state.model_copy(update=fields)
+
+    async def get_request(self, job_id: str) -> Optional[SBenchmarkRequest]:
+        return self._requests.get(job_id)
+
+    async def save_sample(
+        self, job_id: str, index: int, sample: SBenchmarkSample, **fields: Any
+    ) -> None:
+        self._samples.setdefault(job_id, {})[index] = sample
+        if fields:
+            await self.update(job_id, **fields)
+
+    async def get_samples(self, job_id: str) -> dict[int, SBenchmarkSample]:
+        return dict(self._samples.get(job_id, {}))
+
+
+def _dump(fields: dict[str, Any]) -> dict[str, Any]:
+    return {
+        name: value.value if hasattr(value, "value") else value
+        for name, value in fields.items()
+    }
+
+
+# KEYS: queue, processing; ARGV: префикс и суффикс ключа аренды, токен, TTL (мс)
+_CLAIM_SCRIPT = """
+local id = redis.call("LMOVE", KEYS[1], KEYS[2], "RIGHT", "LEFT")
+if id then
+    redis.call("SET", ARGV[1] .. id .. ARGV[2], ARGV[3], "PX", ARGV[4])
+end
+return id
+"""
+
+# KEYS: аренда; ARGV: токен, TTL (мс)
+_RENEW_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# KEYS: аренда, processing, queue; ARGV: токен, id задачи, вернуть в очередь (0/1)
+_RELEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call("DEL", KEYS[1])
+redis.call("LREM", KEYS[2], 1, ARGV[2])
+if ARGV[3] == "1" then
+    redis.call("RPUSH", KEYS[3], ARGV[2])
+end
+return 1
+"""
+
+# KEYS: queue, processing; ARGV: префикс и суффикс ключа аренды
+_RECOVER_SCRIPT = """
+local moved = 0
+for _, id in ipairs(redis.call("LRANGE", KEYS[2], 0, -1)) do
+    if redis.call("EXISTS", ARGV[1] .. id .. ARGV[2]) == 0 then
+        redis.call("LREM", KEYS[2], 1, id)
+        redis.call("RPUSH", KEYS[1], id)
+        moved = moved + 1
+    end
+end
+return moved
+"""
@@ -0,0 +1,240 @@
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from fastapi import HTTPException
+
+from schemas.Results import SResultRecord
+from services.Redis import CacheError, RedisCacheService
+
+_STREAM_ID = re.compile(r"\d+-\d+")
+
+
+class ResultStoreError(Exception):
+    """Хранилище результатов недоступно"""
+
+
+class ResultStore(ABC):
+    """
+    Хранилище замеров только на добавление. Записи пишутся пачками,
+    читаются постранично по диапазону времени одной модели
+    """
+
+    @abstractmethod
+    async def append(self, records: list[SResultRecord]) -> None:
+        """
+        Добавить пачку замеров
+        """
+
+    @abstractmethod
+    async def read(
+        self,
+        model: str,
+        start: float,
+        end: float,
+        limit: int,
+        cursor: Optional[str] = None,
+    ) -> tuple[list[SResultRecord], Optional[str]]:
+        """
+        Страница замеров модели за [start, end) и курсор следующей страницы
+        """
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisStreamResultStore(ResultStore):
+    """
+    Замеры в Redis Streams, по потоку на модель. Идентификатор записи
+    в потоке - timestamp замера (а не время добавления, которое отстает на
+    время буферизации и сколь угодно долго, пока Redis недоступен), поэтому
+    диапазон читается XRANGE без сканирования. Идентификаторы потока растут,
+    и замер старше последней записи (пачка другого процесса) получает ее
+    время; такие записи за пределами диапазона отбрасываются при чтении.
+    Пачка добавляется одним pipeline
+    """
+
+    KEY_PREFIX = "results"
+
+    def __init__(self, cache: RedisCacheService, maxlen: Optional[int] = None):
+        """
+        :param cache: Клиент Redis в отдельном от кеша пространстве имен
+        :param maxlen: Ограничение длины потока одной модели
+        """
+        self.cache = cache
+        self.maxlen = maxlen
+
+    def key(self, model: str) -> str:
+        return f"{self.KEY_PREFIX}:{model}"
+
+    async def append(self, records: list[SResultRecord]) -> None:
+        try:
+            async with self.cache.pipeline() as pipe:
+                for record in records:
+                    pipe.xadd(
+                        self.key(record.model),
+                        record.model_dump(mode="json", exclude_none=True),
+                        maxlen=self.maxlen,
+                        timestamp=record.timestamp,
+                    )
+        except CacheError as e:
+            raise ResultStoreError(str(e)) from e
+
+    async def read(
+        self,
+        model: str,
+        start: float,
+        end: float,
+        limit: int,
+        cursor: Optional[str] = None,
+    ) -> tuple[list[SResultRecord], Optional[str]]:
+        if cursor and not _STREAM_ID.fullmatch(cursor):
+            raise HTTPException(status_code=400, detail="Некорректный курсор")
+        # Границы потока - идентификаторы в миллисекундах, конец не включается
+        low = f"({cursor}" if cursor else str(int(start * 1000))
+        high = str(int(end * 1000) - 1)
+        try:
+            entries = await self.cache.xrange(
+                self.key(model), min=low, max=high, count=limit
+            )
+        except CacheError as e:
+            raise ResultStoreError(str(e)) from e
+        records = [
+            record
+            for record in (
+                SResultRecord.model_validate(value)
+                for _, value in entries
+                if value is not None
+            )
+            # Идентификатор может быть позже timestamp (см. append)
+            if start <= record.timestamp < end
+        ]
+        next_cursor = entries[-1][0] if len(entries) == limit else None
+        return records, next_cursor
+
+
+class SQLiteResultStore(ResultStore):
+    """
+    Замеры в локальном файле SQLite для офлайн-запусков без Redis.
+    Пачка вставляется одной транзакцией, страницы читаются по индексу
+    (model, timestamp, id) с курсором по последней строке
+    """
+
+    COLUMNS = tuple(SResultRecord.model_fields)
+
+    def __init__(self, path: str):
+        """
+        :param path: Путь к файлу базы
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            columns = ", ".join(self.COLUMNS)
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                f"(id INTEGER PRIMARY KEY AUTOINCREMENT, {columns})"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_model_time "
+                "ON results (model, timestamp, id)"
+            )
+            self._connection = connection
+        return self._connection
+
+    def _append(self, records: list[SResultRecord]) -> None:
+        rows = [
+            tuple(getattr(record, column) for column in self.COLUMNS)
+            for record in records
+        ]
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.executemany(
+                    f"INSERT INTO results ({', '.join(self.COLUMNS)}) "
+                    f"VALUES ({placeholders})",
+                    rows,
+                )
+
+    def _read(
+        self,
+        model: str,
+        start: float,
+        end: float,
+        limit: int,
+        cursor: Optional[str],
+    ) -> tuple[list[SResultRecord], Optional[str]]:
+        # id > 0 у любой строки, поэтому первая страница включает и start
+        after_time, after_id = start, 0
+        if cursor:
+            after_time, after_id = _decode_cursor(cursor)
+        with self._lock:
+            rows = (
+                self._connect()
+                .execute(
+                    f"SELECT id, {', '.join(self.COLUMNS)} FROM results "
+                    "WHERE model = ? AND timestamp < ? "
+                    "AND (timestamp > ? OR (timestamp = ? AND id > ?)) "
+                    "ORDER BY timestamp, id LIMIT ?",
+                    (model, end, after_time, after_time, after_id, limit),
+                )
+                .fetchall()
+            )
+        records = [
+            SResultRecord.model_validate(dict(zip(self.COLUMNS, row[1:])))
+            for row in rows
+        ]
+        next_cursor = (
+            f"{rows[-1][self.COLUMNS.index('timestamp') + 1]!r}:{rows[-1][0]}"
+            if len(rows) == limit
+            else None
+        )
+        return records, next_cursor
+
+    async def append(self, records: list[SResultRecord]) -> None:
+        try:
+            await asyncio.to_thread(self._append, records)
+        except (sqlite3.Error, OSError) as e:
+            # OSError - например, каталог RESULTS_SQLITE_PATH не создается
+            raise ResultStoreError(str(e)) from e
+
+    async def read(
+        self,
+        model: str,
+        start: float,
+        end: float,
+        limit: int,
+        cursor: Optional[str] = None,
+    ) -> tuple[list[SResultRecord], Optional[str]]:
+        try:
+            return await asyncio.to_thread(self._read, model, start, end, limit, cursor)
+        except (sqlite3.Error, OSError) as e:
+            # OSError - например, каталог RESULTS_SQLITE_PATH не создается
+            raise ResultStoreError(str(e)) from e
+
+    async def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+def _decode_cursor(cursor: str) -> tuple[float, int]:
+    try:
+        timestamp, row_id = cursor.rsplit(":", 1)
+        return float(timestamp), int(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
@@ -1,8 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from os import error
-from tkinter import E
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, computed_field
 from typing import Any, Dict, List, Optional
 
 
@@ -87,6 +85,85 @@ class SListModels(BaseModel):
     )
 
 
+class SModelsPage(SListModels):
+    total: int = Field(
+        description="Количество моделей, подходящих под фильтры", examples=[312]
+    )
+    next_cursor: Optional[str] = Field(
+        default=None, description="Курсор следующей страницы", examples=[None]
+    )
+
+
+class EModelSort(Enum):
+    ID = "id"
+    NAME = "name"
+    CREATED = "created"
+    CONTEXT_LENGTH = "context_length"
+    PROMPT_PRICE = "prompt_price"
+    COMPLETION_PRICE = "completion_price"
+
+
+class ESortOrder(Enum):
+    ASC = "asc"
+    DESC = "desc"
+
+
+class SModelsQuery(BaseModel):
+    modality: Optional[str] = Field(
+        default=None, description="Модальность модели", examples=["text->text"]
+    )
+    input_modalities: List[str] = Field(
+        default_factory=list,
+        description="Обязательные входные модальности",
+        examples=[["image"]],
+    )
+    output_modalities: List[str] = Field(
+        default_factory=list,
+        description="Обязательные выходные модальности",
+        examples=[["text"]],
+    )
+    min_context_length: Optional[int] = Field(
+        default=None, ge=0, description="Минимальная длина контекста", examples=[32768]
+    )
+    supported_parameters: List[str] = Field(
+        default_factory=list,
+        description="Обязательные поддерживаемые параметры",
+        examples=[["tools"]],
+    )
+    max_prompt_price: Optional[float] = Field(
+        default=None, ge=0, description="Потолок цены токена промпта", examples=[1e-6]
+    )
+    max_completion_price: Optional[float] = Field(
+        default=None, ge=0, description="Потолок цены токена ответа", examples=[2e-6]
+    )
+    sort: Optional[EModelSort] = Field(default=None, description="Поле сортировки")
+    order: ESortOrder = Field(default=ESortOrder.ASC, description="Порядок сортировки")
+    limit: Optional[int] = Field(
+        default=None, ge=1, le=1000, description="Размер страницы", examples=[50]
+    )
+    cursor: Optional[str] = Field(
+        default=None, description="Курсор из next_cursor предыдущей страницы"
+    )
+
+    @property
+    def is_empty(self) -> bool:
+        return self == SModelsQuery()
+
+
+class ECacheCategory(Enum):
+    """Категории кеша; значение - префикс ключей категории в Redis"""
+
+    MODELS = "models"
+    COMPLETIONS = "completions"
+    HISTOGRAMS = "histograms"
+
+
+class ECacheMode(Enum):
+    OFF = "off"
+    USE = "use"
+    REFRESH = "refresh"
+
+
 class SGenerateRequest(BaseModel):
     prompt: str = Field(
         default=...,
@@ -103,6 +180,17 @@ class SGenerateRequest(BaseModel):
         description="Максимальное количество генерируемых токенов",
         examples=[512],
     )
+    stream: bool = Field(
+        default=False,
+        description="Потоковая генерация (SSE) с замером TTFT и межтокенных задержек",
+        examples=[False],
+    )
+    cache: ECacheMode = Field(
+        default=ECacheMode.OFF,
+        description="Кеш ответов: off - не использовать, use - читать и писать, "
+        "refresh - перезапросить и перезаписать (только без stream)",
+        examples=["use"],
+    )
 
 
 class ERole(Enum):
@@ -143,6 +231,11 @@ class SOpenRouterRequest(BaseModel):
         description="Максимальное количество генерируемых токенов",
         examples=[512],
     )
+    stream: Optional[bool] = Field(
+        default=None,
+        description="Потоковая передача ответа через SSE",
+        examples=[True],
+    )
 
 
 class Choice(BaseModel):
@@ -165,6 +258,37 @@ class SUsage(BaseModel):
     total_tokens: int = Field(description="Общее количество токенов", examples=[177])
 
 
+class SLatency(BaseModel):
+    http_code: int = Field(description="HTTP-код ответа OpenRouter", examples=[200])
+    response_size: int = Field(
+        description="Размер тела ответа на проводе (в байтах)", examples=[1843]
+    )
+    dns_time: float = Field(
+        default=0.0, description="Резолв DNS (в секундах)", examples=[0.004]
+    )
+    connect_time: float = Field(
+        default=0.0, description="Установка TCP-соединения (в секундах)"
+    )
+    tls_time: float = Field(default=0.0, description="TLS-рукопожатие (в секундах)")
+    send_time: float = Field(
+        default=0.0, description="Отправка заголовков и тела запроса (в секундах)"
+    )
+    ttfb_time: float = Field(
+        default=0.0,
+        description="Ожидание первого байта ответа: вычисления модели (в секундах)",
+    )
+    download_time: float = Field(
+        default=0.0, description="Загрузка тела ответа (в секундах)"
+    )
+    parse_time: float = Field(
+        default=0.0, description="Валидация ответа pydantic (в секундах)"
+    )
+    time_total: float = Field(description="Полное время вызова (в секундах)")
+    connection_reused: bool = Field(
+        default=False, description="Соединение взято из keep-alive пула"
+    )
+
+
 class SOpenRouterResponse(BaseModel):
     success: bool = True
     error: Optional[str] = None
@@ -187,6 +311,9 @@ class SOpenRouterResponse(BaseModel):
         default_factory=dict, description="Отпечаток системы для воспроизводимости"
     )
     usage: SUsage = Field(description="Информация об использовании токенов")
+    latency: Optional[SLatency] = Field(
+        default=None, description="Разбивка задержки вызова по фазам"
+    )
 
     # Дополнительные computed properties
     @property
@@ -204,25 +331,357 @@ class SOpenRouterResponse(BaseModel):
         """Возвращает текст первого сообщения"""
         return self.choices[0].message.content
 
-    @property
-    def total_cost(
-        self, prompt_price: float = 0.0000005, completion_price: float = 0.0000015
-    ) -> float:
-        """Рассчитывает примерную стоимость запроса"""
-        return (
-            self.usage.prompt_tokens * prompt_price
-            + self.usage.completion_tokens * completion_price
-        )
 
+class SDistribution(BaseModel):
+    count: int = Field(description="Количество наблюдений", examples=[163])
+    min: Optional[float] = Field(default=None, description="Минимум")
+    mean: Optional[float] = Field(default=None, description="Среднее")
+    p50: Optional[float] = Field(default=None, description="Медиана")
+    p95: Optional[float] = Field(default=None, description="95-й перцентиль")
+    p99: Optional[float] = Field(default=None, description="99-й перцентиль")
+    max: Optional[float] = Field(default=None, description="Максимум")
 
-class SLatency(BaseModel):
-    http_code: int
-    response_size: int
-    connect_time: float
-    time_total: float
-    error: str
+
+class SStreamMetrics(BaseModel):
+    ttft_seconds: Optional[float] = Field(
+        default=None,
+        description="Время до первого токена (в секундах)",
+        examples=[0.42],
+    )
+    total_seconds: float = Field(
+        description="Полное время генерации (в секундах)", examples=[3.1]
+    )
+    output_tokens: int = Field(
+        description="Количество сгенерированных токенов", examples=[163]
+    )
+    tokens_per_second: Optional[float] = Field(
+        default=None,
+        description="Скорость генерации после первого токена",
+        examples=[60.6],
+    )
+    inter_token_seconds: SDistribution = Field(
+        description="Распределение интервалов между чанками с токенами"
+    )
 
 
 class SGenerateResponse(BaseModel):
     text: str
     token_used: SUsage | None = None
+    stream_metrics: SStreamMetrics | None = None
+    latency: SLatency | None = None
+    cost: float | None = None
+    prompt_cost: float | None = None
+    completion_cost: float | None = None
+    provider: str | None = None
+    cached: bool = False
+
+
+class SBatchRequest(BaseModel):
+    items: List[SGenerateRequest] = Field(
+        default=...,
+        min_length=1,
+        description="Запросы генерации; результат каждого приходит отдельной "
+        "строкой NDJSON с индексом элемента",
+    )
+    concurrency: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=256,
+        description="Максимум одновременных запросов (по умолчанию из настроек)",
+        examples=[8],
+    )
+
+
+class SBatchItemResult(BaseModel):
+    index: int = Field(description="Индекс элемента во входных данных", examples=[0])
+    model: Optional[str] = Field(
+        default=None,
+        description="Идентификатор модели (нет, если элемент не разобран)",
+        examples=["openai/gpt-4o-mini"],
+    )
+    success: bool = Field(description="Генерация выполнена")
+    http_code: Optional[int] = Field(
+        default=None, description="HTTP-код ошибки", examples=[429]
+    )
+    error: Optional[str] = Field(default=None, description="Текст ошибки")
+    result: Optional[SGenerateResponse] = Field(
+        default=None, description="Ответ генерации"
+    )
+
+
+class SBenchmarkRequest(BaseModel):
+    prompts: List[str] = Field(
+        default=...,
+        min_length=1,
+        description="Список промптов",
+        examples=[["Hello, how are you?"]],
+    )
+    models: List[str] = Field(
+        default=...,
+        min_length=1,
+        description="Идентификаторы сравниваемых моделей",
+        examples=[["qwen/qwen3-next-80b-a3b-thinking", "openai/gpt-4o-mini"]],
+    )
+    repetitions: int = Field(
+        default=1,
+        ge=1,
+        description="Сколько раз повторить каждую пару модель/промпт",
+        examples=[3],
+    )
+    max_tokens: int = Field(
+        default=512,
+        description="Максимальное количество генерируемых токенов",
+        examples=[512],
+    )
+    concurrency: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=256,
+        description="Максимум одновременных запросов (по умолчанию из настроек)",
+        examples=[8],
+    )
+    stream: bool = Field(
+        default=False,
+        description="Использовать потоковую генерацию для замера TTFT",
+        examples=[False],
+    )
+    cache: ECacheMode = Field(
+        default=ECacheMode.OFF,
+        description="Режим кеша ответов для вызовов бенчмарка",
+        examples=["use"],
+    )
+
+
+class SBenchmarkSample(BaseModel):
+    model: str = Field(description="Идентификатор модели")
+    prompt_index: int = Field(description="Индекс промпта в запросе")
+    repetition: int = Field(description="Номер повтора")
+    success: bool = Field(description="Вызов завершился успешно")
+    http_code: Optional[int] = Field(default=None, description="HTTP-код ответа")
+    error: Optional[str] = Field(default=None, description="Текст ошибки")
+    latency_seconds: float = Field(description="Полное время вызова (в секундах)")
+    ttft_seconds: Optional[float] = Field(
+        default=None, description="Время до первого токена (в секундах)"
+    )
+    output_tokens: int = Field(default=0, description="Сгенерировано токенов")
+    tokens_per_second: Optional[float] = Field(
+        default=None, description="Скорость генерации"
+    )
+    cost: Optional[float] = Field(default=None, description="Стоимость вызова")
+    prompt_cost: Optional[float] = Field(
+        default=None, description="Стоимость промпта с платой за запрос"
+    )
+    completion_cost: Optional[float] = Field(
+        default=None, description="Стоимость ответа"
+    )
+    cached: bool = Field(
+        default=False,
+        description="Ответ взят из кеша или из одновременного одинакового вызова; "
+        "такие замеры не входят в распределения и стоимость",
+    )
+
+
+class SBenchmarkModelResult(BaseModel):
+    model: str = Field(description="Идентификатор модели")
+    requests: int = Field(description="Всего вызовов")
+    errors: int = Field(description="Неуспешных вызовов")
+    error_rate: float = Field(description="Доля неуспешных вызовов")
+    latency_seconds: SDistribution = Field(
+        description="Распределение полного времени успешных вызовов"
+    )
+    ttft_seconds: SDistribution = Field(
+        description="Распределение времени до первого токена"
+    )
+    tokens_per_second: SDistribution = Field(
+        description="Распределение скорости генерации"
+    )
+    output_tokens: int = Field(description="Всего сгенерировано токенов")
+    total_cost: float = Field(description="Суммарная стоимость вызовов")
+    error_examples: List[str] = Field(
+        default_factory=list, description="Примеры текстов ошибок"
+    )
+
+    @computed_field(description="Стоимость 1000 токенов ответа (в долларах)")
+    @property
+    def cost_per_1k_output_tokens(self) -> Optional[float]:
+        if not self.output_tokens or not self.total_cost:
+            return None
+        return self.total_cost / self.output_tokens * 1000
+
+    @computed_field(
+        description="Медианная скорость генерации, деленная на стоимость 1000 "
+        "токенов ответа (в долларах): чем больше, тем быстрее модель за те же "
+        "деньги"
+    )
+    @property
+    def tokens_per_second_per_1k_cost(self) -> Optional[float]:
+        cost = self.cost_per_1k_output_tokens
+        if cost is None or self.tokens_per_second.p50 is None:
+            return None
+        return self.tokens_per_second.p50 / cost
+
+
+class SBenchmarkResponse(BaseModel):
+    results: List[SBenchmarkModelResult] = Field(
+        description="Сравнительная таблица по моделям"
+    )
+    total_requests: int = Field(description="Всего выполнено вызовов")
+    concurrency: int = Field(description="Использованный лимит параллелизма")
+    wall_time_seconds: float = Field(description="Время прогона (в секундах)")
+
+
+class ELoadMode(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+
+
+class EArrival(Enum):
+    CONSTANT = "constant"
+    POISSON = "poisson"
+
+
+class SLoadTestRequest(BaseModel):
+    prompt: str = Field(
+        default=...,
+        description="Текст запроса",
+        examples=["Hello, how are you?"],
+    )
+    model: str = Field(
+        default=...,
+        description="Идентификатор модели",
+        examples=["qwen/qwen3-next-80b-a3b-thinking"],
+    )
+    max_tokens: int = Field(
+        default=512,
+        description="Максимальное количество генерируемых токенов",
+        examples=[512],
+    )
+    stream: bool = Field(
+        default=False,
+        description="Использовать потоковую генерацию для замера TTFT",
+        examples=[False],
+    )
+    mode: ELoadMode = Field(
+        default=ELoadMode.CLOSED,
+        description="closed - N виртуальных пользователей, open - заданный поток запросов",
+        examples=["closed"],
+    )
+    duration_seconds: float = Field(
+        default=60,
+        gt=0,
+        le=3600,
+        description="Длительность подачи нагрузки (в секундах)",
+        examples=[60],
+    )
+    virtual_users: int = Field(
+        default=4,
+        ge=1,
+        le=1024,
+        description="Количество виртуальных пользователей (closed)",
+        examples=[4],
+    )
+    rps: float = Field(
+        default=1.0,
+        gt=0,
+        le=1000,
+        description="Целевая интенсивность запросов в секунду (open)",
+        examples=[2.5],
+    )
+    arrival: EArrival = Field(
+        default=EArrival.POISSON,
+        description="Распределение моментов прихода запросов (open)",
+        examples=["poisson"],
+    )
+    max_in_flight: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Ограничение одновременных запросов (open); ожидание слота "
+        "учитывается как задержка в очереди",
+        examples=[64],
+    )
+    window_seconds: float = Field(
+        default=5,
+        gt=0,
+        description="Ширина временного окна для отчета (в секундах)",
+        examples=[5],
+    )
+
+
+class SLoadWindow(BaseModel):
+    start_seconds: float = Field(description="Начало окна от старта теста")
+    completed: int = Field(description="Завершено вызовов в окне")
+    errors: int = Field(description="Неуспешных вызовов в окне")
+    rate_limited: int = Field(description="Ответов 429 в окне")
+    throughput_rps: float = Field(description="Достигнутая пропускная способность")
+    latency_seconds: SDistribution = Field(description="Распределение задержки в окне")
+
+
+class SLoadTestResponse(BaseModel):
+    mode: ELoadMode = Field(description="Режим нагрузки")
+    duration_seconds: float = Field(description="Фактическая длительность теста")
+    offered_rps: Optional[float] = Field(
+        default=None, description="Целевая интенсивность (open)"
+    )
+    sent: int = Field(description="Отправлено запросов")
+    completed: int = Field(description="Успешных вызовов")
+    errors: int = Field(description="Неуспешных вызовов")
+    rate_limited: int = Field(description="Ответов 429")
+    error_rate: float = Field(description="Доля неуспешных вызовов")
+    rate_limited_rate: float = Field(description="Доля ответов 429")
+    achieved_rps: float = Field(description="Успешных вызовов в секунду")
+    latency_seconds: SDistribution = Field(
+        description="Задержка от запланированного момента отправки "
+        "(с поправкой на coordinated omission)"
+    )
+    service_seconds: SDistribution = Field(
+        description="Задержка от фактического момента отправки"
+    )
+    queueing_seconds: SDistribution = Field(
+        description="Ожидание между запланированным и фактическим стартом"
+    )
+    ttft_seconds: SDistribution = Field(
+        description="Распределение времени до первого токена"
+    )
+    windows: List[SLoadWindow] = Field(description="Метрики по временным окнам")
+
+
+class EHistogramMetric(Enum):
+    LATENCY = "latency"
+    TTFT = "ttft"
+    TOKENS_PER_SECOND = "tokens_per_second"
+
+
+class SHistogramResponse(BaseModel):
+    metric: EHistogramMetric = Field(description="Метрика")
+    models: List[str] = Field(description="Модели, чьи гистограммы слиты")
+    summary: SDistribution = Field(description="Сводка по слитой гистограмме")
+    percentiles: Dict[str, Optional[float]] = Field(
+        description="Запрошенные перцентили", examples=[{"p99.9": 12.5}]
+    )
+
+
+class SCompletionCacheStats(BaseModel):
+    hits: int = Field(description="Ответов из кеша")
+    misses: int = Field(description="Вызовов OpenRouter")
+    coalesced: int = Field(description="Запросов, присоединенных к уже идущему вызову")
+    hit_ratio: float = Field(description="Доля попаданий")
+
+
+class SResilienceModelStats(BaseModel):
+    requests: int = Field(description="Вызовов модели")
+    retries: int = Field(description="Выполнено повторов")
+    retries_denied: int = Field(description="Повторов, не выполненных из-за бюджета")
+    hedges: int = Field(description="Запущено дублей")
+    hedges_denied: int = Field(description="Дублей, не запущенных из-за бюджета")
+    hedge_wins: int = Field(description="Дублей, ответивших раньше основного вызова")
+    hedge_win_rate: Optional[float] = Field(description="Доля выигравших дублей")
+    hedge_threshold_seconds: Optional[float] = Field(
+        description="Текущий порог запуска дубля (в секундах)"
+    )
+
+
+class SResilienceStats(BaseModel):
+    models: Dict[str, SResilienceModelStats] = Field(description="Счетчики по моделям")
+    hedging_enabled: bool = Field(description="Хеджирование включено")
+    retry_budget_tokens: float = Field(description="Остаток бюджета повторов")
+    hedge_budget_tokens: float = Field(description="Остаток бюджета дублей")
@@ -0,0 +1,45 @@
+from enum import Enum
+from pydantic import BaseModel, Field
+from typing import Optional
+
+from schemas.Benchmark import SBenchmarkResponse
+
+
+class EJobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    @property
+    def is_final(self) -> bool:
+        return self in (EJobStatus.COMPLETED, EJobStatus.FAILED, EJobStatus.CANCELLED)
+
+
+class SJobState(BaseModel):
+    """Состояние задачи в хранилище, без замеров"""
+
+    id: str = Field(description="Идентификатор задачи")
+    status: EJobStatus = Field(description="Статус задачи")
+    created_at: float = Field(description="Время постановки в очередь, Unix-время")
+    started_at: Optional[float] = Field(
+        default=None, description="Время первого запуска, Unix-время"
+    )
+    finished_at: Optional[float] = Field(
+        default=None, description="Время завершения, Unix-время"
+    )
+    total: int = Field(description="Всего вызовов в задаче")
+    completed: int = Field(default=0, description="Выполнено вызовов")
+    errors: int = Field(default=0, description="Неуспешных вызовов")
+    attempts: int = Field(default=0, description="Сколько раз задачу брал воркер")
+    cancel_requested: bool = Field(default=False, description="Запрошена отмена")
+    error: Optional[str] = Field(default=None, description="Причина сбоя задачи")
+
+
+class SJob(SJobState):
+    progress: float = Field(description="Доля выполненных вызовов", examples=[0.42])
+    result: Optional[SBenchmarkResponse] = Field(
+        default=None,
+        description="Сводка по выполненным вызовам (частичная, пока задача идет)",
+    )
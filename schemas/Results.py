@@ -0,0 +1,125 @@
+from enum import Enum
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from schemas.Benchmark import SBenchmarkModelResult, SDistribution, ESortOrder
+
+
+class SResultRecord(BaseModel):
+    timestamp: float = Field(
+        description="Unix-время завершения вызова", examples=[1754556000.123]
+    )
+    model: str = Field(
+        description="Идентификатор модели", examples=["deepseek/deepseek-r1:free"]
+    )
+    provider: Optional[str] = Field(
+        default=None, description="Провайдер, обслуживший вызов", examples=["Chutes"]
+    )
+    stream: bool = Field(default=False, description="Потоковый вызов")
+    success: bool = Field(description="Вызов завершился успешно")
+    http_code: Optional[int] = Field(default=None, description="HTTP-код ответа")
+    error: Optional[str] = Field(default=None, description="Текст ошибки")
+    time_total: float = Field(description="Полное время вызова (в секундах)")
+    dns_time: Optional[float] = Field(default=None, description="DNS (в секундах)")
+    connect_time: Optional[float] = Field(
+        default=None, description="TCP-соединение (в секундах)"
+    )
+    tls_time: Optional[float] = Field(default=None, description="TLS (в секундах)")
+    send_time: Optional[float] = Field(
+        default=None, description="Отправка запроса (в секундах)"
+    )
+    ttfb_time: Optional[float] = Field(
+        default=None, description="Ожидание первого байта (в секундах)"
+    )
+    download_time: Optional[float] = Field(
+        default=None, description="Загрузка ответа (в секундах)"
+    )
+    ttft_seconds: Optional[float] = Field(
+        default=None, description="Время до первого токена (в секундах)"
+    )
+    prompt_tokens: int = Field(default=0, description="Токенов в промпте")
+    completion_tokens: int = Field(default=0, description="Сгенерировано токенов")
+    tokens_per_second: Optional[float] = Field(
+        default=None, description="Скорость генерации"
+    )
+    cost: Optional[float] = Field(default=None, description="Стоимость вызова")
+
+
+class SResultsQuery(BaseModel):
+    model: str = Field(
+        description="Идентификатор модели", examples=["deepseek/deepseek-r1:free"]
+    )
+    start: float = Field(description="Начало диапазона, Unix-время (включительно)")
+    end: float = Field(description="Конец диапазона, Unix-время (не включительно)")
+    limit: int = Field(default=100, ge=1, le=1000, description="Размер страницы")
+    cursor: Optional[str] = Field(
+        default=None, description="Курсор из next_cursor предыдущей страницы"
+    )
+
+
+class SResultsPage(BaseModel):
+    records: List[SResultRecord] = Field(description="Замеры в порядке времени")
+    next_cursor: Optional[str] = Field(
+        default=None, description="Курсор следующей страницы, если она есть"
+    )
+
+
+class SResultSeriesQuery(BaseModel):
+    model: str = Field(
+        description="Идентификатор модели", examples=["deepseek/deepseek-r1:free"]
+    )
+    start: float = Field(description="Начало диапазона, Unix-время (включительно)")
+    end: float = Field(description="Конец диапазона, Unix-время (не включительно)")
+    bucket_seconds: float = Field(
+        gt=0, description="Ширина корзины (в секундах)", examples=[3600]
+    )
+
+
+class SResultBucket(BaseModel):
+    start: float = Field(description="Начало корзины, Unix-время")
+    requests: int = Field(description="Всего вызовов")
+    errors: int = Field(description="Неуспешных вызовов")
+    latency_seconds: SDistribution = Field(
+        description="Распределение полного времени успешных вызовов"
+    )
+    ttft_seconds: SDistribution = Field(description="Распределение TTFT")
+    tokens_per_second: SDistribution = Field(
+        description="Распределение скорости генерации"
+    )
+    output_tokens: int = Field(description="Всего сгенерировано токенов")
+    total_cost: float = Field(description="Суммарная стоимость вызовов")
+
+
+class SResultSeries(BaseModel):
+    model: str = Field(description="Идентификатор модели")
+    bucket_seconds: float = Field(description="Ширина корзины (в секундах)")
+    buckets: List[SResultBucket] = Field(
+        description="Непустые корзины в порядке времени"
+    )
+
+
+class ELeaderboardSort(Enum):
+    LATENCY = "latency"
+    TTFT = "ttft"
+    TOKENS_PER_SECOND = "tokens_per_second"
+    ERROR_RATE = "error_rate"
+    COST = "cost"
+    REQUESTS = "requests"
+
+
+class SLeaderboardQuery(BaseModel):
+    sort: ELeaderboardSort = Field(
+        default=ELeaderboardSort.LATENCY,
+        description="Поле сортировки: медианы latency, TTFT и tokens/sec, доля "
+        "ошибок, стоимость 1000 токенов ответа или число вызовов",
+    )
+    order: ESortOrder = Field(default=ESortOrder.ASC, description="Порядок сортировки")
+
+
+class SLeaderboard(BaseModel):
+    sort: ELeaderboardSort = Field(description="Поле сортировки")
+    order: ESortOrder = Field(description="Порядок сортировки")
+    generated_at: float = Field(description="Время построения таблицы, Unix-время")
+    models: List[SBenchmarkModelResult] = Field(
+        description="Сводка по моделям за все записанные вызовы"
+    )
@@ -0,0 +1,61 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from schemas.Benchmark import ECacheMode, SBenchmarkModelResult
+
+
+class SSuite(BaseModel):
+    """Параметры набора; сохраняются при первом запуске и сверяются при продолжении"""
+
+    name: str = Field(
+        description="Имя набора, оно же каталог результатов", examples=["smoke"]
+    )
+    dataset: str = Field(
+        description="Абсолютный путь к JSONL-файлу с промптами",
+        examples=["/data/prompts.jsonl"],
+    )
+    models: List[str] = Field(
+        min_length=1,
+        description="Идентификаторы сравниваемых моделей",
+        examples=[["openai/gpt-4o-mini"]],
+    )
+    repetitions: int = Field(default=1, ge=1, description="Повторов каждой строки")
+    max_tokens: int = Field(default=512, description="Максимум токенов ответа")
+    stream: bool = Field(default=False, description="Потоковая генерация")
+    cache: ECacheMode = Field(default=ECacheMode.OFF, description="Кеш ответов")
+    concurrency: Optional[int] = Field(
+        default=None, ge=1, le=256, description="Максимум одновременных запросов"
+    )
+    prompt_field: str = Field(
+        default="prompt",
+        description="Поле с промптом в строке-объекте (строка-строка - сам промпт)",
+    )
+
+
+class SSuiteCheckpoint(BaseModel):
+    """Контрольная точка: все строки до row выполнены и записаны в результаты"""
+
+    row: int = Field(default=0, description="Первая невыполненная строка набора")
+    offset: int = Field(default=0, description="Смещение строки row в файле набора")
+    results_offset: int = Field(
+        default=0,
+        description="Смещение в файле результатов, после которого могут быть "
+        "замеры строк от row и дальше",
+    )
+    dataset_size: int = Field(default=0, description="Размер файла набора")
+    dataset_mtime: float = Field(default=0.0, description="Время изменения набора")
+    started_at: Optional[float] = Field(
+        default=None, description="Время первого запуска, Unix-время"
+    )
+    finished_at: Optional[float] = Field(
+        default=None, description="Время завершения, Unix-время"
+    )
+
+
+class SSuiteReport(BaseModel):
+    name: str = Field(description="Имя набора")
+    rows: int = Field(description="Выполнено строк набора")
+    total_requests: int = Field(description="Всего замеров")
+    errors: int = Field(description="Неуспешных замеров")
+    finished: bool = Field(description="Набор выполнен до конца")
+    results: List[SBenchmarkModelResult] = Field(description="Сводка по моделям")
@@ -0,0 +1,152 @@
+import asyncio
+from typing import AsyncIterator, Iterable, Iterator, NamedTuple, Optional
+
+import httpx
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from config import settings
+from core.logger import logger
+from schemas.Benchmark import SBatchItemResult, SGenerateRequest
+from services.Benchmark import BenchmarkService
+
+
+class _InvalidItem(NamedTuple):
+    """Строка входных данных, которую не удалось разобрать"""
+
+    error: str
+
+
+class BatchService:
+    """
+    Пакетная генерация для офлайн-оценок.
+
+    Элементы выполняются параллельно, не более concurrency одновременно;
+    результат каждого отдается строкой NDJSON сразу по готовности, с индексом
+    элемента во входных данных, поэтому порядок строк - порядок завершения.
+    Память не зависит от размера пакета: входные данные читаются по мере
+    освобождения слотов, а готовые строки ждут клиента в очереди размера
+    concurrency - медленный клиент останавливает чтение новых элементов.
+    Ошибка элемента (в том числе невалидная строка JSONL) не прерывает пакет,
+    а возвращается строкой с success=false.
+    """
+
+    def __init__(
+        self, benchmark_service: BenchmarkService, concurrency: Optional[int] = None
+    ) -> None:
+        """
+        :param benchmark_service: Сервис генерации
+        :param concurrency: Лимит параллелизма по умолчанию
+        """
+        self.benchmark_service = benchmark_service
+        self.concurrency = concurrency or settings.BATCH_CONCURRENCY
+
+    @staticmethod
+    def parse_jsonl(
+        lines: Iterable[bytes],
+    ) -> Iterator[SGenerateRequest | _InvalidItem]:
+        """
+        Элементы пакета из JSONL: одна строка - один SGenerateRequest.
+        Пустые строки пропускаются и не занимают индекс
+        """
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                yield SGenerateRequest.model_validate_json(line)
+            except ValidationError as e:
+                yield _InvalidItem(
+                    "; ".join(
+                        f"{'.'.join(map(str, error['loc'])) or 'body'}: {error['msg']}"
+                        for error in e.errors()
+                    )
+                )
+
+    async def run(
+        self,
+        items: Iterable[SGenerateRequest | _InvalidItem],
+        concurrency: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Строки NDJSON с SBatchItemResult в порядке завершения элементов
+        """
+        concurrency = concurrency or self.concurrency
+        slots = asyncio.Semaphore(concurrency)
+        lines: asyncio.Queue[Optional[str]] = asyncio.Queue(maxsize=concurrency)
+        pending: set[asyncio.Task] = set()
+
+        async def execute(index: int, item: SGenerateRequest | _InvalidItem) -> None:
+            try:
+                line = await self._execute(index, item)
+                # Слот освобождается только после передачи строки клиенту в
+                # очередь: пока клиент не читает, новые элементы не начинаются
+                await lines.put(line)
+            finally:
+                slots.release()
+
+        async def feed() -> None:
+            error: Optional[Exception] = None
+            try:
+                for index, item in enumerate(items):
+                    await slots.acquire()
+                    task = asyncio.create_task(execute(index, item))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+            except Exception as e:
+                # Ошибка чтения входных данных: начатые элементы дорабатывают
+                error = e
+            # Все слоты свободны - все элементы выполнены и переданы
+            for _ in range(concurrency):
+                await slots.acquire()
+            await lines.put(None)
+            if error is not None:
+                raise error
+
+        feeder = asyncio.create_task(feed())
+        try:
+            while (line := await lines.get()) is not None:
+                yield line
+            await feeder
+        finally:
+            # Клиент отключился: незавершенные вызовы больше никому не нужны
+            feeder.cancel()
+            for task in list(pending):
+                task.cancel()
+
+    async def _execute(self, index: int, item: SGenerateRequest | _InvalidItem) -> str:
+        if isinstance(item, _InvalidItem):
+            result = SBatchItemResult(
+                index=index, success=False, http_code=422, error=item.error
+            )
+            return result.model_dump_json(exclude_none=True) + "\n"
+        try:
+            if item.stream:
+                response = await self.benchmark_service.generate_streamed(item)
+            else:
+                response = await self.benchmark_service.generate(item)
+            result = SBatchItemResult(
+                index=index, model=item.model, success=True, result=response
+            )
+        except HTTPException as e:
+            result = SBatchItemResult(
+                index=index,
+                model=item.model,
+                success=False,
+                http_code=e.status_code,
+                error=str(e.detail),
+            )
+        except Exception as e:
+            # httpx.HTTPError, CacheError, ошибки разбора ответа: у каждого
+            # элемента должна быть своя строка в потоке
+            if not isinstance(e, httpx.HTTPError):
+                logger.exception(f"Элемент пакета {index} завершился ошибкой")
+            result = SBatchItemResult(
+                index=index,
+                model=item.model,
+                success=False,
+                error=f"{type(e).__name__}: {e}",
+            )
+        return result.model_dump_json(exclude_none=True) + "\n"
+
+
+__all__ = ["BatchService"]
@@ -1,19 +1,40 @@
-from email.policy import HTTP
-from wsgiref import headers
+import asyncio
+import json
+import time
+from typing import AsyncIterator
+
 from fastapi import HTTPException
-import requests
+import httpx
 from core.logger import logger
+from core.metrics import (
+    UPSTREAM_DURATION,
+    UPSTREAM_ERRORS,
+    UPSTREAM_TOKENS_PER_SECOND,
+    UPSTREAM_TTFT,
+)
+from core.statistics import summarize
+from services.Catalog import ModelCatalog
+from services.CompletionCache import CompletionCache
+from services.Histograms import HistogramService
+from services.Http import RequestTracer
+from services.LocalCache import LocalCache
+from services.Results import ResultService
 
 from repositories.Benchmark import BenchmarkRepository
 from schemas.Benchmark import (
     ERole,
+    SBenchmarkModelResult,
+    SBenchmarkRequest,
+    SBenchmarkResponse,
+    SBenchmarkSample,
     SGenerateRequest,
     SGenerateResponse,
     SListModels,
     SMessage,
-    SModel,
     SOpenRouterRequest,
     SOpenRouterResponse,
+    SStreamMetrics,
+    SUsage,
 )
 from config import settings
 
@@ -21,10 +42,26 @@ from config import settings
 class BenchmarkService:
     def __init__(
         self,
-        repository: BenchmarkRepository = BenchmarkRepository(),
+        repository: BenchmarkRepository,
+        histograms: HistogramService | None = None,
+        models_cache: LocalCache | None = None,
+        completion_cache: CompletionCache | None = None,
+        results: ResultService | None = None,
     ) -> None:
         self.repository = repository
+        self.histograms = histograms
+        self.models_cache = models_cache
+        self.completion_cache = completion_cache
+        self.results = results
         self.api_key = settings.OPENAI_API_KEY
+        self.limit_measurements = settings.RATE_LIMIT_MEASUREMENTS
+
+    def _limited(self, measured: bool) -> bool:
+        """
+        Идет ли вызов через ограничитель: замеры - только с
+        RATE_LIMIT_MEASUREMENTS, иначе бенчмарк мерил бы сам ограничитель
+        """
+        return not measured or self.limit_measurements
 
     async def get_headers(self):
         return {
@@ -32,31 +69,433 @@ class BenchmarkService:
             "Content-Type": "application/json",
         }
 
-    async def get_models(self):
+    async def get_models(self) -> SListModels:
+        catalog = await self.get_model_catalog()
+        return catalog.models
+
+    async def get_model_catalog(self) -> ModelCatalog:
+        """
+        Каталог моделей: из L1-кеша процесса, при промахе - из Redis/OpenRouter
+        """
+        if self.models_cache is None:
+            return await self._load_model_catalog()
+        return await self.models_cache.get_or_load("catalog", self._load_model_catalog)
+
+    async def _load_model_catalog(self) -> ModelCatalog:
         models = await self.repository.get_models()
         if not models:
             raise HTTPException(status_code=404, detail="Модели не найдены")
+        return ModelCatalog.from_raw(models)
+
+    async def generate(
+        self, params: SGenerateRequest, measured: bool = False
+    ) -> SGenerateResponse:
+        """
+        :param measured: Замер провайдера (см. measure): без повторов и
+            хеджирования и без ограничителя вызовов
+        """
+        data: SOpenRouterRequest = SOpenRouterRequest(
+            model=params.model,
+            messages=[SMessage(role=ERole.USER, content=params.prompt)],
+            max_tokens=params.max_tokens,
+        )
+        if self.completion_cache is None:
+            return await self._generate(data, measured)
+        return await self.completion_cache.get_or_call(
+            data, params.cache, lambda: self._generate(data, measured)
+        )
+
+    async def _generate(
+        self, data: SOpenRouterRequest, measured: bool = False
+    ) -> SGenerateResponse:
+        headers: dict[str, str] = await self.get_headers()
+        start_time = time.perf_counter()
+        try:
+            open_router_response: SOpenRouterResponse = (
+                await self.repository.get_chat_completions(
+                    data=data,
+                    headers=headers,
+                    resilient=not measured,
+                    limited=self._limited(measured),
+                )
+            )
+        except Exception as e:
+            self._record_failure(data, e, time.perf_counter() - start_time)
+            raise
+        response = SGenerateResponse(
+            text=open_router_response.first_message,
+            token_used=open_router_response.usage,
+            latency=open_router_response.latency,
+            provider=open_router_response.provider,
+        )
+        await self._attach_cost(data.model, response)
+        self._record_response(data, response)
+        return response
+
+    async def _attach_cost(self, model: str, response: SGenerateResponse) -> None:
+        """
+        Стоимость вызова по ценам модели: индекс цен строится вместе с
+        каталогом и лежит в L1-кеше, поиск - один словарь. Без каталога или
+        usage стоимость остается пустой, а вызов не падает
+        """
+        if response.token_used is None:
+            return
+        try:
+            catalog = await self.get_model_catalog()
+        except Exception as e:
+            # Любой сбой каталога (в т.ч. CacheError при недоступном Redis):
+            # вызов уже выполнен и оплачен, поэтому он не должен стать 500
+            logger.warning(
+                f"Стоимость вызова {model} не посчитана: {type(e).__name__}: {e}"
+            )
+            return
+        price = catalog.price(model)
+        if price is None:
+            return
+        response.prompt_cost, response.completion_cost = price.cost(response.token_used)
+        response.cost = response.prompt_cost + response.completion_cost
+
+    def _record_response(
+        self, data: SOpenRouterRequest, response: SGenerateResponse
+    ) -> None:
+        metrics = response.stream_metrics
+        time_total = (
+            response.latency.time_total
+            if response.latency
+            else metrics.total_seconds if metrics else 0.0
+        )
+        tokens_per_second = metrics.tokens_per_second if metrics else None
+        if metrics is None and response.token_used and time_total > 0:
+            tokens_per_second = response.token_used.completion_tokens / time_total
 
-        models: list[SModel] = [SModel(**model) for model in models]
-        return SListModels(models=models)
+        provider = response.provider or "unknown"
+        UPSTREAM_DURATION.observe(time_total, data.model, provider)
+        if metrics is not None and metrics.ttft_seconds is not None:
+            UPSTREAM_TTFT.observe(metrics.ttft_seconds, data.model, provider)
+        if tokens_per_second is not None:
+            UPSTREAM_TOKENS_PER_SECOND.observe(tokens_per_second, data.model, provider)
+
+        if self.results is None:
+            return
+        self.results.record(
+            self.results.make_record(
+                model=data.model,
+                stream=bool(data.stream),
+                time_total=time_total,
+                latency=response.latency,
+                usage=response.token_used,
+                provider=response.provider,
+                ttft_seconds=metrics.ttft_seconds if metrics else None,
+                tokens_per_second=tokens_per_second,
+                cost=response.cost,
+            )
+        )
+
+    def _record_failure(
+        self, data: SOpenRouterRequest, error: Exception, time_total: float
+    ) -> None:
+        if isinstance(error, HTTPException):
+            http_code, message = error.status_code, str(error.detail)
+        else:
+            http_code, message = None, f"{type(error).__name__}: {error}"
+        UPSTREAM_ERRORS.inc(data.model, str(http_code or type(error).__name__))
+        if self.results is None:
+            return
+        self.results.record(
+            self.results.make_record(
+                model=data.model,
+                stream=bool(data.stream),
+                time_total=time_total,
+                http_code=http_code,
+                error=message,
+            )
+        )
 
-    async def generate(self, params: SGenerateRequest) -> SGenerateResponse:
+    async def generate_stream(self, params: SGenerateRequest) -> AsyncIterator[str]:
+        """
+        Потоковая генерация: ретранслирует SSE-чанки OpenRouter клиенту без
+        буферизации и завершает поток событием metrics с SGenerateResponse.
+        data: [DONE] отправляется последним, после metrics: клиенты в
+        соглашении OpenAI (в том числе официальный SDK) на нем прекращают чтение
+        """
+        async for event in self._stream_events(params):
+            if isinstance(event, SGenerateResponse):
+                yield f"event: metrics\ndata: {event.model_dump_json()}\n\n"
+                yield "data: [DONE]\n\n"
+            else:
+                yield event
+
+    async def generate_streamed(
+        self, params: SGenerateRequest, measured: bool = False
+    ) -> SGenerateResponse:
+        """
+        Потоковая генерация без ретрансляции: возвращает только итог с метриками
+        """
+        response = None
+        async for event in self._stream_events(params, measured):
+            if isinstance(event, SGenerateResponse):
+                response = event
+        return response
+
+    async def _stream_events(
+        self, params: SGenerateRequest, measured: bool = False
+    ) -> AsyncIterator[str | SGenerateResponse]:
         data: SOpenRouterRequest = SOpenRouterRequest(
             model=params.model,
             messages=[SMessage(role=ERole.USER, content=params.prompt)],
             max_tokens=params.max_tokens,
+            stream=True,
         )
         headers: dict[str, str] = await self.get_headers()
-        open_router_response: SOpenRouterResponse = (
-            await self.repository.get_chat_completions(
+
+        tracer = RequestTracer()
+        token_times: list[float] = []
+        text_parts: list[str] = []
+        usage: SUsage | None = None
+        provider: str | None = None
+        done = False
+
+        try:
+            async for line in self.repository.stream_chat_completions(
                 data=data,
                 headers=headers,
+                tracer=tracer,
+                limited=self._limited(measured),
+            ):
+                if done and not line:
+                    # Конец события [DONE]: само событие отправит generate_stream
+                    done = False
+                    continue
+                payload = line[len("data:") :].strip()
+                if line.startswith("data:") and payload == "[DONE]":
+                    done = True
+                    continue
+                yield line + "\n"
+                if not line.startswith("data:"):
+                    continue
+                try:
+                    chunk = json.loads(payload)
+                except json.JSONDecodeError:
+                    logger.warning(
+                        f"Некорректный SSE-чанк от OpenRouter: {payload[:200]}"
+                    )
+                    continue
+                provider = chunk.get("provider") or provider
+                if chunk.get("usage"):
+                    usage = SUsage(**chunk["usage"])
+                for choice in chunk.get("choices") or []:
+                    content = (choice.get("delta") or {}).get("content")
+                    if content:
+                        token_times.append(time.perf_counter())
+                        text_parts.append(content)
+        except Exception as e:
+            self._record_failure(data, e, time.perf_counter() - tracer.start_time)
+            raise
+
+        # Репозиторий сдвигает start_time на момент отправки запроса
+        metrics = self._build_stream_metrics(tracer.start_time, token_times, usage)
+        response = SGenerateResponse(
+            text="".join(text_parts),
+            token_used=usage,
+            stream_metrics=metrics,
+            latency=tracer.to_latency(),
+            provider=provider,
+        )
+        await self._attach_cost(data.model, response)
+        self._record_response(data, response)
+        yield response
+
+    @staticmethod
+    def _build_stream_metrics(
+        start_time: float,
+        token_times: list[float],
+        usage: SUsage | None,
+    ) -> SStreamMetrics:
+        total_seconds = time.perf_counter() - start_time
+        # Если провайдер не прислал usage, считаем каждый чанк с текстом одним токеном
+        output_tokens = usage.completion_tokens if usage else len(token_times)
+        gaps = [b - a for a, b in zip(token_times, token_times[1:])]
+
+        ttft_seconds = None
+        tokens_per_second = None
+        if token_times:
+            ttft_seconds = token_times[0] - start_time
+            generation_seconds = token_times[-1] - token_times[0]
+            if generation_seconds > 0:
+                tokens_per_second = output_tokens / generation_seconds
+
+        return SStreamMetrics(
+            ttft_seconds=ttft_seconds,
+            total_seconds=total_seconds,
+            output_tokens=output_tokens,
+            tokens_per_second=tokens_per_second,
+            inter_token_seconds=summarize(gaps),
+        )
+
+    async def measure(
+        self,
+        params: SGenerateRequest,
+        prompt_index: int = 0,
+        repetition: int = 0,
+    ) -> SBenchmarkSample:
+        """
+        Один замеренный вызов генерации. Ошибки не пробрасываются,
+        а фиксируются в SBenchmarkSample. Вызов идет без повторов и
+        хеджирования: иначе успешный замер скрывал бы ошибки провайдера,
+        а задержка была бы задержкой только последней попытки. Ограничитель
+        вызовов замеры по умолчанию не проходят (RATE_LIMIT_MEASUREMENTS):
+        с ним RPS и задержки упирались бы в RATE_LIMIT_MODEL_RPS и слоты AIMD
+        """
+        start_time = time.perf_counter()
+        try:
+            if params.stream:
+                response = await self.generate_streamed(params, measured=True)
+            else:
+                response = await self.generate(params, measured=True)
+        except HTTPException as e:
+            return SBenchmarkSample(
+                model=params.model,
+                prompt_index=prompt_index,
+                repetition=repetition,
+                success=False,
+                http_code=e.status_code,
+                error=str(e.detail),
+                latency_seconds=time.perf_counter() - start_time,
             )
+        except Exception as e:
+            # httpx.HTTPError, CacheError, ошибки разбора ответа: один
+            # неудачный вызов не должен прерывать весь прогон
+            if not isinstance(e, httpx.HTTPError):
+                logger.exception(f"Замер вызова {params.model} завершился ошибкой")
+            return SBenchmarkSample(
+                model=params.model,
+                prompt_index=prompt_index,
+                repetition=repetition,
+                success=False,
+                error=f"{type(e).__name__}: {e}",
+                latency_seconds=time.perf_counter() - start_time,
+            )
+
+        latency_seconds = (
+            response.latency.time_total
+            if response.latency
+            else time.perf_counter() - start_time
         )
-        return SGenerateResponse(
-            text=open_router_response.first_message,
-            token_used=open_router_response.usage,
+        output_tokens = (
+            response.token_used.completion_tokens if response.token_used else 0
+        )
+        ttft_seconds = None
+        tokens_per_second = None
+        if response.stream_metrics:
+            ttft_seconds = response.stream_metrics.ttft_seconds
+            tokens_per_second = response.stream_metrics.tokens_per_second
+            output_tokens = response.stream_metrics.output_tokens
+        elif latency_seconds > 0:
+            tokens_per_second = output_tokens / latency_seconds
+
+        sample = SBenchmarkSample(
+            model=params.model,
+            prompt_index=prompt_index,
+            repetition=repetition,
+            success=True,
+            http_code=response.latency.http_code if response.latency else 200,
+            latency_seconds=latency_seconds,
+            ttft_seconds=ttft_seconds,
+            output_tokens=output_tokens,
+            tokens_per_second=tokens_per_second,
+            cost=response.cost,
+            prompt_cost=response.prompt_cost,
+            completion_cost=response.completion_cost,
+            cached=response.cached,
+        )
+        if self.histograms is not None and not sample.cached:
+            self.histograms.record_sample(sample)
+        return sample
+
+    async def benchmark(self, params: SBenchmarkRequest) -> SBenchmarkResponse:
+        """
+        Сравнение моделей: все вызовы выполняются параллельно под общим
+        семафором, поэтому время прогона определяется самой медленной моделью
+        """
+        concurrency = params.concurrency or settings.BENCHMARK_CONCURRENCY
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(request: SGenerateRequest, prompt_index: int, repetition: int):
+            async with semaphore:
+                return await self.measure(request, prompt_index, repetition)
+
+        # Модели чередуются в очереди, чтобы повторы одной модели не занимали
+        # все слоты семафора подряд
+        tasks = [
+            run(
+                SGenerateRequest(
+                    prompt=prompt,
+                    model=model,
+                    max_tokens=params.max_tokens,
+                    stream=params.stream,
+                    cache=params.cache,
+                ),
+                prompt_index,
+                repetition,
+            )
+            for repetition in range(params.repetitions)
+            for prompt_index, prompt in enumerate(params.prompts)
+            for model in params.models
+        ]
+
+        start_time = time.perf_counter()
+        samples: list[SBenchmarkSample] = await asyncio.gather(*tasks)
+        wall_time_seconds = time.perf_counter() - start_time
+
+        return SBenchmarkResponse(
+            results=self.aggregate(samples, models=params.models),
+            total_requests=len(samples),
+            concurrency=concurrency,
+            wall_time_seconds=wall_time_seconds,
         )
 
-    # TODO доделать generate c stream=true
-    # TODO доделать benchmark базовый и отверстать template для отображения сравнительной таблицы
+    @staticmethod
+    def aggregate(
+        samples: list[SBenchmarkSample],
+        models: list[str] | None = None,
+    ) -> list[SBenchmarkModelResult]:
+        """
+        Сводная таблица по моделям из отдельных замеров
+        """
+        by_model: dict[str, list[SBenchmarkSample]] = {
+            model: [] for model in models or []
+        }
+        for sample in samples:
+            by_model.setdefault(sample.model, []).append(sample)
+
+        results = []
+        for model, model_samples in by_model.items():
+            succeeded = [sample for sample in model_samples if sample.success]
+            errors = len(model_samples) - len(succeeded)
+            # Ответы из кеша и объединенных вызовов - не замеры провайдера
+            succeeded = [sample for sample in succeeded if not sample.cached]
+            results.append(
+                SBenchmarkModelResult(
+                    model=model,
+                    requests=len(model_samples),
+                    errors=errors,
+                    error_rate=errors / len(model_samples) if model_samples else 0.0,
+                    latency_seconds=summarize(s.latency_seconds for s in succeeded),
+                    ttft_seconds=summarize(
+                        s.ttft_seconds for s in succeeded if s.ttft_seconds is not None
+                    ),
+                    tokens_per_second=summarize(
+                        s.tokens_per_second
+                        for s in succeeded
+                        if s.tokens_per_second is not None
+                    ),
+                    output_tokens=sum(s.output_tokens for s in succeeded),
+                    total_cost=sum(s.cost or 0.0 for s in succeeded),
+                    error_examples=list(
+                        dict.fromkeys(
+                            s.error for s in model_samples if not s.success and s.error
+                        )
+                    )[:5],
+                )
+            )
+        return results
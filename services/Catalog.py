@@ -0,0 +1,273 @@
+import base64
+import bisect
+import hashlib
+import json
+import math
+from typing import Iterable, NamedTuple, Optional
+
+from fastapi import HTTPException
+
+from schemas.Benchmark import (
+    EModelSort,
+    ESortOrder,
+    SListModels,
+    SModel,
+    SModelsQuery,
+    SUsage,
+)
+
+
+def _price(model: SModel, name: str) -> float:
+    """
+    Цена из pricing; отсутствующая или переменная (-1) цена - бесконечность
+    """
+    try:
+        value = float((model.pricing or {}).get(name))
+    except (TypeError, ValueError):
+        return math.inf
+    return value if value >= 0 else math.inf
+
+
+class ModelPrice(NamedTuple):
+    """Цены модели в долларах: за токен промпта, за токен ответа и за запрос"""
+
+    prompt: float
+    completion: float
+    request: float = 0.0
+
+    @classmethod
+    def from_model(cls, model: SModel) -> Optional["ModelPrice"]:
+        prompt, completion = _price(model, "prompt"), _price(model, "completion")
+        if math.isinf(prompt) or math.isinf(completion):
+            return None
+        request = _price(model, "request")
+        return cls(prompt, completion, 0.0 if math.isinf(request) else request)
+
+    def cost(self, usage: SUsage) -> tuple[float, float]:
+        """
+        Стоимость промпта (с платой за запрос) и ответа по фактическому usage
+        """
+        return (
+            usage.prompt_tokens * self.prompt + self.request,
+            usage.completion_tokens * self.completion,
+        )
+
+
+class _RangeIndex:
+    """Отсортированные значения числового поля с позициями моделей"""
+
+    __slots__ = ("values", "positions")
+
+    def __init__(self, values: list[float]) -> None:
+        order = sorted(range(len(values)), key=values.__getitem__)
+        self.values = [values[position] for position in order]
+        self.positions = order
+
+    def at_least(self, bound: float) -> list[int]:
+        return self.positions[bisect.bisect_left(self.values, bound) :]
+
+    def at_most(self, bound: float) -> list[int]:
+        return self.positions[: bisect.bisect_right(self.values, bound)]
+
+
+class ModelCatalog:
+    """
+    Провалидированный каталог моделей вместе с готовым JSON-телом ответа
+    и вторичными индексами для фильтрации. Строится один раз при обновлении
+    каталога и хранится в L1-кеше, так что запросы к нему не сканируют
+    все модели и не сериализуют их заново
+    """
+
+    def __init__(self, models: SListModels) -> None:
+        self.models = models
+        items = models.models
+        self.size = len(items)
+
+        # JSON каждой модели сериализуется один раз, страницы собираются склейкой
+        self._model_json: list[bytes] = [
+            model.model_dump_json().encode() for model in items
+        ]
+        self.body: bytes = self._render(range(self.size), self.size, None)
+        self.etag: str = hashlib.md5(self.body).hexdigest()
+
+        self._by_modality: dict[str, set[int]] = {}
+        self._by_input: dict[str, set[int]] = {}
+        self._by_output: dict[str, set[int]] = {}
+        self._by_parameter: dict[str, set[int]] = {}
+        for position, model in enumerate(items):
+            architecture = model.architecture
+            self._by_modality.setdefault(architecture.modality, set()).add(position)
+            for modality in architecture.input_modalities:
+                self._by_input.setdefault(modality, set()).add(position)
+            for modality in architecture.output_modalities:
+                self._by_output.setdefault(modality, set()).add(position)
+            for parameter in model.supported_parameters:
+                self._by_parameter.setdefault(parameter, set()).add(position)
+
+        # Цены по id модели: стоимость вызова считается без поиска по каталогу
+        self._prices: dict[str, ModelPrice] = {}
+        for model in items:
+            price = ModelPrice.from_model(model)
+            if price is not None:
+                self._prices[model.id] = price
+                if model.canonical_slug:
+                    self._prices.setdefault(model.canonical_slug, price)
+
+        self._context_length = [model.context_length for model in items]
+        self._prompt_price = [_price(model, "prompt") for model in items]
+        self._completion_price = [_price(model, "completion") for model in items]
+        self._range = {
+            "context_length": _RangeIndex(self._context_length),
+            "prompt_price": _RangeIndex(self._prompt_price),
+            "completion_price": _RangeIndex(self._completion_price),
+        }
+
+        sort_keys = {
+            EModelSort.ID: [model.id for model in items],
+            EModelSort.NAME: [model.name for model in items],
+            EModelSort.CREATED: [model.created for model in items],
+            EModelSort.CONTEXT_LENGTH: self._context_length,
+            EModelSort.PROMPT_PRICE: self._prompt_price,
+            EModelSort.COMPLETION_PRICE: self._completion_price,
+        }
+        # Для каждой сортировки: порядок позиций и ранг позиции в этом порядке
+        self._order: dict[EModelSort, list[int]] = {}
+        self._rank: dict[EModelSort, list[int]] = {}
+        for sort, keys in sort_keys.items():
+            order = sorted(range(self.size), key=keys.__getitem__)
+            rank = [0] * self.size
+            for index, position in enumerate(order):
+                rank[position] = index
+            self._order[sort] = order
+            self._rank[sort] = rank
+
+    @classmethod
+    def from_raw(cls, raw_models: list[dict]) -> "ModelCatalog":
+        return cls(SListModels.model_validate({"models": raw_models}))
+
+    def price(self, model: str) -> Optional[ModelPrice]:
+        """
+        Цены модели; для вариантов маршрутизации (":nitro", ":floor"), которых
+        нет в каталоге отдельно, - цены базовой модели
+        """
+        price = self._prices.get(model)
+        if price is None and ":" in model:
+            price = self._prices.get(model.partition(":")[0])
+        return price
+
+    def _render(
+        self, positions: Iterable[int], total: int, next_cursor: Optional[str]
+    ) -> bytes:
+        return b"".join(
+            (
+                b'{"models":[',
+                b",".join(self._model_json[position] for position in positions),
+                b'],"total":',
+                str(total).encode(),
+                b',"next_cursor":',
+                json.dumps(next_cursor).encode(),
+                b"}",
+            )
+        )
+
+    def _filter(self, query: SModelsQuery) -> Optional[set[int]]:
+        """
+        Позиции моделей, подходящих под фильтры (None - без фильтров).
+        Точные фильтры пересекаются начиная с самого узкого множества,
+        диапазоны берутся бинарным поиском по отсортированным значениям
+        """
+        sets: list[set[int]] = []
+        if query.modality is not None:
+            sets.append(self._by_modality.get(query.modality, set()))
+        for modality in query.input_modalities:
+            sets.append(self._by_input.get(modality, set()))
+        for modality in query.output_modalities:
+            sets.append(self._by_output.get(modality, set()))
+        for parameter in query.supported_parameters:
+            sets.append(self._by_parameter.get(parameter, set()))
+
+        ranges: list[tuple[str, list[int], float, bool]] = []
+        if query.min_context_length is not None:
+            ranges.append(
+                ("context_length", self._context_length, query.min_context_length, True)
+            )
+        if query.max_prompt_price is not None:
+            ranges.append(
+                ("prompt_price", self._prompt_price, query.max_prompt_price, False)
+            )
+        if query.max_completion_price is not None:
+            ranges.append(
+                (
+                    "completion_price",
+                    self._completion_price,
+                    query.max_completion_price,
+                    False,
+                )
+            )
+
+        candidates: Optional[set[int]] = None
+        if sets:
+            sets.sort(key=len)
+            candidates = set(sets[0])
+            for other in sets[1:]:
+                candidates &= other
+
+        for name, values, bound, lower in ranges:
+            if candidates is not None:
+                # Кандидатов уже мало: проверяем значения напрямую
+                if lower:
+                    candidates = {p for p in candidates if values[p] >= bound}
+                else:
+                    candidates = {p for p in candidates if values[p] <= bound}
+            else:
+                index = self._range[name]
+                matched = index.at_least(bound) if lower else index.at_most(bound)
+                candidates = set(matched)
+        return candidates
+
+    def query(self, query: SModelsQuery) -> tuple[bytes, str]:
+        """
+        Страница каталога по фильтрам: готовое JSON-тело и его ETag
+        """
+        if query.is_empty:
+            return self.body, self.etag
+
+        offset = _decode_cursor(query.cursor)
+        candidates = self._filter(query)
+        sort = query.sort or EModelSort.ID
+        descending = query.order == ESortOrder.DESC
+
+        if candidates is None:
+            order = self._order[sort]
+            ordered = order[::-1] if descending else order
+            total = self.size
+        else:
+            ordered = sorted(
+                candidates, key=self._rank[sort].__getitem__, reverse=descending
+            )
+            total = len(ordered)
+
+        end = total if query.limit is None else offset + query.limit
+        page = ordered[offset:end]
+        next_cursor = _encode_cursor(end) if end < total else None
+
+        body = self._render(page, total, next_cursor)
+        canonical = query.model_dump_json(exclude_defaults=True)
+        etag = hashlib.md5(f"{self.etag}:{canonical}".encode()).hexdigest()
+        return body, etag
+
+
+def _encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"o": offset}).encode()).decode()
+
+
+def _decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        offset = json.loads(base64.urlsafe_b64decode(cursor.encode()))["o"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+    if not isinstance(offset, int) or offset < 0:
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+    return offset
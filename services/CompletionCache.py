@@ -0,0 +1,122 @@
+import asyncio
+import hashlib
+import json
+from typing import Awaitable, Callable, Dict
+
+from config import settings
+from core.metrics import CACHE_LOOKUPS
+from schemas.Benchmark import (
+    ECacheCategory,
+    ECacheMode,
+    SCompletionCacheStats,
+    SGenerateResponse,
+    SOpenRouterRequest,
+)
+from services.Redis import RedisCacheService, redis_cache
+
+
+class CompletionCache:
+    """
+    Кеш ответов OpenRouter с адресацией по содержимому запроса.
+
+    Ключ - sha256 канонического JSON всего SOpenRouterRequest, поэтому
+    одинаковые (модель, сообщения, параметры) дают одинаковый ключ.
+    Одновременные одинаковые запросы объединяются в один вызов OpenRouter.
+    Ошибки не кешируются.
+    """
+
+    KEY_PREFIX = ECacheCategory.COMPLETIONS.value
+
+    def __init__(self, cache: RedisCacheService, ttl: int = 7 * 24 * 3600):
+        """
+        :param cache: Клиент Redis-кеша
+        :param ttl: Время жизни закешированного ответа (в секундах)
+        """
+        self.cache = cache
+        self.ttl = ttl
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def fingerprint(data: SOpenRouterRequest) -> str:
+        canonical = json.dumps(
+            data.model_dump(mode="json", exclude_none=True),
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def key(self, fingerprint: str) -> str:
+        return f"{self.KEY_PREFIX}:{fingerprint}"
+
+    async def get_or_call(
+        self,
+        data: SOpenRouterRequest,
+        mode: ECacheMode,
+        call: Callable[[], Awaitable[SGenerateResponse]],
+    ) -> SGenerateResponse:
+        if mode == ECacheMode.OFF:
+            return await call()
+
+        fingerprint = self.fingerprint(data)
+        if mode == ECacheMode.USE:
+            cached = await self.cache.get(self.key(fingerprint))
+            if cached is not None:
+                self.hits += 1
+                CACHE_LOOKUPS.inc(self.KEY_PREFIX, "hit")
+                return _reused(SGenerateResponse.model_validate(cached))
+
+        task = self._inflight.get(fingerprint)
+        if task is not None:
+            self.coalesced += 1
+            CACHE_LOOKUPS.inc(self.KEY_PREFIX, "coalesced")
+            # Ответ чужого вызова: как и попадание в кеш, он не замер
+            # провайдера и не должен учитываться как отдельный вызов
+            return _reused(await asyncio.shield(task))
+
+        self.misses += 1
+        CACHE_LOOKUPS.inc(self.KEY_PREFIX, "miss")
+
+        async def load() -> SGenerateResponse:
+            response = await call()
+            await self.cache.set(
+                self.key(fingerprint), response.model_dump(mode="json"), self.ttl
+            )
+            return response
+
+        task = asyncio.create_task(load())
+        self._inflight[fingerprint] = task
+        task.add_done_callback(lambda _: self._inflight.pop(fingerprint, None))
+        return await asyncio.shield(task)
+
+    def stats(self) -> SCompletionCacheStats:
+        lookups = self.hits + self.misses + self.coalesced
+        return SCompletionCacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            coalesced=self.coalesced,
+            hit_ratio=(self.hits + self.coalesced) / lookups if lookups else 0.0,
+        )
+
+
+def _reused(response: SGenerateResponse) -> SGenerateResponse:
+    """
+    Повторно отданный ответ: из кеша или чужого вызова. За него не платили,
+    поэтому стоимость нулевая, а сохраненная - стоимость исходного вызова
+    """
+    return response.model_copy(
+        update={
+            "cached": True,
+            "cost": 0.0,
+            "prompt_cost": 0.0,
+            "completion_cost": 0.0,
+        }
+    )
+
+
+completion_cache = CompletionCache(redis_cache, ttl=settings.COMPLETION_CACHE_TTL)
+
+__all__ = ["completion_cache", "CompletionCache"]
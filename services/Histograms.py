@@ -0,0 +1,102 @@
+from typing import Optional
+
+from config import settings
+from core.histogram import HISTOGRAM_LAYOUTS, LogHistogram, make_histogram
+from core.logger import logger
+from core.periodic import PeriodicFlusher
+from schemas.Benchmark import ECacheCategory, SBenchmarkSample
+from services.Redis import CacheError, RedisCacheService, redis_cache
+
+
+class HistogramService(PeriodicFlusher):
+    """
+    Гистограммы latency, TTFT и tokens/sec по моделям.
+
+    Каждый воркер копит приращения в локальных гистограммах (запись - O(1)
+    без сетевых вызовов) и периодически сбрасывает их в Redis-хэши через
+    HINCRBY, поэтому хэш в Redis всегда содержит слитую гистограмму всех
+    воркеров.
+    """
+
+    KEY_PREFIX = ECacheCategory.HISTOGRAMS.value
+
+    def __init__(
+        self,
+        cache: RedisCacheService,
+        flush_interval: float = 5.0,
+        ttl: Optional[int] = None,
+    ):
+        """
+        :param cache: Клиент Redis-кеша
+        :param flush_interval: Период сброса локальных приращений (в секундах)
+        :param ttl: Время жизни гистограмм в Redis (в секундах)
+        """
+        self.cache = cache
+        self.flush_interval = flush_interval
+        self.ttl = ttl
+        self._pending: dict[tuple[str, str], LogHistogram] = {}
+
+    def key(self, metric: str, model: str) -> str:
+        return f"{self.KEY_PREFIX}:{metric}:{model}"
+
+    def record(self, metric: str, model: str, value: float) -> None:
+        histogram = self._pending.get((metric, model))
+        if histogram is None:
+            histogram = self._pending[(metric, model)] = make_histogram(metric)
+        histogram.record(value)
+
+    def record_sample(self, sample: SBenchmarkSample) -> None:
+        if not sample.success:
+            return
+        self.record("latency", sample.model, sample.latency_seconds)
+        if sample.ttft_seconds is not None:
+            self.record("ttft", sample.model, sample.ttft_seconds)
+        if sample.tokens_per_second is not None:
+            self.record("tokens_per_second", sample.model, sample.tokens_per_second)
+
+    async def flush(self) -> None:
+        """
+        Сброс накопленных приращений в Redis одним pipeline
+        """
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            async with self.cache.pipeline(transaction=True) as pipe:
+                for (metric, model), histogram in pending.items():
+                    pipe.hincrby_many(
+                        self.key(metric, model), histogram.to_fields(), ttl=self.ttl
+                    )
+        except CacheError as e:
+            # Не теряем данные: вернем приращения в буфер до следующего сброса
+            logger.warning(f"Не удалось сбросить гистограммы: {e}")
+            for (metric, model), histogram in pending.items():
+                self._pending.setdefault((metric, model), make_histogram(metric)).merge(
+                    histogram
+                )
+
+    async def get(self, metric: str, models: list[str]) -> LogHistogram:
+        """
+        Слитая гистограмма метрики по списку моделей
+        """
+        if metric not in HISTOGRAM_LAYOUTS:
+            raise KeyError(metric)
+        merged = make_histogram(metric)
+        for model in models:
+            fields = await self.cache.hgetall(self.key(metric, model))
+            merged.load_fields(
+                {
+                    (k.decode() if isinstance(k, bytes) else k): v
+                    for k, v in fields.items()
+                }
+            )
+        return merged
+
+
+histograms = HistogramService(
+    redis_cache,
+    flush_interval=settings.HISTOGRAM_FLUSH_INTERVAL,
+    ttl=settings.HISTOGRAM_TTL,
+)
+
+__all__ = ["histograms", "HistogramService"]
@@ -0,0 +1,347 @@
+import asyncio
+import ipaddress
+import socket
+import time
+import typing
+from typing import Optional
+
+import anyio
+import httpcore
+import httpx
+
+from config import settings
+from core.logger import logger
+from schemas.Benchmark import SLatency
+
+
+class _TimedNetworkStream(httpcore.AsyncNetworkStream):
+    """
+    Сетевой поток, запоминающий время DNS-резолва при его открытии
+    """
+
+    def __init__(self, stream: httpcore.AsyncNetworkStream, dns_time: float):
+        self._stream = stream
+        self.dns_time = dns_time
+
+    async def read(self, max_bytes: int, timeout: Optional[float] = None) -> bytes:
+        return await self._stream.read(max_bytes, timeout)
+
+    async def write(self, buffer: bytes, timeout: Optional[float] = None) -> None:
+        await self._stream.write(buffer, timeout)
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+
+    async def start_tls(
+        self,
+        ssl_context,
+        server_hostname: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> httpcore.AsyncNetworkStream:
+        return await self._stream.start_tls(ssl_context, server_hostname, timeout)
+
+    def get_extra_info(self, info: str) -> typing.Any:
+        return self._stream.get_extra_info(info)
+
+
+class DNSTimingBackend(httpcore.AsyncNetworkBackend):
+    """
+    Сетевой бэкенд httpcore, который резолвит имя отдельно от TCP-подключения,
+    чтобы время DNS можно было отделить от времени установки соединения
+    """
+
+    def __init__(self, backend: httpcore.AsyncNetworkBackend):
+        self._backend = backend
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: typing.Optional[typing.Iterable] = None,
+    ) -> httpcore.AsyncNetworkStream:
+        try:
+            ipaddress.ip_address(host)
+            addresses = [host]
+            dns_time = 0.0
+        except ValueError:
+            start_time = time.perf_counter()
+            try:
+                with anyio.fail_after(timeout):
+                    infos = await anyio.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            except TimeoutError as e:
+                raise httpcore.ConnectTimeout(f"DNS timeout for {host}") from e
+            except OSError as e:
+                raise httpcore.ConnectError(str(e)) from e
+            dns_time = time.perf_counter() - start_time
+            addresses = list(dict.fromkeys(info[4][0] for info in infos))
+
+        last_error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                stream = await self._backend.connect_tcp(
+                    address,
+                    port,
+                    timeout=timeout,
+                    local_address=local_address,
+                    socket_options=socket_options,
+                )
+                return _TimedNetworkStream(stream, dns_time)
+            except httpcore.ConnectError as e:
+                last_error = e
+        raise last_error
+
+    async def connect_unix_socket(
+        self,
+        path: str,
+        timeout: Optional[float] = None,
+        socket_options: typing.Optional[typing.Iterable] = None,
+    ) -> httpcore.AsyncNetworkStream:
+        return await self._backend.connect_unix_socket(
+            path, timeout=timeout, socket_options=socket_options
+        )
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+class RequestTracer:
+    """
+    Собирает временные метки фаз запроса из trace-событий httpcore.
+    Передается в запрос через extensions={"trace": tracer}
+    """
+
+    def __init__(self) -> None:
+        self.start_time = time.perf_counter()
+        self.events: dict[str, float] = {}
+        self.dns_time = 0.0
+        self.http_code = 0
+        self.response_size = 0
+
+    async def __call__(self, event_name: str, info: dict) -> None:
+        # "connection.connect_tcp.started" -> "connect_tcp.started"
+        _, _, name = event_name.partition(".")
+        self.events[name] = time.perf_counter()
+        if name == "connect_tcp.complete":
+            stream = info.get("return_value")
+            self.dns_time = getattr(stream, "dns_time", 0.0)
+
+    def span(self, first: str, last: Optional[str] = None) -> float:
+        """
+        Длительность от начала фазы first до окончания фазы last
+        """
+        started = self.events.get(f"{first}.started")
+        completed = self.events.get(f"{last or first}.complete")
+        if started is None or completed is None:
+            return 0.0
+        return completed - started
+
+    @property
+    def headers_time(self) -> float:
+        """
+        Время от начала запроса до получения заголовков ответа
+        """
+        received = self.events.get("receive_response_headers.complete")
+        return (received or time.perf_counter()) - self.start_time
+
+    def to_latency(
+        self,
+        http_code: Optional[int] = None,
+        response_size: Optional[int] = None,
+        parse_time: float = 0.0,
+    ) -> SLatency:
+        http_code = http_code if http_code is not None else self.http_code
+        response_size = (
+            response_size if response_size is not None else self.response_size
+        )
+        connection_reused = "connect_tcp.started" not in self.events
+        return SLatency(
+            http_code=http_code,
+            response_size=response_size,
+            dns_time=self.dns_time,
+            connect_time=max(self.span("connect_tcp") - self.dns_time, 0.0),
+            tls_time=self.span("start_tls"),
+            send_time=self.span("send_request_headers", "send_request_body"),
+            ttfb_time=self.span("receive_response_headers"),
+            download_time=self.span("receive_response_body"),
+            parse_time=parse_time,
+            time_total=time.perf_counter() - self.start_time,
+            connection_reused=connection_reused,
+        )
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """
+    Тело ответа, которое снимает вызов с учета при закрытии
+    """
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close: typing.Callable):
+        self._stream = stream
+        self._on_close = on_close
+
+    async def __aiter__(self) -> typing.AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._on_close()
+
+
+class DrainingTransport(httpx.AsyncBaseTransport):
+    """
+    Транспорт, считающий вызовы в полете: от отправки запроса до закрытия
+    тела ответа (для потоковых ответов - до конца потока)
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+        self.in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def _enter(self) -> None:
+        self.in_flight += 1
+        self._idle.clear()
+
+    def _exit(self) -> None:
+        self.in_flight -= 1
+        if self.in_flight == 0:
+            self._idle.set()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._enter()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            self._exit()
+            raise
+        response.stream = _TrackedStream(response.stream, self._exit)
+        return response
+
+    async def wait_idle(self) -> None:
+        await self._idle.wait()
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class HttpClientService:
+    """
+    Общий асинхронный HTTP-клиент с пулом keep-alive соединений
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 120.0,
+        write_timeout: float = 10.0,
+        pool_timeout: float = 10.0,
+    ):
+        """
+        Инициализация параметров пула (сам клиент создается в start)
+
+        :param max_connections: Максимальное число одновременных соединений
+        :param max_keepalive_connections: Сколько простаивающих соединений держать открытыми
+        :param keepalive_expiry: Время жизни простаивающего соединения (в секундах)
+        :param connect_timeout: Таймаут установки соединения
+        :param read_timeout: Таймаут чтения ответа
+        :param write_timeout: Таймаут отправки запроса
+        :param pool_timeout: Таймаут ожидания свободного соединения из пула
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(
+            connect=connect_timeout,
+            read=read_timeout,
+            write=write_timeout,
+            pool=pool_timeout,
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self._transport: Optional[DrainingTransport] = None
+
+    @property
+    def in_flight(self) -> int:
+        return self._transport.in_flight if self._transport is not None else 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError("HTTP-клиент не инициализирован, вызовите start()")
+        return self._client
+
+    async def start(self) -> httpx.AsyncClient:
+        """
+        Открытие пула соединений
+        """
+        if self._client is None:
+            transport = httpx.AsyncHTTPTransport(limits=self.limits)
+            _time_dns(transport)
+            self._transport = DrainingTransport(transport)
+            self._client = httpx.AsyncClient(
+                transport=self._transport, limits=self.limits, timeout=self.timeout
+            )
+        return self._client
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Ожидание завершения вызовов в полете; False - не дождались за timeout
+        """
+        if self._transport is None or self._transport.in_flight == 0:
+            return True
+        logger.info(f"Ожидание вызовов OpenRouter в полете: {self.in_flight}")
+        try:
+            await asyncio.wait_for(self._transport.wait_idle(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Не дождались вызовов OpenRouter: {self.in_flight}")
+            return False
+        return True
+
+    async def close(self) -> None:
+        """
+        Закрытие пула соединений
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._transport = None
+
+
+def _time_dns(transport: httpx.AsyncHTTPTransport) -> None:
+    """
+    Подмена сетевого бэкенда пула, чтобы отдельно замерять DNS. У httpx нет
+    публичного способа передать бэкенд, поэтому атрибуты проверяются: если
+    после обновления httpx/httpcore их нет, клиент работает, а dns_time
+    остается нулевым (и входит в connect_time)
+    """
+    pool = getattr(transport, "_pool", None)
+    backend = getattr(pool, "_network_backend", None)
+    if not isinstance(backend, httpcore.AsyncNetworkBackend):
+        logger.warning(
+            "Замер DNS отключен: пул httpx не дает подменить сетевой бэкенд "
+            f"(httpx {httpx.__version__}, httpcore {httpcore.__version__})"
+        )
+        return
+    pool._network_backend = DNSTimingBackend(backend)
+
+
+http_client = HttpClientService(
+    max_connections=settings.HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    connect_timeout=settings.HTTP_CONNECT_TIMEOUT,
+    read_timeout=settings.HTTP_READ_TIMEOUT,
+    write_timeout=settings.HTTP_WRITE_TIMEOUT,
+    pool_timeout=settings.HTTP_POOL_TIMEOUT,
+)
+
+__all__ = ["http_client", "HttpClientService", "RequestTracer"]
@@ -0,0 +1,376 @@
+import asyncio
+import time
+import uuid
+from typing import AsyncIterator, NamedTuple, Optional
+
+from fastapi import HTTPException
+
+from config import settings
+from core.logger import logger
+from repositories.Jobs import JobStore, LocalJobStore, RedisJobStore
+from schemas.Benchmark import (
+    SBenchmarkRequest,
+    SBenchmarkResponse,
+    SBenchmarkSample,
+    SGenerateRequest,
+)
+from schemas.Jobs import EJobStatus, SJob, SJobState
+from services.Benchmark import BenchmarkService
+from services.Redis import CacheError, RedisCacheService, redis_cache, redis_client
+
+
+class _Call(NamedTuple):
+    index: int
+    request: SGenerateRequest
+    prompt_index: int
+    repetition: int
+
+
+class _LeaseLost(Exception):
+    """Аренду задачи перехватил другой воркер"""
+
+
+class JobService:
+    """
+    Фоновые прогоны бенчмарков.
+
+    POST ставит задачу в очередь и сразу возвращает ее id. Воркеры (задачи
+    asyncio в процессах API или отдельные процессы worker.py) забирают
+    задачи из очереди под аренду и сохраняют каждый замер как контрольную
+    точку. Если процесс перезапускается, задача возвращается в очередь и
+    продолжается с уже выполненных вызовов.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        workers: int = 1,
+        lease_ttl: float = 30.0,
+        poll_interval: float = 0.5,
+        events_interval: float = 1.0,
+    ):
+        """
+        :param store: Очередь и хранилище состояния задач
+        :param workers: Число воркеров в процессе
+        :param lease_ttl: Время аренды задачи без продления (в секундах)
+        :param poll_interval: Период опроса пустой очереди (в секундах)
+        :param events_interval: Период проверки прогресса для SSE (в секундах)
+        """
+        self.store = store
+        self.workers = workers
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+        self.events_interval = events_interval
+        self.benchmark_service: Optional[BenchmarkService] = None
+        self._worker_tasks: list[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+
+    @staticmethod
+    def _plan(params: SBenchmarkRequest) -> list[_Call]:
+        """
+        Вызовы задачи в том же порядке, что и в BenchmarkService.benchmark;
+        индекс вызова - ключ его контрольной точки
+        """
+        calls = [
+            (
+                SGenerateRequest(
+                    prompt=prompt,
+                    model=model,
+                    max_tokens=params.max_tokens,
+                    stream=params.stream,
+                    cache=params.cache,
+                ),
+                prompt_index,
+                repetition,
+            )
+            for repetition in range(params.repetitions)
+            for prompt_index, prompt in enumerate(params.prompts)
+            for model in params.models
+        ]
+        return [_Call(index, *call) for index, call in enumerate(calls)]
+
+    async def submit(self, params: SBenchmarkRequest) -> SJob:
+        state = SJobState(
+            id=uuid.uuid4().hex,
+            status=EJobStatus.QUEUED,
+            created_at=time.time(),
+            total=len(params.prompts) * len(params.models) * params.repetitions,
+        )
+        await self.store.create(state, params)
+        return self._to_job(state)
+
+    async def _get_state(self, job_id: str) -> SJobState:
+        state = await self.store.get_state(job_id)
+        if state is None:
+            raise HTTPException(status_code=404, detail="Задача не найдена")
+        return state
+
+    async def get(self, job_id: str, with_result: bool = True) -> SJob:
+        """
+        Состояние задачи и сводка по уже выполненным вызовам
+        """
+        state = await self._get_state(job_id)
+        if not with_result or state.completed == 0:
+            return self._to_job(state)
+        request = await self.store.get_request(job_id)
+        samples = await self.store.get_samples(job_id)
+        end = state.finished_at or time.time()
+        result = SBenchmarkResponse(
+            results=BenchmarkService.aggregate(
+                [samples[index] for index in sorted(samples)],
+                models=request.models if request else None,
+            ),
+            total_requests=len(samples),
+            concurrency=(request and request.concurrency)
+            or settings.BENCHMARK_CONCURRENCY,
+            wall_time_seconds=end - (state.started_at or end),
+        )
+        return self._to_job(state, result)
+
+    @staticmethod
+    def _to_job(state: SJobState, result: Optional[SBenchmarkResponse] = None) -> SJob:
+        return SJob(
+            **state.model_dump(),
+            progress=state.completed / state.total if state.total else 1.0,
+            result=result,
+        )
+
+    async def cancel(self, job_id: str) -> SJob:
+        """
+        Отмена задачи: ожидающая отменяется сразу, выполняющаяся -
+        воркером при ближайшем продлении аренды
+        """
+        state = await self._get_state(job_id)
+        if state.status.is_final:
+            return self._to_job(state)
+        fields = {"cancel_requested": True}
+        if state.status == EJobStatus.QUEUED:
+            fields.update(status=EJobStatus.CANCELLED, finished_at=time.time())
+        await self.store.update(job_id, **fields)
+        return await self.get(job_id, with_result=False)
+
+    async def events(self, job_id: str) -> AsyncIterator[str]:
+        """
+        SSE-поток прогресса: событие progress при каждом изменении и
+        завершающее событие done со сводкой
+        """
+        await self._get_state(job_id)
+        last = None
+        while True:
+            state = await self._get_state(job_id)
+            if state.status.is_final:
+                job = await self.get(job_id)
+                yield f"event: done\ndata: {job.model_dump_json()}\n\n"
+                return
+            snapshot = (state.status, state.completed, state.errors)
+            if snapshot != last:
+                last = snapshot
+                job = self._to_job(state)
+                yield f"event: progress\ndata: {job.model_dump_json()}\n\n"
+            await asyncio.sleep(self.events_interval)
+
+    async def _run(self, job_id: str, token: str) -> None:
+        state = await self.store.get_state(job_id)
+        request = await self.store.get_request(job_id)
+        if state is None or request is None or state.status.is_final:
+            await self.store.release(job_id, token)
+            return
+        if state.cancel_requested:
+            await self.store.update(
+                job_id, status=EJobStatus.CANCELLED, finished_at=time.time()
+            )
+            await self.store.release(job_id, token)
+            return
+
+        samples = await self.store.get_samples(job_id)
+        completed = len(samples)
+        errors = sum(1 for sample in samples.values() if not sample.success)
+        await self.store.update(
+            job_id,
+            status=EJobStatus.RUNNING,
+            started_at=state.started_at or time.time(),
+            attempts=state.attempts + 1,
+            completed=completed,
+            errors=errors,
+        )
+        if completed:
+            logger.info(f"Задача {job_id} продолжена с {completed}/{state.total}")
+
+        remaining = [call for call in self._plan(request) if call.index not in samples]
+        semaphore = asyncio.Semaphore(
+            request.concurrency or settings.BENCHMARK_CONCURRENCY
+        )
+
+        async def run_call(call: _Call) -> None:
+            nonlocal completed, errors
+            async with semaphore:
+                if self._stopping.is_set():
+                    # Процесс останавливается: вызов выполнит следующий воркер
+                    return
+                sample: SBenchmarkSample = await self.benchmark_service.measure(
+                    call.request, call.prompt_index, call.repetition
+                )
+            completed += 1
+            errors += 0 if sample.success else 1
+            await self.store.save_sample(
+                job_id, call.index, sample, completed=completed, errors=errors
+            )
+
+        calls = [asyncio.create_task(run_call(call)) for call in remaining]
+        work = asyncio.gather(*calls)
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, token, work))
+        try:
+            await work
+        except asyncio.CancelledError:
+            if heartbeat.done() and heartbeat.exception() is None:
+                # Работу остановил heartbeat: отмена пользователем
+                await self.store.update(
+                    job_id, status=EJobStatus.CANCELLED, finished_at=time.time()
+                )
+                await self.store.release(job_id, token)
+                return
+            if heartbeat.done() and isinstance(heartbeat.exception(), _LeaseLost):
+                logger.warning(f"Аренда задачи {job_id} потеряна, прогон прерван")
+                return
+            # Остановка процесса: задача вернется в очередь и продолжится
+            await asyncio.shield(self.store.release(job_id, token, requeue=True))
+            raise
+        except CacheError:
+            # Хранилище недоступно: задача не провалена. Остальные вызовы
+            # останавливаются, задача возвращается в очередь, а если и это
+            # не удалось - аренда истечет, и задачу подхватит recover
+            await _cancel_all(calls)
+            try:
+                await self.store.release(job_id, token, requeue=True)
+            except CacheError:
+                pass
+            raise
+        except Exception as e:
+            # gather не отменяет остальные вызовы: они не должны тратить
+            # запросы к провайдеру и писать замеры в проваленную задачу
+            await _cancel_all(calls)
+            logger.exception(f"Задача {job_id} завершилась ошибкой")
+            await self.store.update(
+                job_id,
+                status=EJobStatus.FAILED,
+                finished_at=time.time(),
+                error=f"{type(e).__name__}: {e}",
+            )
+            await self.store.release(job_id, token)
+            return
+        finally:
+            heartbeat.cancel()
+
+        if self._stopping.is_set() and completed < state.total:
+            # Остановка с ожиданием: начатые вызовы сохранены, остальные -
+            # после перезапуска
+            await self.store.update(job_id, status=EJobStatus.QUEUED)
+            await self.store.release(job_id, token, requeue=True)
+            logger.info(
+                f"Задача {job_id} возвращена в очередь на {completed}/{state.total}"
+            )
+            return
+        await self.store.update(
+            job_id, status=EJobStatus.COMPLETED, finished_at=time.time()
+        )
+        await self.store.release(job_id, token)
+
+    async def _heartbeat(self, job_id: str, token: str, work: asyncio.Future) -> None:
+        """
+        Продление аренды и проверка запроса отмены
+        """
+        while not work.done():
+            await asyncio.sleep(self.lease_ttl / 3)
+            try:
+                renewed = await self.store.renew(job_id, token, self.lease_ttl)
+                state = await self.store.get_state(job_id)
+            except CacheError as e:
+                # Кратковременный сбой: продлим при следующей попытке
+                logger.warning(f"Не удалось продлить аренду задачи {job_id}: {e}")
+                continue
+            if not renewed:
+                work.cancel()
+                raise _LeaseLost(job_id)
+            if state is not None and state.cancel_requested:
+                work.cancel()
+                return
+
+    async def _worker(self) -> None:
+        token = uuid.uuid4().hex
+        next_recover = 0.0
+        while not self._stopping.is_set():
+            try:
+                if time.monotonic() >= next_recover:
+                    recovered = await self.store.recover()
+                    if recovered:
+                        logger.info(f"В очередь возвращено задач: {recovered}")
+                    next_recover = time.monotonic() + self.lease_ttl
+                job_id = await self.store.claim(token, self.lease_ttl)
+            except CacheError as e:
+                logger.warning(f"Очередь задач недоступна: {e}")
+                job_id = None
+            if job_id is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run(job_id, token)
+            except CacheError as e:
+                # Аренда истечет, и задачу подхватит recover
+                logger.warning(f"Задача {job_id} прервана: хранилище недоступно: {e}")
+
+    async def start(self, benchmark_service: BenchmarkService) -> None:
+        self.benchmark_service = benchmark_service
+        self._stopping.clear()
+        if not self._worker_tasks:
+            self._worker_tasks = [
+                asyncio.create_task(self._worker()) for _ in range(self.workers)
+            ]
+
+    async def close(self, drain_timeout: float = 0.0) -> None:
+        """
+        Остановка воркеров: новые вызовы не начинаются, начатые получают
+        drain_timeout секунд на завершение, после чего прерываются.
+        Незавершенные задачи возвращаются в очередь
+        """
+        self._stopping.set()
+        if self._worker_tasks and drain_timeout > 0:
+            await asyncio.wait(self._worker_tasks, timeout=drain_timeout)
+        for task in self._worker_tasks:
+            task.cancel()
+        for task in self._worker_tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._worker_tasks = []
+
+
+async def _cancel_all(tasks: list[asyncio.Task]) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def make_job_store() -> JobStore:
+    if settings.JOBS_BACKEND == "local":
+        return LocalJobStore()
+    # Отдельное пространство имен: очистка кеша не должна затрагивать задачи
+    storage = RedisCacheService(
+        redis_client,
+        codec=redis_cache.codec,
+        namespace=f"{settings.REDIS_NAMESPACE}-jobs",
+    )
+    return RedisJobStore(storage, ttl=settings.JOBS_TTL)
+
+
+jobs = JobService(
+    make_job_store(),
+    workers=settings.JOBS_WORKERS,
+    lease_ttl=settings.JOBS_LEASE_TTL,
+    poll_interval=settings.JOBS_POLL_INTERVAL,
+)
+
+__all__ = ["jobs", "JobService"]
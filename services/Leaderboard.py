@@ -0,0 +1,314 @@
+import html
+import math
+import os
+import time
+from string import Template
+from typing import Mapping, Optional
+
+from fastapi import HTTPException
+
+from config import settings
+from core.histogram import HISTOGRAM_LAYOUTS, LogHistogram, make_histogram
+from core.logger import logger
+from core.periodic import PeriodicFlusher
+from schemas.Benchmark import ESortOrder, SBenchmarkModelResult
+from schemas.Results import (
+    ELeaderboardSort,
+    SLeaderboard,
+    SLeaderboardQuery,
+    SResultRecord,
+)
+from services.Redis import CacheError, RedisCacheService, redis_cache, redis_client
+
+TEMPLATE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "templates",
+    "leaderboard.html",
+)
+
+
+class _ModelAggregate:
+    """
+    Агрегат модели: счетчики и гистограммы фиксированного размера.
+    В Redis хранится одним хэшем: поля счетчиков и поля гистограмм
+    с префиксом метрики ("latency:12", "latency:count", ...)
+    """
+
+    __slots__ = ("requests", "errors", "output_tokens", "cost", "histograms")
+
+    COUNTERS = ("requests", "errors", "output_tokens")
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.output_tokens = 0
+        self.cost = 0.0
+        self.histograms: dict[str, LogHistogram] = {
+            metric: make_histogram(metric) for metric in HISTOGRAM_LAYOUTS
+        }
+
+    def add(self, record: SResultRecord) -> None:
+        self.requests += 1
+        if not record.success:
+            self.errors += 1
+            return
+        self.output_tokens += record.completion_tokens
+        self.cost += record.cost or 0.0
+        self.histograms["latency"].record(record.time_total)
+        if record.ttft_seconds is not None:
+            self.histograms["ttft"].record(record.ttft_seconds)
+        if record.tokens_per_second is not None:
+            self.histograms["tokens_per_second"].record(record.tokens_per_second)
+
+    def merge(self, other: "_ModelAggregate") -> None:
+        for counter in self.COUNTERS:
+            setattr(self, counter, getattr(self, counter) + getattr(other, counter))
+        self.cost += other.cost
+        for metric, histogram in self.histograms.items():
+            histogram.merge(other.histograms[metric])
+
+    def to_fields(self) -> dict[str, int | float]:
+        fields: dict[str, int | float] = {
+            counter: getattr(self, counter)
+            for counter in self.COUNTERS
+            if getattr(self, counter)
+        }
+        if self.cost:
+            fields["cost"] = self.cost
+        for metric, histogram in self.histograms.items():
+            for field, value in histogram.to_fields().items():
+                fields[f"{metric}:{field}"] = value
+        return fields
+
+    def load_fields(self, fields: Mapping[str | bytes, int | float]) -> None:
+        by_metric: dict[str, dict[str, int | float]] = {}
+        for field, value in fields.items():
+            if isinstance(field, bytes):
+                field = field.decode()
+            metric, _, slot = field.partition(":")
+            if slot:
+                by_metric.setdefault(metric, {})[slot] = value
+            elif field == "cost":
+                self.cost += float(value)
+            elif field in self.COUNTERS:
+                setattr(self, field, getattr(self, field) + int(value))
+        for metric, slots in by_metric.items():
+            if metric in self.histograms:
+                self.histograms[metric].load_fields(slots)
+
+    def result(self, model: str) -> SBenchmarkModelResult:
+        return SBenchmarkModelResult(
+            model=model,
+            requests=self.requests,
+            errors=self.errors,
+            error_rate=self.errors / self.requests if self.requests else 0.0,
+            latency_seconds=self.histograms["latency"].summary(),
+            ttft_seconds=self.histograms["ttft"].summary(),
+            tokens_per_second=self.histograms["tokens_per_second"].summary(),
+            output_tokens=self.output_tokens,
+            total_cost=self.cost,
+        )
+
+
+_SORT_KEYS = {
+    ELeaderboardSort.LATENCY: lambda row: row.latency_seconds.p50,
+    ELeaderboardSort.TTFT: lambda row: row.ttft_seconds.p50,
+    ELeaderboardSort.TOKENS_PER_SECOND: lambda row: row.tokens_per_second.p50,
+    ELeaderboardSort.ERROR_RATE: lambda row: row.error_rate,
+    ELeaderboardSort.COST: lambda row: row.cost_per_1k_output_tokens,
+    ELeaderboardSort.REQUESTS: lambda row: row.requests,
+}
+
+
+class LeaderboardService(PeriodicFlusher):
+    """
+    Сравнительная таблица моделей за все записанные вызовы.
+
+    Агрегаты по моделям (счетчики, стоимость и гистограммы latency, TTFT и
+    tokens/sec) поддерживаются инкрементально: каждый записанный результат -
+    O(1) изменение агрегата процесса, приращения раз в flush_interval
+    сбрасываются в Redis-хэши через HINCRBY. Таблица читается одним pipeline
+    по хэшу на модель, поэтому ее построение стоит O(моделей), сколько бы
+    вызовов ни накопилось в журнале.
+    """
+
+    KEY_PREFIX = "leaderboard"
+
+    def __init__(
+        self,
+        cache: RedisCacheService,
+        flush_interval: float = 5.0,
+        ttl: Optional[int] = None,
+    ):
+        """
+        :param cache: Клиент Redis в пространстве имен журнала
+        :param flush_interval: Период сброса приращений (в секундах)
+        :param ttl: Время жизни агрегата модели без новых вызовов (в секундах)
+        """
+        self.cache = cache
+        self.flush_interval = flush_interval
+        self.ttl = ttl
+        self._pending: dict[str, _ModelAggregate] = {}
+        self._template: Optional[Template] = None
+
+    def key(self, model: str) -> str:
+        return f"{self.KEY_PREFIX}:model:{model}"
+
+    @property
+    def models_key(self) -> str:
+        return f"{self.KEY_PREFIX}:models"
+
+    def record(self, record: SResultRecord) -> None:
+        aggregate = self._pending.get(record.model)
+        if aggregate is None:
+            aggregate = self._pending[record.model] = _ModelAggregate()
+        aggregate.add(record)
+
+    async def flush(self) -> None:
+        """
+        Сброс приращений агрегатов в Redis одним pipeline
+        """
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            async with self.cache.pipeline(transaction=True) as pipe:
+                for model, aggregate in pending.items():
+                    pipe.hincrby_many(
+                        self.key(model), aggregate.to_fields(), ttl=self.ttl
+                    )
+                pipe.hset(
+                    self.models_key,
+                    {model: time.time() for model in pending},
+                    self.ttl,
+                )
+        except CacheError as e:
+            # Не теряем данные: вернем приращения до следующего сброса
+            logger.warning(f"Не удалось сбросить агрегаты таблицы моделей: {e}")
+            for model, aggregate in pending.items():
+                self._pending.setdefault(model, _ModelAggregate()).merge(aggregate)
+
+    async def _load(self) -> dict[str, _ModelAggregate]:
+        models = [
+            model.decode() if isinstance(model, bytes) else model
+            for model in await self.cache.hgetall(self.models_key)
+        ]
+        async with self.cache.pipeline() as pipe:
+            for model in models:
+                pipe.hgetall(self.key(model))
+        aggregates: dict[str, _ModelAggregate] = {}
+        expired = []
+        for model, fields in zip(models, pipe.results):
+            if not fields:
+                expired.append(model)
+                continue
+            aggregate = aggregates[model] = _ModelAggregate()
+            aggregate.load_fields(fields)
+        if expired:
+            await self.cache.eval(_FORGET_SCRIPT, keys=[self.models_key], args=expired)
+        return aggregates
+
+    async def table(self, query: SLeaderboardQuery) -> SLeaderboard:
+        """
+        Таблица моделей; приращения текущего процесса, еще не сброшенные
+        в Redis, добавляются к общим агрегатам
+        """
+        try:
+            aggregates = await self._load()
+        except CacheError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        for model, aggregate in self._pending.items():
+            aggregates.setdefault(model, _ModelAggregate()).merge(aggregate)
+
+        rows = [aggregate.result(model) for model, aggregate in aggregates.items()]
+        key = _SORT_KEYS[query.sort]
+        descending = query.order == ESortOrder.DESC
+        # Модели без значения поля - в конце при любом порядке
+        rows.sort(
+            key=lambda row: (
+                key(row) is None,
+                -(key(row) or 0) if descending else (key(row) or 0),
+                row.model,
+            )
+        )
+        return SLeaderboard(
+            sort=query.sort,
+            order=query.order,
+            generated_at=time.time(),
+            models=rows,
+        )
+
+    def render_html(self, board: SLeaderboard) -> str:
+        """
+        HTML-страница сравнительной таблицы по шаблону templates/leaderboard.html
+        """
+        if self._template is None:
+            with open(TEMPLATE_PATH, encoding="utf-8") as file:
+                self._template = Template(file.read())
+        rows = "\n".join(
+            "<tr>"
+            + "".join(
+                f"<td>{cell}</td>"
+                for cell in (
+                    html.escape(row.model),
+                    row.requests,
+                    _percent(row.error_rate),
+                    _seconds(row.latency_seconds.p50),
+                    _seconds(row.latency_seconds.p95),
+                    _seconds(row.latency_seconds.p99),
+                    _seconds(row.ttft_seconds.p50),
+                    _number(row.tokens_per_second.p50),
+                    row.output_tokens,
+                    _money(row.total_cost),
+                    _money(row.cost_per_1k_output_tokens),
+                    _number(row.tokens_per_second_per_1k_cost),
+                )
+            )
+            + "</tr>"
+            for row in board.models
+        )
+        return self._template.substitute(
+            generated_at=time.strftime(
+                "%Y-%m-%d %H:%M:%S", time.localtime(board.generated_at)
+            ),
+            sort=board.sort.value,
+            order=board.order.value,
+            rows=rows,
+        )
+
+
+def _seconds(value: Optional[float]) -> str:
+    return "—" if value is None else f"{value * 1000:.0f} мс"
+
+
+def _number(value: Optional[float]) -> str:
+    if value is None or not math.isfinite(value):
+        return "—"
+    return f"{value:,.1f}".replace(",", " ")
+
+
+def _percent(value: float) -> str:
+    return f"{value * 100:.1f}%"
+
+
+def _money(value: Optional[float]) -> str:
+    return "—" if not value else f"${value:.6f}"
+
+
+# KEYS: хэш моделей; ARGV: модели, чьи агрегаты истекли по TTL
+_FORGET_SCRIPT = """
+return redis.call("HDEL", KEYS[1], unpack(ARGV))
+"""
+
+# Пространство имен журнала: таблица - его материализованное представление
+leaderboard = LeaderboardService(
+    RedisCacheService(
+        redis_client,
+        codec=redis_cache.codec,
+        namespace=f"{settings.REDIS_NAMESPACE}-results",
+    ),
+    flush_interval=settings.LEADERBOARD_FLUSH_INTERVAL,
+    ttl=settings.LEADERBOARD_TTL,
+)
+
+__all__ = ["leaderboard", "LeaderboardService"]
@@ -0,0 +1,177 @@
+import asyncio
+import random
+import time
+from typing import NamedTuple, Optional
+
+from core.logger import logger
+from core.statistics import summarize
+from schemas.Benchmark import (
+    EArrival,
+    ELoadMode,
+    SBenchmarkSample,
+    SGenerateRequest,
+    SLoadTestRequest,
+    SLoadTestResponse,
+    SLoadWindow,
+)
+from services.Benchmark import BenchmarkService
+
+
+class _Shot(NamedTuple):
+    """Один вызов под нагрузкой с отметками времени относительно старта теста"""
+
+    scheduled: float
+    started: float
+    finished: float
+    sample: SBenchmarkSample
+
+
+class LoadTestService:
+    """
+    Нагрузочное тестирование поверх BenchmarkService.generate.
+
+    closed - N виртуальных пользователей шлют запросы друг за другом;
+    open - запросы приходят по расписанию (постоянно или по Пуассону)
+    независимо от того, как быстро отвечает модель.
+    """
+
+    def __init__(self, benchmark_service: BenchmarkService) -> None:
+        self.benchmark_service = benchmark_service
+
+    async def run(self, params: SLoadTestRequest) -> SLoadTestResponse:
+        request = SGenerateRequest(
+            prompt=params.prompt,
+            model=params.model,
+            max_tokens=params.max_tokens,
+            stream=params.stream,
+        )
+        logger.info(
+            f"Нагрузочный тест {params.mode.value} для {params.model} "
+            f"на {params.duration_seconds} секунд"
+        )
+        origin = time.perf_counter()
+        if params.mode == ELoadMode.OPEN:
+            shots = await self._run_open(request, params, origin)
+        else:
+            shots = await self._run_closed(request, params, origin)
+        duration = time.perf_counter() - origin
+        return self._report(params, shots, duration)
+
+    async def _shoot(
+        self,
+        request: SGenerateRequest,
+        origin: float,
+        scheduled: float,
+        semaphore: Optional[asyncio.Semaphore] = None,
+    ) -> _Shot:
+        if semaphore is not None:
+            await semaphore.acquire()
+        try:
+            started = time.perf_counter() - origin
+            sample = await self.benchmark_service.measure(request)
+            finished = time.perf_counter() - origin
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+        return _Shot(scheduled, started, finished, sample)
+
+    async def _run_closed(
+        self, request: SGenerateRequest, params: SLoadTestRequest, origin: float
+    ) -> list[_Shot]:
+        deadline = params.duration_seconds
+        shots: list[_Shot] = []
+
+        async def user() -> None:
+            while time.perf_counter() - origin < deadline:
+                now = time.perf_counter() - origin
+                shots.append(await self._shoot(request, origin, scheduled=now))
+
+        await asyncio.gather(*(user() for _ in range(params.virtual_users)))
+        return shots
+
+    async def _run_open(
+        self, request: SGenerateRequest, params: SLoadTestRequest, origin: float
+    ) -> list[_Shot]:
+        semaphore = (
+            asyncio.Semaphore(params.max_in_flight) if params.max_in_flight else None
+        )
+        tasks: list[asyncio.Task] = []
+        scheduled = 0.0
+        # Расписание строится от абсолютного времени старта, а не от момента
+        # завершения предыдущего запроса: медленные ответы не замедляют подачу
+        # нагрузки, а опоздавшие запуски учитываются в задержке (coordinated omission)
+        while scheduled < params.duration_seconds:
+            delay = scheduled - (time.perf_counter() - origin)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(
+                asyncio.create_task(
+                    self._shoot(
+                        request, origin, scheduled=scheduled, semaphore=semaphore
+                    )
+                )
+            )
+            if params.arrival == EArrival.POISSON:
+                scheduled += random.expovariate(params.rps)
+            else:
+                scheduled += 1 / params.rps
+        return list(await asyncio.gather(*tasks))
+
+    @staticmethod
+    def _report(
+        params: SLoadTestRequest, shots: list[_Shot], duration: float
+    ) -> SLoadTestResponse:
+        succeeded = [shot for shot in shots if shot.sample.success]
+        rate_limited = sum(1 for shot in shots if shot.sample.http_code == 429)
+        errors = len(shots) - len(succeeded)
+
+        windows: list[SLoadWindow] = []
+        window_count = int(duration // params.window_seconds) + 1
+        buckets: list[list[_Shot]] = [[] for _ in range(window_count)]
+        for shot in shots:
+            index = min(int(shot.finished // params.window_seconds), window_count - 1)
+            buckets[index].append(shot)
+        for index, bucket in enumerate(buckets):
+            start = index * params.window_seconds
+            width = min(params.window_seconds, duration - start)
+            ok = [shot for shot in bucket if shot.sample.success]
+            windows.append(
+                SLoadWindow(
+                    start_seconds=start,
+                    completed=len(ok),
+                    errors=len(bucket) - len(ok),
+                    rate_limited=sum(
+                        1 for shot in bucket if shot.sample.http_code == 429
+                    ),
+                    throughput_rps=len(ok) / width if width > 0 else 0.0,
+                    latency_seconds=summarize(
+                        shot.finished - shot.scheduled for shot in ok
+                    ),
+                )
+            )
+
+        return SLoadTestResponse(
+            mode=params.mode,
+            duration_seconds=duration,
+            offered_rps=params.rps if params.mode == ELoadMode.OPEN else None,
+            sent=len(shots),
+            completed=len(succeeded),
+            errors=errors,
+            rate_limited=rate_limited,
+            error_rate=errors / len(shots) if shots else 0.0,
+            rate_limited_rate=rate_limited / len(shots) if shots else 0.0,
+            achieved_rps=len(succeeded) / duration if duration > 0 else 0.0,
+            latency_seconds=summarize(
+                shot.finished - shot.scheduled for shot in succeeded
+            ),
+            service_seconds=summarize(
+                shot.finished - shot.started for shot in succeeded
+            ),
+            queueing_seconds=summarize(shot.started - shot.scheduled for shot in shots),
+            ttft_seconds=summarize(
+                shot.sample.ttft_seconds
+                for shot in succeeded
+                if shot.sample.ttft_seconds is not None
+            ),
+            windows=windows,
+        )
@@ -0,0 +1,141 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from config import settings
+from core.metrics import CACHE_LOOKUPS
+from schemas.Benchmark import ECacheCategory
+from services.Redis import RedisCacheService, redis_cache
+
+
+class LocalCache:
+    """
+    Внутрипроцессный TTL/LRU-кеш (L1) перед Redis (L2).
+
+    Согласованность между воркерами обеспечивается версией в Redis: каждая
+    запись помечается версией, под которой была загружена, и при смене версии
+    (invalidate в любом воркере) становится недействительной. Чтобы попадание
+    не стоило round trip в Redis, версия перечитывается не чаще, чем раз в
+    version_check_interval секунд.
+    """
+
+    def __init__(
+        self,
+        cache: RedisCacheService,
+        version_key: str,
+        name: str = "local",
+        ttl: float = 60.0,
+        maxsize: int = 32,
+        version_check_interval: float = 1.0,
+    ):
+        """
+        :param cache: Клиент Redis-кеша, где хранится версия
+        :param version_key: Ключ версии в Redis
+        :param name: Имя кеша в метриках
+        :param ttl: Время жизни записи (в секундах)
+        :param maxsize: Максимальное число записей
+        :param version_check_interval: Период сверки версии с Redis (в секундах)
+        """
+        self.cache = cache
+        self.version_key = version_key
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.version_check_interval = version_check_interval
+        self._entries: OrderedDict[Hashable, Tuple[Any, float, Optional[str]]] = (
+            OrderedDict()
+        )
+        self._loading: Dict[Hashable, asyncio.Task] = {}
+        self._version: Optional[str] = None
+        self._version_checked_at = float("-inf")
+        self.hits = 0
+        self.misses = 0
+
+    async def _current_version(self) -> Optional[str]:
+        now = time.monotonic()
+        if now - self._version_checked_at >= self.version_check_interval:
+            version = await self.cache.get(self.version_key)
+            self._version_checked_at = now
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+        return self._version
+
+    async def get(self, key: Hashable) -> Optional[Any]:
+        version = await self._current_version()
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at, entry_version = entry
+        if expires_at <= time.monotonic() or entry_version != version:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any, version: Optional[str]) -> None:
+        """
+        Сохранение значения, загруженного под версией version
+        """
+        if version != self._version:
+            # Пока шла загрузка, кеш инвалидировали - значение уже устарело
+            return
+        self._entries[key] = (value, time.monotonic() + self.ttl, version)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def get_or_load(
+        self, key: Hashable, loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Значение из L1, а при промахе - единственная на процесс загрузка loader
+        """
+        value = await self.get(key)
+        if value is not None:
+            self.hits += 1
+            CACHE_LOOKUPS.inc(self.name, "hit")
+            return value
+        self.misses += 1
+        CACHE_LOOKUPS.inc(self.name, "miss")
+
+        task = self._loading.get(key)
+        if task is None:
+            version = self._version
+
+            async def load() -> Any:
+                loaded = await loader()
+                self.put(key, loaded, version)
+                return loaded
+
+            task = asyncio.create_task(load())
+            self._loading[key] = task
+            task.add_done_callback(lambda _: self._loading.pop(key, None))
+        return await asyncio.shield(task)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def invalidate(self) -> None:
+        """
+        Инвалидация во всех воркерах: новая случайная версия в Redis
+        """
+        version = uuid.uuid4().hex
+        await self.cache.set(self.version_key, version, ttl=30 * 24 * 3600)
+        self._entries.clear()
+        self._version = version
+        self._version_checked_at = time.monotonic()
+
+
+models_cache = LocalCache(
+    redis_cache,
+    version_key=f"{ECacheCategory.MODELS.value}:version",
+    name=f"{ECacheCategory.MODELS.value}_l1",
+    ttl=settings.MODELS_L1_TTL,
+    maxsize=settings.MODELS_L1_MAXSIZE,
+    version_check_interval=settings.L1_VERSION_CHECK_INTERVAL,
+)
+
+__all__ = ["models_cache", "LocalCache"]
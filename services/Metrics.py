@@ -0,0 +1,201 @@
+import json
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from config import settings
+from core.logger import logger
+from core.metrics import Gauge, Histogram, Labels, Metric, MetricsRegistry, registry
+from core.periodic import PeriodicFlusher
+from services.Redis import CacheError, RedisCacheService, redis_cache, redis_client
+
+
+class MetricsService(PeriodicFlusher):
+    """
+    Сбор метрик всех воркеров для /metrics.
+
+    Счетчики и гистограммы процесса раз в flush_interval сбрасываются в
+    Redis-хэши приращениями (HINCRBY), поэтому хэш содержит сумму всех
+    воркеров. Gauge каждый процесс пишет целиком в свой ключ с коротким
+    TTL; при чтении складываются значения только живых процессов.
+    Если Redis недоступен, /metrics отдает метрики текущего процесса.
+    """
+
+    KEY_PREFIX = "metrics"
+
+    def __init__(
+        self,
+        metrics: MetricsRegistry,
+        cache: RedisCacheService,
+        flush_interval: float = 5.0,
+        ttl: Optional[int] = None,
+    ):
+        """
+        :param metrics: Реестр метрик процесса
+        :param cache: Клиент Redis в отдельном от кеша пространстве имен
+        :param flush_interval: Период сброса приращений (в секундах)
+        :param ttl: Время жизни счетчиков в Redis (в секундах)
+        """
+        self.registry = metrics
+        self.cache = cache
+        self.flush_interval = flush_interval
+        self.ttl = ttl
+        self.instance = uuid.uuid4().hex
+
+    def key(self, name: str) -> str:
+        return f"{self.KEY_PREFIX}:{name}"
+
+    @property
+    def instances_key(self) -> str:
+        return f"{self.KEY_PREFIX}:instances"
+
+    def gauges_key(self, instance: str) -> str:
+        return f"{self.KEY_PREFIX}:gauges:{instance}"
+
+    @property
+    def _gauge_ttl(self) -> int:
+        # Gauge упавшего воркера пропадает через три пропущенных сброса
+        return max(1, int(self.flush_interval * 3))
+
+    async def flush(self) -> None:
+        """
+        Сброс приращений счетчиков и гистограмм и текущих gauge одним pipeline
+        """
+        collected = {
+            name: metric.collect() for name, metric in self.registry.metrics.items()
+        }
+        gauges: Dict[str, Any] = {}
+        try:
+            async with self.cache.pipeline() as pipe:
+                for name, values in collected.items():
+                    metric = self.registry.metrics[name]
+                    if isinstance(metric, Gauge):
+                        gauges.update(
+                            (_field(name, *labels), value)
+                            for labels, value in values.items()
+                        )
+                    elif values:
+                        pipe.hincrby_many(
+                            self.key(name), _increments(metric, values), ttl=self.ttl
+                        )
+                pipe.hset(self.instances_key, {self.instance: time.time()}, self.ttl)
+                if gauges:
+                    pipe.hset(self.gauges_key(self.instance), gauges, self._gauge_ttl)
+        except CacheError as e:
+            logger.warning(f"Не удалось сбросить метрики: {e}")
+            for name, values in collected.items():
+                self.registry.metrics[name].merge(values)
+
+    async def _shared_values(self) -> Dict[str, Dict[Labels, Any]]:
+        values: Dict[str, Dict[Labels, Any]] = {}
+        for name, metric in self.registry.metrics.items():
+            if isinstance(metric, Gauge):
+                continue
+            fields = await self.cache.hgetall(self.key(name))
+            target = values.setdefault(name, {})
+            for field, value in fields.items():
+                labels, slot = _parse_field(field)
+                if isinstance(metric, Histogram):
+                    data = target.setdefault(
+                        labels, [0] * (len(metric.buckets) + 1) + [0.0]
+                    )
+                    data[-1 if slot == "sum" else int(slot)] += value
+                else:
+                    target[labels] = target.get(labels, 0) + value
+
+        alive_after = time.time() - self._gauge_ttl
+        instances = await self.cache.hgetall(self.instances_key)
+        dead = []
+        for instance, seen_at in instances.items():
+            if isinstance(instance, bytes):
+                instance = instance.decode()
+            if (seen_at or 0) < alive_after:
+                dead.append(instance)
+                continue
+            if instance == self.instance:
+                continue
+            fields = await self.cache.hgetall(self.gauges_key(instance))
+            for field, value in fields.items():
+                (name, *labels), _ = _parse_field(field, slot=False)
+                target = values.setdefault(name, {})
+                target[tuple(labels)] = target.get(tuple(labels), 0) + value
+        if dead:
+            await self.cache.eval(_FORGET_SCRIPT, keys=[self.instances_key], args=dead)
+        return values
+
+    async def render(self) -> str:
+        """
+        Метрики всех воркеров в текстовом формате Prometheus; приращения
+        текущего процесса, еще не сброшенные в Redis, добавляются к общим
+        """
+        try:
+            values = await self._shared_values()
+        except CacheError as e:
+            logger.warning(f"Общие метрики недоступны: {e}")
+            values = {}
+        for name, metric in self.registry.metrics.items():
+            own = dict(metric._values)
+            target = values.setdefault(name, {})
+            for labels, value in own.items():
+                if isinstance(metric, Histogram):
+                    data = target.setdefault(labels, [0] * len(value))
+                    target[labels] = [a + b for a, b in zip(data, value)]
+                else:
+                    target[labels] = target.get(labels, 0) + value
+        return self.registry.render(values)
+
+    async def close(self) -> None:
+        await super().close()
+        try:
+            await self.cache.delete(self.gauges_key(self.instance))
+        except CacheError:
+            pass
+
+
+def _field(*parts: str) -> str:
+    return json.dumps(parts, ensure_ascii=False, separators=(",", ":"))
+
+
+def _parse_field(field: str | bytes, slot: bool = True) -> tuple:
+    """
+    Поле хэша -> (значения меток, слот); slot=False - весь список как есть
+    """
+    parts = json.loads(field)
+    if not slot:
+        return parts, None
+    return tuple(parts[:-1]), parts[-1]
+
+
+def _increments(metric: Metric, values: Dict[Labels, Any]) -> Dict[str, int | float]:
+    """
+    Приращения метрики как поля хэша: метки + слот (номер корзины, sum или v)
+    """
+    if not isinstance(metric, Histogram):
+        return {_field(*labels, "v"): value for labels, value in values.items()}
+    increments: Dict[str, int | float] = {}
+    for labels, data in values.items():
+        for index, count in enumerate(data[:-1]):
+            if count:
+                increments[_field(*labels, str(index))] = count
+        increments[_field(*labels, "sum")] = data[-1]
+    return increments
+
+
+# KEYS: хэш процессов; ARGV: процессы, давно не сбрасывавшие метрики
+_FORGET_SCRIPT = """
+return redis.call("HDEL", KEYS[1], unpack(ARGV))
+"""
+
+# Отдельное пространство имен: очистка кеша не должна обнулять метрики
+metrics = MetricsService(
+    registry,
+    RedisCacheService(
+        redis_client,
+        codec=redis_cache.codec,
+        namespace=f"{settings.REDIS_NAMESPACE}-metrics",
+    ),
+    flush_interval=settings.METRICS_FLUSH_INTERVAL,
+    ttl=settings.METRICS_TTL,
+)
+
+__all__ = ["metrics", "MetricsService"]
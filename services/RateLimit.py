@@ -0,0 +1,309 @@
+import asyncio
+import hashlib
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+
+from config import settings
+from core.logger import logger
+from services.Redis import CacheError, RedisCacheService, redis_cache
+
+
+class AIMDController:
+    """
+    Адаптивный лимит одновременных запросов (AIMD, как окно TCP).
+
+    Каждый успешный ответ без всплеска задержки увеличивает лимит на
+    increase/limit (то есть примерно на increase за «окно» запросов),
+    перегрузка (429, таймаут, задержка выше базовой в latency_tolerance раз)
+    умножает лимит на decrease. Уменьшение происходит не чаще раза за
+    базовую задержку, чтобы пачка ответов 429 от уже отправленных запросов
+    не обвалила лимит до минимума.
+    """
+
+    def __init__(
+        self,
+        initial: float = 4,
+        min_limit: float = 1,
+        max_limit: float = 64,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_tolerance: float = 2.0,
+        smoothing: float = 0.05,
+    ):
+        """
+        :param initial: Начальный лимит
+        :param min_limit: Нижняя граница лимита
+        :param max_limit: Верхняя граница лимита
+        :param increase: Прирост лимита за окно успешных запросов
+        :param decrease: Множитель лимита при перегрузке
+        :param latency_tolerance: Во сколько раз задержка выше базовой - всплеск
+        :param smoothing: Вес нового замера в базовой задержке (EWMA)
+        """
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self.baseline: Optional[float] = None
+        self._last_decrease = float("-inf")
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: self.in_flight < max(int(self.limit), 1)
+            )
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self, latency: float) -> None:
+        if self.baseline is None:
+            self.baseline = latency
+        if latency > self.baseline * self.latency_tolerance:
+            self.on_overload()
+            return
+        # Базовая задержка учится только на нормальных ответах
+        self.baseline += self.smoothing * (latency - self.baseline)
+        self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+
+    def on_overload(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < (self.baseline or 1.0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.decrease)
+
+
+class _Permit:
+    """Разрешение на один вызов; вызывающий сообщает в observe его исход"""
+
+    __slots__ = ("status_code", "latency", "retry_after")
+
+    def __init__(self) -> None:
+        self.status_code: Optional[int] = None
+        self.latency: Optional[float] = None
+        self.retry_after: Optional[float] = None
+
+    def observe(
+        self, status_code: int, latency: float, retry_after: Optional[str] = None
+    ) -> None:
+        """
+        :param status_code: HTTP-код ответа
+        :param latency: Время до заголовков ответа (в секундах)
+        :param retry_after: Значение заголовка Retry-After, если есть
+        """
+        self.status_code = status_code
+        self.latency = latency
+        try:
+            self.retry_after = float(retry_after) if retry_after else None
+        except ValueError:
+            self.retry_after = None
+
+
+class UpstreamLimiter:
+    """
+    Ограничение вызовов OpenRouter.
+
+    Скорость ограничивается token bucket в Redis, общим для всех воркеров
+    uvicorn: отдельно на API-ключ и на модель, оба ведра проверяются и
+    списываются одним Lua-скриптом. Retry-After из ответа 429 блокирует
+    ведро модели для всего кластера. Поверх ведер в каждом процессе работает
+    AIMDController на модель, который держит число одновременных запросов
+    у реального предела провайдера.
+
+    Если Redis недоступен, общий лимит пропускается, а AIMD продолжает работать.
+    """
+
+    KEY_PREFIX = "ratelimit"
+
+    def __init__(
+        self,
+        cache: RedisCacheService,
+        key_rate: float,
+        key_burst: float,
+        model_rate: float,
+        model_burst: float,
+        model_rates: Optional[Dict[str, float]] = None,
+        aimd_initial: float = 4,
+        aimd_max: float = 64,
+        enabled: bool = True,
+    ):
+        """
+        :param cache: Клиент Redis-кеша
+        :param key_rate: Запросов в секунду на API-ключ
+        :param key_burst: Емкость ведра API-ключа
+        :param model_rate: Запросов в секунду на модель по умолчанию
+        :param model_burst: Емкость ведра модели
+        :param model_rates: Отдельные лимиты моделей (запросов в секунду)
+        :param aimd_initial: Начальный лимит одновременных запросов к модели
+        :param aimd_max: Верхняя граница одновременных запросов к модели
+        :param enabled: Выключатель ограничений
+        """
+        self.cache = cache
+        self.key_rate = key_rate
+        self.key_burst = key_burst
+        self.model_rate = model_rate
+        self.model_burst = model_burst
+        self.model_rates = model_rates or {}
+        self.aimd_initial = aimd_initial
+        self.aimd_max = aimd_max
+        self.enabled = enabled
+        self._controllers: Dict[str, AIMDController] = {}
+
+    def controller(self, model: str) -> AIMDController:
+        controller = self._controllers.get(model)
+        if controller is None:
+            controller = self._controllers[model] = AIMDController(
+                initial=self.aimd_initial, max_limit=self.aimd_max
+            )
+        return controller
+
+    def _buckets(self, model: str, api_key: str) -> tuple[list[str], list[float]]:
+        # Ключ в Redis не должен содержать сам секрет
+        key_id = hashlib.sha256(api_key.encode()).hexdigest()[:16]
+        model_rate = self.model_rates.get(model, self.model_rate)
+        keys = [
+            f"{self.KEY_PREFIX}:key:{key_id}",
+            f"{self.KEY_PREFIX}:model:{model}",
+        ]
+        args = [self.key_rate, self.key_burst, model_rate, self.model_burst]
+        return keys, args
+
+    async def _take(self, model: str, api_key: str) -> None:
+        """
+        Ожидание токена в обоих ведрах
+        """
+        keys, args = self._buckets(model, api_key)
+        while True:
+            try:
+                wait_ms = await self.cache.eval(_TAKE_SCRIPT, keys=keys, args=args)
+            except CacheError as e:
+                logger.warning(f"Общий лимит запросов недоступен: {e}")
+                return
+            if not wait_ms:
+                return
+            await asyncio.sleep(wait_ms / 1000)
+
+    async def _block(self, model: str, seconds: float) -> None:
+        try:
+            await self.cache.eval(
+                _BLOCK_SCRIPT,
+                keys=[f"{self.KEY_PREFIX}:model:{model}"],
+                args=[math.ceil(seconds * 1000)],
+            )
+        except CacheError as e:
+            logger.warning(f"Не удалось заблокировать ведро модели {model}: {e}")
+
+    @asynccontextmanager
+    async def limit(self, model: str, api_key: str) -> AsyncIterator[_Permit]:
+        """
+        Слот для вызова модели; исход вызова передается в permit.observe
+        """
+        permit = _Permit()
+        if not self.enabled:
+            yield permit
+            return
+
+        controller = self.controller(model)
+        await controller.acquire()
+        try:
+            await self._take(model, api_key)
+            yield permit
+        except httpx.TimeoutException:
+            controller.on_overload()
+            raise
+        finally:
+            await controller.release()
+            # Исход учитывается и тогда, когда вызывающий превратил 429 в исключение
+            if permit.status_code in (429, 503):
+                controller.on_overload()
+                if permit.retry_after:
+                    await self._block(model, permit.retry_after)
+            elif permit.status_code is not None and permit.status_code < 400:
+                controller.on_success(permit.latency)
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {
+            model: {
+                "limit": controller.limit,
+                "in_flight": controller.in_flight,
+                "baseline_latency": controller.baseline,
+            }
+            for model, controller in self._controllers.items()
+        }
+
+
+# KEYS: ведра; ARGV: пары (скорость в секунду, емкость) для каждого ведра.
+# Возвращает 0, если токен списан из всех ведер, иначе сколько ждать (мс)
+_TAKE_SCRIPT = """
+local time = redis.call("TIME")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local wait = 0
+local tokens = {}
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local burst = tonumber(ARGV[2 * i])
+    local state = redis.call("HMGET", key, "tokens", "ts", "blocked")
+    local available = tonumber(state[1]) or burst
+    local updated = tonumber(state[2]) or now
+    local blocked = tonumber(state[3]) or 0
+    available = math.min(burst, available + (now - updated) * rate / 1000)
+    tokens[i] = available
+    if blocked > now then
+        wait = math.max(wait, blocked - now)
+    elseif available < 1 then
+        wait = math.max(wait, math.ceil((1 - available) * 1000 / rate))
+    end
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local burst = tonumber(ARGV[2 * i])
+    if wait == 0 then
+        tokens[i] = tokens[i] - 1
+    end
+    redis.call("HSET", key, "tokens", tostring(tokens[i]), "ts", now)
+    redis.call("PEXPIRE", key, math.ceil(burst * 1000 / rate) + 60000)
+end
+return wait
+"""
+
+# KEYS: ведро; ARGV: длительность блокировки (мс)
+_BLOCK_SCRIPT = """
+local time = redis.call("TIME")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local until_ms = now + tonumber(ARGV[1])
+local blocked = tonumber(redis.call("HGET", KEYS[1], "blocked")) or 0
+if until_ms > blocked then
+    redis.call("HSET", KEYS[1], "blocked", until_ms)
+end
+if redis.call("PTTL", KEYS[1]) < tonumber(ARGV[1]) then
+    redis.call("PEXPIRE", KEYS[1], tonumber(ARGV[1]) + 60000)
+end
+return until_ms
+"""
+
+
+upstream_limiter = UpstreamLimiter(
+    redis_cache,
+    key_rate=settings.RATE_LIMIT_KEY_RPS,
+    key_burst=settings.RATE_LIMIT_KEY_BURST,
+    model_rate=settings.RATE_LIMIT_MODEL_RPS,
+    model_burst=settings.RATE_LIMIT_MODEL_BURST,
+    model_rates=settings.RATE_LIMIT_MODEL_RPS_OVERRIDES,
+    aimd_initial=settings.AIMD_INITIAL_CONCURRENCY,
+    aimd_max=settings.AIMD_MAX_CONCURRENCY,
+    enabled=settings.RATE_LIMIT_ENABLED,
+)
+
+__all__ = ["upstream_limiter", "UpstreamLimiter", "AIMDController"]
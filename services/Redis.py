@@ -1,11 +1,17 @@
+import asyncio
+from contextlib import asynccontextmanager
 from functools import wraps
 import hashlib
-import json
-from typing import Any, Optional, Dict
-from redis.asyncio import Redis
+import time
+import uuid
+from typing import Any, AsyncIterator, Iterable, List, Optional, Dict
+from redis.asyncio import BlockingConnectionPool, Redis
 from redis.exceptions import RedisError
 
 from config import settings
+from core.codecs import CacheCodec, CodecError
+from core.logger import logger
+from core.metrics import CACHE_LOOKUPS, REDIS_DURATION
 
 
 class RedisCacheService:
@@ -15,38 +21,115 @@ class RedisCacheService:
 
     def __init__(
         self,
-        redis_client: Redis,
+        redis_client: "Redis | RedisClientService",
         default_ttl: int = 3600,
-        serializer: callable = json.dumps,
-        deserializer: callable = json.loads,
+        codec: Optional[CacheCodec] = None,
+        namespace: str = "llmbench",
     ):
         """
         Инициализация кеш-клиента
 
-        :param redis_client: Async Redis client
+        :param redis_client: Async Redis client или пул воркера, открываемый в lifespan
         :param default_ttl: Время жизни записей по умолчанию (в секундах)
-        :param serializer: Функция для сериализации данных
-        :param deserializer: Функция для десериализации данных
+        :param codec: Кодек значений (по умолчанию JSON без сжатия)
+        :param namespace: Префикс всех ключей сервиса
         """
-        self.redis = redis_client
+        self._redis = redis_client
         self.default_ttl = default_ttl
-        self.serializer = serializer
-        self.deserializer = deserializer
+        self.codec = codec or CacheCodec()
+        self.namespace = namespace
+
+    @property
+    def redis(self) -> Redis:
+        if isinstance(self._redis, RedisClientService):
+            return self._redis.client
+        return self._redis
+
+    def key(self, key: str) -> str:
+        """
+        Полное имя ключа в Redis с учетом пространства имен
+        """
+        return f"{self.namespace}:{key}"
+
+    def _encode(self, value: Any) -> bytes:
+        try:
+            return self.codec.encode(value)
+        except CodecError as e:
+            raise CacheError("Cache value encoding failed") from e
+
+    def _decode(self, data: Optional[bytes]) -> Optional[Any]:
+        """
+        Нечитаемое значение (поврежденное или в формате, пакет которого
+        не установлен) считается промахом кеша
+        """
+        try:
+            return self.codec.decode(data)
+        except CodecError as e:
+            logger.warning(f"Не удалось раскодировать значение кеша: {e}")
+            return None
+
+    @asynccontextmanager
+    async def pipeline(
+        self, transaction: bool = False
+    ) -> AsyncIterator["CachePipeline"]:
+        """
+        Пакет команд, отправляемый одним round trip при выходе из контекста.
+        transaction=True оборачивает пакет в MULTI/EXEC
+
+            async with redis_cache.pipeline() as pipe:
+                pipe.set("a", 1).get("b")
+            pipe.results  # [True, <значение b>]
+        """
+        pipe = CachePipeline(self, transaction=transaction)
+        try:
+            yield pipe
+            await pipe.execute()
+        except RedisError as e:
+            raise CacheError("Redis pipeline operation failed") from e
+        finally:
+            await pipe.reset()
+
+    @REDIS_DURATION.time("mget")
+    async def mget(self, keys: Iterable[str]) -> List[Optional[Any]]:
+        """
+        Получение нескольких значений за один round trip
+        """
+        keys = list(keys)
+        if not keys:
+            return []
+        try:
+            data = await self.redis.mget([self.key(key) for key in keys])
+            return [self._decode(item) for item in data]
+        except RedisError as e:
+            raise CacheError("Redis mget operation failed") from e
+
+    async def mset(self, mapping: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """
+        Атомарная установка нескольких значений с TTL за один round trip
+        """
+        if not mapping:
+            return
+        async with self.pipeline(transaction=True) as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, value, ttl)
 
     async def pong(self):
         return await self.redis.ping()
 
+    @REDIS_DURATION.time("get")
     async def get(self, key: str, deserializer=None) -> Optional[Any]:
         """
         Получение значения по ключу
         """
         try:
-            deserializer = deserializer or self.deserializer
-            data = await self.redis.get(key)
-            return deserializer(data) if data else None
+            data = await self.redis.get(self.key(key))
+            if deserializer is not None:
+                return deserializer(data) if data else None
+            return self._decode(data)
         except RedisError as e:
             raise CacheError("Redis get operation failed") from e
 
+    @REDIS_DURATION.time("set")
     async def set(
         self, key: str, value: Any, ttl: Optional[int] = None, serializer=None
     ) -> bool:
@@ -55,56 +138,62 @@ class RedisCacheService:
         """
 
         try:
-            serializer = serializer or self.serializer
-            serialized = serializer(value, default=str)
+            serialized = (
+                serializer(value, default=str) if serializer else self._encode(value)
+            )
             expire = ttl if ttl is not None else self.default_ttl
-            return await self.redis.set(name=key, value=serialized, ex=expire)
+            return await self.redis.set(name=self.key(key), value=serialized, ex=expire)
         except RedisError as e:
             raise CacheError("Redis set operation failed") from e
 
+    @REDIS_DURATION.time("delete")
     async def delete(self, *keys: str) -> int:
         """
         Удаление одного или нескольких ключей
         """
         try:
-            return await self.redis.delete(*keys)
+            return await self.redis.delete(*(self.key(key) for key in keys))
         except RedisError as e:
             raise CacheError("Redis delete operation failed") from e
 
+    @REDIS_DURATION.time("exists")
     async def exists(self, key: str) -> bool:
         """
         Проверка существования ключа
         """
         try:
-            return await self.redis.exists(key) == 1
+            return await self.redis.exists(self.key(key)) == 1
         except RedisError as e:
             raise CacheError("Redis exists operation failed") from e
 
+    @REDIS_DURATION.time("expire")
     async def expire(self, key: str, ttl: int) -> bool:
         """
         Установка времени жизни ключа в секундах
         """
         try:
-            return await self.redis.expire(key, ttl)
+            return await self.redis.expire(self.key(key), ttl)
         except RedisError as e:
             raise CacheError("Redis expire operation failed") from e
 
+    @REDIS_DURATION.time("ttl")
     async def ttl(self, key: str) -> int:
         """
         Получение оставшегося времени жизни ключа
         """
         try:
-            return await self.redis.ttl(key)
+            return await self.redis.ttl(self.key(key))
         except RedisError as e:
             raise CacheError("Redis ttl operation failed") from e
 
+    @REDIS_DURATION.time("hget")
     async def hget(self, key: str, field: str) -> Optional[Any]:
         """
         Получение значения из хэша
         """
         try:
-            data = await self.redis.hget(key, field)
-            return self.deserializer(data) if data else None
+            data = await self.redis.hget(self.key(key), field)
+            return self._decode(data)
         except RedisError as e:
             raise CacheError("Redis hget operation failed") from e
 
@@ -112,34 +201,147 @@ class RedisCacheService:
         self, key: str, field: str, value: Any, ttl: Optional[int] = None
     ) -> None:
         """
-        Установка значения в хэш
+        Установка значения в хэш (вместе с TTL атомарно, за один round trip)
         """
-        try:
-            serialized = self.serializer(value)
-            await self.redis.hset(key, field, serialized)
-            if ttl is not None:
-                await self.redis.expire(key, ttl)
-        except RedisError as e:
-            raise CacheError("Redis hset operation failed") from e
+        await self.hset_many(key, {field: value}, ttl)
 
+    async def hset_many(
+        self, key: str, mapping: Dict[str, Any], ttl: Optional[int] = None
+    ) -> None:
+        """
+        Установка нескольких полей хэша и TTL в одной транзакции
+        """
+        if not mapping:
+            return
+        async with self.pipeline(transaction=ttl is not None) as pipe:
+            pipe.hset(key, mapping, ttl)
+
+    @REDIS_DURATION.time("hgetall")
     async def hgetall(self, key: str) -> Dict[str, Any]:
         """
         Получение всего хэша
         """
         try:
-            data = await self.redis.hgetall(key)
-            return {k: self.deserializer(v) for k, v in data.items()}
+            data = await self.redis.hgetall(self.key(key))
+            return {k: self._decode(v) for k, v in data.items()}
         except RedisError as e:
             raise CacheError("Redis hgetall operation failed") from e
 
-    async def flush(self) -> bool:
+    async def hincrby_many(
+        self,
+        key: str,
+        increments: Dict[str, int | float],
+        ttl: Optional[int] = None,
+    ) -> None:
+        """
+        Атомарное приращение нескольких полей хэша за один round trip
+        """
+        if not increments:
+            return
+        async with self.pipeline(transaction=True) as pipe:
+            pipe.hincrby_many(key, increments, ttl)
+
+    @REDIS_DURATION.time("xrange")
+    async def xrange(
+        self,
+        key: str,
+        min: str = "-",
+        max: str = "+",
+        count: Optional[int] = None,
+    ) -> List[tuple[str, Optional[Any]]]:
+        """
+        Чтение записей потока (Redis Stream), добавленных через CachePipeline.xadd
+        """
+        try:
+            entries = await self.redis.xrange(
+                self.key(key), min=min, max=max, count=count
+            )
+        except RedisError as e:
+            raise CacheError("Redis xrange operation failed") from e
+        return [
+            (
+                entry_id.decode() if isinstance(entry_id, bytes) else entry_id,
+                self._decode(fields.get(b"v", fields.get("v"))),
+            )
+            for entry_id, fields in entries
+        ]
+
+    @REDIS_DURATION.time("acquire_lock")
+    async def acquire_lock(self, key: str, ttl: float) -> Optional[str]:
+        """
+        Захват распределенной блокировки (SET NX PX).
+        Возвращает токен владельца или None, если блокировка занята
+        """
+        token = uuid.uuid4().hex
+        try:
+            acquired = await self.redis.set(
+                self.key(key), token, nx=True, px=int(ttl * 1000)
+            )
+        except RedisError as e:
+            raise CacheError("Redis lock operation failed") from e
+        return token if acquired else None
+
+    @REDIS_DURATION.time("release_lock")
+    async def release_lock(self, key: str, token: str) -> bool:
         """
-        Очистка всей базы данных
+        Освобождение блокировки, только если она все еще принадлежит нам
         """
         try:
-            return await self.redis.flushdb()
+            return bool(
+                await self.redis.eval(_RELEASE_LOCK_SCRIPT, 1, self.key(key), token)
+            )
         except RedisError as e:
-            raise CacheError("Redis flush operation failed") from e
+            raise CacheError("Redis unlock operation failed") from e
+
+    @REDIS_DURATION.time("eval")
+    async def eval(
+        self, script: str, keys: Iterable[str] = (), args: Iterable[Any] = ()
+    ) -> Any:
+        """
+        Выполнение Lua-скрипта; ключи получают пространство имен,
+        аргументы передаются как есть
+        """
+        keys = [self.key(key) for key in keys]
+        try:
+            return await self.redis.eval(script, len(keys), *keys, *args)
+        except RedisError as e:
+            raise CacheError("Redis eval operation failed") from e
+
+    @REDIS_DURATION.time("delete_prefix")
+    async def delete_prefix(self, prefix: str = "", batch_size: int = 500) -> int:
+        """
+        Удаление всех ключей сервиса с заданным префиксом.
+        Ключи перебираются инкрементальным SCAN и удаляются пачками UNLINK
+        в pipeline, поэтому Redis не блокируется, а чужие данные не затрагиваются
+        """
+        pattern = _escape_glob(self.key(prefix)) + "*"
+        deleted = 0
+        try:
+            batch: list[bytes] = []
+            async for redis_key in self.redis.scan_iter(
+                match=pattern, count=batch_size
+            ):
+                batch.append(redis_key)
+                if len(batch) >= batch_size:
+                    deleted += await self._unlink(batch)
+                    batch = []
+            if batch:
+                deleted += await self._unlink(batch)
+        except RedisError as e:
+            raise CacheError("Redis delete by prefix operation failed") from e
+        return deleted
+
+    async def _unlink(self, keys: list[bytes]) -> int:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for chunk_start in range(0, len(keys), 100):
+                pipe.unlink(*keys[chunk_start : chunk_start + 100])
+            return sum(await pipe.execute())
+
+    async def flush(self) -> int:
+        """
+        Очистка всех ключей сервиса (только своего пространства имен, без FLUSHDB)
+        """
+        return await self.delete_prefix("")
 
     async def close(self) -> None:
         """
@@ -148,39 +350,371 @@ class RedisCacheService:
         await self.redis.close()
 
 
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+# KEYS: поток; ARGV: время записи (мс), maxlen (0 - без ограничения), значение.
+# Идентификатор потока должен расти, поэтому запись старше последней
+# получает время последней записи и следующий за ней номер
+_XADD_AT_SCRIPT = """
+local ms = tonumber(ARGV[1])
+local seq = 0
+local top = redis.call("XREVRANGE", KEYS[1], "+", "-", "COUNT", 1)[1]
+if top then
+    local top_ms, top_seq = string.match(top[1], "^(%d+)-(%d+)$")
+    top_ms = tonumber(top_ms)
+    if top_ms >= ms then
+        ms = top_ms
+        seq = tonumber(top_seq) + 1
+    end
+end
+local id = string.format("%d-%d", ms, seq)
+if tonumber(ARGV[2]) > 0 then
+    return redis.call("XADD", KEYS[1], "MAXLEN", "~", ARGV[2], id, "v", ARGV[3])
+end
+return redis.call("XADD", KEYS[1], id, "v", ARGV[3])
+"""
+
+
+class CachePipeline:
+    """
+    Буфер команд RedisCacheService для отправки одним round trip.
+    Ключи получают пространство имен, значения сериализуются так же, как в
+    одиночных операциях; после выполнения results содержит ответы по порядку
+    (значения get уже десериализованы)
+    """
+
+    def __init__(self, cache: RedisCacheService, transaction: bool = False):
+        self._cache = cache
+        self._pipe = cache.redis.pipeline(transaction=transaction)
+        self._decoders: list[Optional[callable]] = []
+        self.results: list[Any] = []
+
+    def __len__(self) -> int:
+        return len(self._decoders)
+
+    def get(self, key: str) -> "CachePipeline":
+        self._pipe.get(self._cache.key(key))
+        self._decoders.append(self._cache._decode)
+        return self
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> "CachePipeline":
+        expire = ttl if ttl is not None else self._cache.default_ttl
+        self._pipe.set(self._cache.key(key), self._cache._encode(value), ex=expire)
+        self._decoders.append(None)
+        return self
+
+    def delete(self, *keys: str) -> "CachePipeline":
+        self._pipe.delete(*(self._cache.key(key) for key in keys))
+        self._decoders.append(None)
+        return self
+
+    def expire(self, key: str, ttl: int) -> "CachePipeline":
+        self._pipe.expire(self._cache.key(key), ttl)
+        self._decoders.append(None)
+        return self
+
+    def hset(
+        self, key: str, mapping: Dict[str, Any], ttl: Optional[int] = None
+    ) -> "CachePipeline":
+        self._pipe.hset(
+            self._cache.key(key),
+            mapping={
+                field: self._cache._encode(value) for field, value in mapping.items()
+            },
+        )
+        self._decoders.append(None)
+        if ttl is not None:
+            self.expire(key, ttl)
+        return self
+
+    def hgetall(self, key: str) -> "CachePipeline":
+        self._pipe.hgetall(self._cache.key(key))
+        self._decoders.append(
+            lambda data: {k: self._cache._decode(v) for k, v in data.items()}
+        )
+        return self
+
+    def hincrby_many(
+        self,
+        key: str,
+        increments: Dict[str, int | float],
+        ttl: Optional[int] = None,
+    ) -> "CachePipeline":
+        full_key = self._cache.key(key)
+        for field, amount in increments.items():
+            if isinstance(amount, float):
+                self._pipe.hincrbyfloat(full_key, field, amount)
+            else:
+                self._pipe.hincrby(full_key, field, amount)
+            self._decoders.append(None)
+        if ttl is not None:
+            self.expire(key, ttl)
+        return self
+
+    def lpush(self, key: str, *values: str) -> "CachePipeline":
+        """
+        Добавление строк в начало списка (без кодека, как есть)
+        """
+        self._pipe.lpush(self._cache.key(key), *values)
+        self._decoders.append(None)
+        return self
+
+    def xadd(
+        self,
+        key: str,
+        value: Any,
+        maxlen: Optional[int] = None,
+        timestamp: Optional[float] = None,
+    ) -> "CachePipeline":
+        """
+        Добавление значения в поток; maxlen обрезает поток приблизительно (~).
+        С timestamp идентификатор записи берется из него, а не из времени
+        добавления (но не меньше последнего идентификатора потока)
+        """
+        if timestamp is None:
+            self._pipe.xadd(
+                self._cache.key(key),
+                {"v": self._cache._encode(value)},
+                maxlen=maxlen,
+                approximate=True,
+            )
+        else:
+            self._pipe.eval(
+                _XADD_AT_SCRIPT,
+                1,
+                self._cache.key(key),
+                int(timestamp * 1000),
+                maxlen or 0,
+                self._cache._encode(value),
+            )
+        self._decoders.append(None)
+        return self
+
+    @REDIS_DURATION.time("pipeline")
+    async def execute(self) -> list[Any]:
+        if not self._decoders:
+            return []
+        raw = await self._pipe.execute()
+        self.results = [
+            decoder(item) if decoder is not None else item
+            for decoder, item in zip(self._decoders, raw)
+        ]
+        self._decoders = []
+        return self.results
+
+    async def reset(self) -> None:
+        await self._pipe.reset()
+
+
+def _escape_glob(value: str) -> str:
+    for char in "\\*?[]":
+        value = value.replace(char, "\\" + char)
+    return value
+
+
 class CacheError(Exception):
     """Базовое исключение для ошибок кеширования"""
 
     pass
 
 
+# Загрузки, выполняющиеся в этом процессе: ключ кеша -> задача
+_inflight: Dict[str, asyncio.Task] = {}
+
+LOCK_POLL_INTERVAL = 0.05
+
+
+def _log_refresh_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(
+            f"Фоновое обновление кеша завершилось ошибкой: {task.exception()}"
+        )
+
+
 def cache_result(
     prefix_key: str = "",
     kwargs_names_to_keys: list[str] = ["default"],
     ttl: int = 3600,
+    stale_ttl: int = 0,
+    lock_timeout: float = 30.0,
 ):
+    """
+    Кеширование результата корутины в Redis с защитой от cache stampede.
+
+    Попадание - один GET. Одновременные промахи объединяются: внутри процесса
+    через общую задачу, между воркерами через блокировку в Redis, так что
+    исходную функцию вызывает только один. Устаревшее значение (в пределах
+    stale_ttl после ttl) отдается сразу, а обновление идет в фоне.
+
+    :param prefix_key: Категория ключа (по умолчанию имя функции)
+    :param kwargs_names_to_keys: Имена kwargs, участвующих в ключе
+    :param ttl: Время свежести значения (в секундах)
+    :param stale_ttl: Сколько еще отдавать устаревшее значение во время обновления
+    :param lock_timeout: Время жизни блокировки загрузки (в секундах)
+    """
+
     def decorator(func):
+        # Первая часть ключа - категория кеша, по ней работает инвалидация
+        category = prefix_key or func.__name__
+
+        async def fresh(key_data: str):
+            envelope = await redis_cache.get(key_data)
+            if _is_envelope(envelope) and envelope["fresh_until"] > time.time():
+                return envelope
+            return None
+
+        async def load(key_data: str, args, kwargs):
+            lock_key = f"{key_data}:lock"
+            token = await redis_cache.acquire_lock(lock_key, lock_timeout)
+            deadline = time.monotonic() + lock_timeout
+            while token is None and time.monotonic() < deadline:
+                # Значение уже загружает другой воркер - ждем, пока оно появится
+                await asyncio.sleep(LOCK_POLL_INTERVAL)
+                if (envelope := await fresh(key_data)) is not None:
+                    return envelope["value"]
+                if await redis_cache.exists(lock_key):
+                    continue
+                # Блокировка снята без значения (загрузка упала или отменена):
+                # загрузку берет на себя тот, кто первым захватит блокировку
+                token = await redis_cache.acquire_lock(lock_key, lock_timeout)
+                if token is not None and (envelope := await fresh(key_data)):
+                    # Значение успело появиться между проверками
+                    await redis_cache.release_lock(lock_key, token)
+                    return envelope["value"]
+            try:
+                fresh_value = await func(*args, **kwargs)
+                envelope = {"value": fresh_value, "fresh_until": time.time() + ttl}
+                await redis_cache.set(key_data, envelope, ttl + stale_ttl)
+                return fresh_value
+            finally:
+                if token is not None:
+                    await redis_cache.release_lock(lock_key, token)
+
+        def single_flight(key_data: str, args, kwargs) -> asyncio.Task:
+            task = _inflight.get(key_data)
+            if task is None:
+                task = asyncio.create_task(load(key_data, args, kwargs))
+                _inflight[key_data] = task
+                task.add_done_callback(lambda _: _inflight.pop(key_data, None))
+            return task
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
             key = prefix_key + func.__name__
             for key_name in kwargs_names_to_keys:
                 key += str(kwargs.get(key_name, ""))
 
-            key_data = hashlib.md5(key.encode()).hexdigest()
-            if await redis_cache.exists(key_data):
-                return await redis_cache.get(key_data)
-            fresh_value = await func(*args, **kwargs)
+            key_data = f"{category}:{hashlib.md5(key.encode()).hexdigest()}"
+            envelope = await redis_cache.get(key_data)
+            if _is_envelope(envelope):
+                if envelope["fresh_until"] > time.time():
+                    CACHE_LOOKUPS.inc(category, "hit")
+                    return envelope["value"]
+                if stale_ttl:
+                    CACHE_LOOKUPS.inc(category, "stale")
+                    if key_data not in _inflight:
+                        single_flight(key_data, args, kwargs).add_done_callback(
+                            _log_refresh_error
+                        )
+                    return envelope["value"]
 
-            await redis_cache.set(key_data, fresh_value, ttl)
-            return fresh_value
+            CACHE_LOOKUPS.inc(category, "miss")
+            # shield: отмена одного из ожидающих не должна отменять общую загрузку
+            return await asyncio.shield(single_flight(key_data, args, kwargs))
 
         return wrapper
 
     return decorator
 
 
-redis_client = Redis.from_url(f"redis://{settings.REDIS_HOST}:6379")
+def _is_envelope(value: Any) -> bool:
+    return isinstance(value, dict) and value.keys() == {"value", "fresh_until"}
+
+
+class RedisClientService:
+    """
+    Пул соединений Redis одного воркера. Создается в lifespan (start), а не
+    при импорте, чтобы каждый процесс открывал свой пул в своем событийном цикле
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_connections: int = 50,
+        pool_timeout: float = 5.0,
+        socket_timeout: float = 5.0,
+        socket_connect_timeout: float = 2.0,
+        health_check_interval: int = 30,
+    ):
+        """
+        Инициализация параметров пула (сам клиент создается в start)
+
+        :param url: Адрес Redis
+        :param max_connections: Максимальное число соединений в пуле
+        :param pool_timeout: Ожидание свободного соединения, когда заняты все
+            max_connections (в секундах)
+        :param socket_timeout: Таймаут операции на сокете (в секундах)
+        :param socket_connect_timeout: Таймаут подключения (в секундах)
+        :param health_check_interval: Период проверки простаивающих соединений
+        """
+        self.url = url
+        self.options = dict(
+            max_connections=max_connections,
+            timeout=pool_timeout,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_connect_timeout,
+            health_check_interval=health_check_interval,
+        )
+        self._client: Optional[Redis] = None
+
+    @property
+    def client(self) -> Redis:
+        if self._client is None:
+            raise RuntimeError("Redis-клиент не инициализирован, вызовите start()")
+        return self._client
+
+    async def start(self) -> Redis:
+        """
+        Открытие пула соединений
+        """
+        if self._client is None:
+            # Блокирующий пул: при занятых соединениях вызов ждет освобождения,
+            # а не падает с "Too many connections"
+            pool = BlockingConnectionPool.from_url(self.url, **self.options)
+            self._client = Redis.from_pool(pool)
+        return self._client
+
+    async def close(self) -> None:
+        """
+        Закрытие пула соединений
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+redis_client = RedisClientService(
+    f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}",
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    pool_timeout=settings.REDIS_POOL_TIMEOUT,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+    health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+)
 
-redis_cache = RedisCacheService(redis_client)
+redis_cache = RedisCacheService(
+    redis_client,
+    codec=CacheCodec.from_names(
+        settings.CACHE_FORMAT,
+        settings.CACHE_COMPRESSION,
+        settings.CACHE_COMPRESSION_THRESHOLD,
+    ),
+    namespace=settings.REDIS_NAMESPACE,
+)
 
 __all__ = ["redis_cache", "cache_result"]
@@ -0,0 +1,283 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+from fastapi import HTTPException
+
+from config import settings
+from core.histogram import LogHistogram, make_histogram
+from core.logger import logger
+from schemas.Benchmark import SResilienceModelStats, SResilienceStats
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class _Budget:
+    """
+    Бюджет дополнительных вызовов: каждый основной вызов добавляет ratio
+    токена (не больше burst), каждый повтор или дубль тратит один токен.
+    Так доля лишней нагрузки не превышает ratio на длинной дистанции
+    """
+
+    __slots__ = ("ratio", "burst", "tokens")
+
+    def __init__(self, ratio: float, burst: float):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst
+
+    def deposit(self) -> None:
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def take(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class _ModelState:
+    """Окно задержек и счетчики одной модели"""
+
+    __slots__ = (
+        "current",
+        "previous",
+        "requests",
+        "retries",
+        "retries_denied",
+        "hedges",
+        "hedge_wins",
+        "hedges_denied",
+    )
+
+    def __init__(self) -> None:
+        self.current: LogHistogram = make_histogram("latency")
+        self.previous: Optional[LogHistogram] = None
+        self.requests = 0
+        self.retries = 0
+        self.retries_denied = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedges_denied = 0
+
+
+class ResilientCaller:
+    """
+    Повторы и хеджирование вызовов OpenRouter.
+
+    Повтор: ретраибельная ошибка (таймаут, обрыв соединения, 408/429/5xx)
+    повторяется с экспоненциальной задержкой и полным джиттером; Retry-After
+    из ответа задает нижнюю границу задержки.
+
+    Хеджирование: если ответ не пришел за порог (перцентиль задержек модели
+    в скользящем окне), запускается дубль запроса; побеждает первый
+    успешный ответ, проигравший отменяется. Повторы и дубли ограничены
+    бюджетами, поэтому лишняя нагрузка не превышает заданной доли вызовов.
+
+    Счетчики и окно задержек - в памяти процесса.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.2,
+        max_delay: float = 5.0,
+        retry_budget: float = 0.2,
+        hedge_enabled: bool = False,
+        hedge_percentile: float = 95,
+        hedge_min_delay: float = 0.05,
+        hedge_min_samples: int = 20,
+        hedge_budget: float = 0.05,
+        window: int = 1000,
+        budget_burst: float = 10,
+    ):
+        """
+        :param max_attempts: Предельное число попыток вызова (1 - без повторов)
+        :param base_delay: Задержка перед первым повтором (в секундах)
+        :param max_delay: Предельная задержка перед повтором (в секундах)
+        :param retry_budget: Доля вызовов, которую могут добавить повторы
+        :param hedge_enabled: Включить хеджирование
+        :param hedge_percentile: Перцентиль задержки, после которого запускается дубль
+        :param hedge_min_delay: Нижняя граница порога хеджирования (в секундах)
+        :param hedge_min_samples: Сколько замеров нужно, чтобы начать хеджировать
+        :param hedge_budget: Доля вызовов, которую могут добавить дубли
+        :param window: Размер окна задержек модели (в замерах)
+        :param budget_burst: Запас токенов бюджетов на всплеск
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.window = window
+        self._retry_budget = _Budget(retry_budget, budget_burst)
+        self._hedge_budget = _Budget(hedge_budget, budget_burst)
+        self._models: Dict[str, _ModelState] = {}
+
+    def _state(self, model: str) -> _ModelState:
+        state = self._models.get(model)
+        if state is None:
+            state = self._models[model] = _ModelState()
+        return state
+
+    def _observe(self, state: _ModelState, latency: float) -> None:
+        state.current.record(latency)
+        if state.current.total >= self.window:
+            # Окно скользит двумя половинами: порог следует за провайдером
+            state.previous = state.current
+            state.current = make_histogram("latency")
+
+    def threshold(self, model: str) -> Optional[float]:
+        """
+        Порог хеджирования модели; None - замеров пока недостаточно
+        """
+        state = self._models.get(model)
+        if state is None:
+            return None
+        histogram = state.current
+        if histogram.total < self.hedge_min_samples:
+            histogram = state.previous
+        if histogram is None or histogram.total < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay, histogram.percentile(self.hedge_percentile))
+
+    @staticmethod
+    def _is_retryable(error: BaseException) -> bool:
+        if isinstance(error, HTTPException):
+            return error.status_code in RETRYABLE_STATUS_CODES
+        return isinstance(error, (httpx.TimeoutException, httpx.TransportError))
+
+    def _backoff(self, attempt: int, error: BaseException) -> Optional[float]:
+        """
+        Задержка перед повтором; None - ждать дольше max_delay не имеет смысла
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        headers = getattr(error, "headers", None) or {}
+        try:
+            retry_after = float(headers.get("Retry-After") or 0)
+        except ValueError:
+            retry_after = 0.0
+        if retry_after > self.max_delay:
+            return None
+        return max(delay, retry_after)
+
+    async def call(self, model: str, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Вызов с повторами и хеджированием; call создает новый запрос
+        при каждом вызове
+        """
+        state = self._state(model)
+        state.requests += 1
+        self._retry_budget.deposit()
+        self._hedge_budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                return await self._hedged(model, state, call)
+            except Exception as e:
+                attempt += 1
+                if attempt >= self.max_attempts or not self._is_retryable(e):
+                    raise
+                delay = self._backoff(attempt - 1, e)
+                if delay is None:
+                    raise
+                if not self._retry_budget.take():
+                    state.retries_denied += 1
+                    raise
+                state.retries += 1
+                logger.warning(
+                    f"Повтор вызова {model} через {delay:.2f} с "
+                    f"(попытка {attempt + 1}): {type(e).__name__}: {e}"
+                )
+                await asyncio.sleep(delay)
+
+    async def _hedged(
+        self, model: str, state: _ModelState, call: Callable[[], Awaitable[T]]
+    ) -> T:
+        threshold = self.threshold(model) if self.hedge_enabled else None
+        start_time = time.perf_counter()
+        primary = asyncio.ensure_future(call())
+        if threshold is None:
+            result = await primary
+            self._observe(state, time.perf_counter() - start_time)
+            return result
+
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=threshold)
+            if not done:
+                if self._hedge_budget.take():
+                    state.hedges += 1
+                    hedge_start = time.perf_counter()
+                    hedge = asyncio.ensure_future(call())
+                    pending.add(hedge)
+                else:
+                    state.hedges_denied += 1
+
+            first_error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                # Основной вызов проверяется первым: при одновременном
+                # завершении победа не засчитывается дублю
+                for task in sorted(done, key=lambda task: task is not primary):
+                    error = task.exception()
+                    if error is None:
+                        if task is primary:
+                            self._observe(state, time.perf_counter() - start_time)
+                        else:
+                            state.hedge_wins += 1
+                            self._observe(state, time.perf_counter() - hedge_start)
+                        return task.result()
+                    if first_error is None or task is primary:
+                        first_error = error
+            raise first_error
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def stats(self) -> SResilienceStats:
+        return SResilienceStats(
+            models={
+                model: SResilienceModelStats(
+                    requests=state.requests,
+                    retries=state.retries,
+                    retries_denied=state.retries_denied,
+                    hedges=state.hedges,
+                    hedges_denied=state.hedges_denied,
+                    hedge_wins=state.hedge_wins,
+                    hedge_win_rate=(
+                        state.hedge_wins / state.hedges if state.hedges else None
+                    ),
+                    hedge_threshold_seconds=self.threshold(model),
+                )
+                for model, state in self._models.items()
+            },
+            hedging_enabled=self.hedge_enabled,
+            retry_budget_tokens=self._retry_budget.tokens,
+            hedge_budget_tokens=self._hedge_budget.tokens,
+        )
+
+
+resilience = ResilientCaller(
+    max_attempts=settings.RETRY_MAX_ATTEMPTS,
+    base_delay=settings.RETRY_BASE_DELAY,
+    max_delay=settings.RETRY_MAX_DELAY,
+    retry_budget=settings.RETRY_BUDGET_RATIO,
+    hedge_enabled=settings.HEDGE_ENABLED,
+    hedge_percentile=settings.HEDGE_PERCENTILE,
+    hedge_min_delay=settings.HEDGE_MIN_DELAY,
+    hedge_min_samples=settings.HEDGE_MIN_SAMPLES,
+    hedge_budget=settings.HEDGE_BUDGET_RATIO,
+)
+
+__all__ = ["resilience", "ResilientCaller"]
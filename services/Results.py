@@ -0,0 +1,277 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Optional
+
+from fastapi import HTTPException
+
+from config import settings
+from core.histogram import LogHistogram, make_histogram
+from core.logger import logger
+from core.periodic import PeriodicFlusher
+from repositories.Results import (
+    RedisStreamResultStore,
+    ResultStore,
+    ResultStoreError,
+    SQLiteResultStore,
+)
+from schemas.Benchmark import SLatency, SUsage
+from schemas.Results import (
+    SResultBucket,
+    SResultRecord,
+    SResultSeries,
+    SResultSeriesQuery,
+    SResultsPage,
+    SResultsQuery,
+)
+from services.Leaderboard import LeaderboardService, leaderboard
+from services.Redis import RedisCacheService, redis_cache, redis_client
+
+
+class _Bucket:
+    """Накопитель одной корзины ряда: счетчики и гистограммы фиксированного размера"""
+
+    __slots__ = ("requests", "errors", "output_tokens", "cost", "histograms")
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.output_tokens = 0
+        self.cost = 0.0
+        self.histograms: dict[str, LogHistogram] = {}
+
+    def record(self, metric: str, value: Optional[float]) -> None:
+        if value is None:
+            return
+        histogram = self.histograms.get(metric)
+        if histogram is None:
+            histogram = self.histograms[metric] = make_histogram(metric)
+        histogram.record(value)
+
+    def summary(self, metric: str) -> dict:
+        histogram = self.histograms.get(metric)
+        return histogram.summary() if histogram is not None else {"count": 0}
+
+
+class ResultService(PeriodicFlusher):
+    """
+    Журнал всех замеренных вызовов OpenRouter.
+
+    Запись - O(1) добавление в буфер процесса; буфер сбрасывается в
+    хранилище пачками по batch_size записей или раз в flush_interval секунд.
+    Если хранилище недоступно, записи остаются в буфере, а при его
+    переполнении отбрасываются самые старые (счетчик dropped).
+    """
+
+    PAGE_SIZE = 1000
+
+    def __init__(
+        self,
+        store: ResultStore,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        max_pending: int = 10000,
+        max_buckets: int = 500,
+        leaderboard: Optional[LeaderboardService] = None,
+    ):
+        """
+        :param store: Хранилище замеров
+        :param batch_size: Размер пачки, при котором сброс запускается сразу
+        :param flush_interval: Период сброса буфера (в секундах)
+        :param max_pending: Предельный размер буфера при недоступном хранилище
+        :param max_buckets: Предельное число корзин в одном запросе ряда
+        :param leaderboard: Агрегаты сравнительной таблицы моделей
+        """
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buckets = max_buckets
+        self.leaderboard = leaderboard
+        self._pending: deque[SResultRecord] = deque(maxlen=max_pending)
+        self._flush_lock = asyncio.Lock()
+        self._kick_task: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+    @staticmethod
+    def make_record(
+        model: str,
+        stream: bool,
+        time_total: float,
+        latency: Optional[SLatency] = None,
+        usage: Optional[SUsage] = None,
+        provider: Optional[str] = None,
+        ttft_seconds: Optional[float] = None,
+        tokens_per_second: Optional[float] = None,
+        cost: Optional[float] = None,
+        http_code: Optional[int] = None,
+        error: Optional[str] = None,
+    ) -> SResultRecord:
+        phases = {}
+        if latency is not None:
+            phases = latency.model_dump(
+                include={
+                    "dns_time",
+                    "connect_time",
+                    "tls_time",
+                    "send_time",
+                    "ttfb_time",
+                    "download_time",
+                }
+            )
+            http_code = http_code or latency.http_code
+        return SResultRecord(
+            timestamp=time.time(),
+            model=model,
+            provider=provider,
+            stream=stream,
+            success=error is None,
+            http_code=http_code,
+            error=error,
+            time_total=time_total,
+            ttft_seconds=ttft_seconds,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+            tokens_per_second=tokens_per_second,
+            cost=cost,
+            **phases,
+        )
+
+    def record(self, record: SResultRecord) -> None:
+        if self.leaderboard is not None:
+            self.leaderboard.record(record)
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1
+        self._pending.append(record)
+        if len(self._pending) >= self.batch_size and (
+            self._kick_task is None or self._kick_task.done()
+        ):
+            self._kick_task = asyncio.create_task(self.flush())
+
+    async def flush(self) -> None:
+        """
+        Сброс буфера в хранилище пачками по batch_size
+        """
+        async with self._flush_lock:
+            while self._pending:
+                batch = [
+                    self._pending.popleft()
+                    for _ in range(min(self.batch_size, len(self._pending)))
+                ]
+                try:
+                    await self.store.append(batch)
+                except ResultStoreError as e:
+                    logger.warning(f"Не удалось сохранить результаты: {e}")
+                    # Возвращаем пачку в начало буфера до следующего сброса
+                    free = self._pending.maxlen - len(self._pending)
+                    self.dropped += max(0, len(batch) - free)
+                    self._pending.extendleft(reversed(batch[len(batch) - free :]))
+                    return
+
+    @staticmethod
+    def _check_range(start: float, end: float) -> None:
+        if not (math.isfinite(start) and math.isfinite(end)) or end <= start:
+            raise HTTPException(
+                status_code=400, detail="Конец диапазона должен быть позже начала"
+            )
+
+    async def page(self, query: SResultsQuery) -> SResultsPage:
+        """
+        Страница сырых замеров модели за диапазон времени
+        """
+        self._check_range(query.start, query.end)
+        try:
+            records, next_cursor = await self.store.read(
+                query.model, query.start, query.end, query.limit, query.cursor
+            )
+        except ResultStoreError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        return SResultsPage(records=records, next_cursor=next_cursor)
+
+    async def series(self, query: SResultSeriesQuery) -> SResultSeries:
+        """
+        Ряд по корзинам фиксированной ширины. Диапазон читается страницами
+        и сразу сворачивается в корзины, поэтому память ограничена числом
+        корзин, а не количеством замеров
+        """
+        self._check_range(query.start, query.end)
+        if (query.end - query.start) / query.bucket_seconds > self.max_buckets:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Диапазон дает больше {self.max_buckets} корзин",
+            )
+
+        n_buckets = math.ceil((query.end - query.start) / query.bucket_seconds)
+        buckets: dict[int, _Bucket] = {}
+        cursor = None
+        while True:
+            try:
+                records, cursor = await self.store.read(
+                    query.model, query.start, query.end, self.PAGE_SIZE, cursor
+                )
+            except ResultStoreError as e:
+                raise HTTPException(status_code=503, detail=str(e))
+            for record in records:
+                index = int((record.timestamp - query.start) // query.bucket_seconds)
+                if not 0 <= index < n_buckets:
+                    continue
+                bucket = buckets.get(index)
+                if bucket is None:
+                    bucket = buckets[index] = _Bucket()
+                bucket.requests += 1
+                if not record.success:
+                    bucket.errors += 1
+                    continue
+                bucket.output_tokens += record.completion_tokens
+                bucket.cost += record.cost or 0.0
+                bucket.record("latency", record.time_total)
+                bucket.record("ttft", record.ttft_seconds)
+                bucket.record("tokens_per_second", record.tokens_per_second)
+            if cursor is None:
+                break
+
+        return SResultSeries(
+            model=query.model,
+            bucket_seconds=query.bucket_seconds,
+            buckets=[
+                SResultBucket(
+                    start=query.start + index * query.bucket_seconds,
+                    requests=bucket.requests,
+                    errors=bucket.errors,
+                    latency_seconds=bucket.summary("latency"),
+                    ttft_seconds=bucket.summary("ttft"),
+                    tokens_per_second=bucket.summary("tokens_per_second"),
+                    output_tokens=bucket.output_tokens,
+                    total_cost=bucket.cost,
+                )
+                for index, bucket in sorted(buckets.items())
+            ],
+        )
+
+    async def close(self) -> None:
+        await super().close()
+        await self.store.close()
+
+
+def make_result_store() -> ResultStore:
+    if settings.RESULTS_BACKEND == "sqlite":
+        return SQLiteResultStore(settings.RESULTS_SQLITE_PATH)
+    # Отдельное пространство имен: очистка кеша не должна затрагивать журнал
+    storage = RedisCacheService(
+        redis_client,
+        codec=redis_cache.codec,
+        namespace=f"{settings.REDIS_NAMESPACE}-results",
+    )
+    return RedisStreamResultStore(storage, maxlen=settings.RESULTS_STREAM_MAXLEN)
+
+
+results = ResultService(
+    make_result_store(),
+    batch_size=settings.RESULTS_BATCH_SIZE,
+    flush_interval=settings.RESULTS_FLUSH_INTERVAL,
+    max_pending=settings.RESULTS_MAX_PENDING,
+    max_buckets=settings.RESULTS_MAX_BUCKETS,
+    leaderboard=leaderboard,
+)
+
+__all__ = ["results", "ResultService"]
@@ -0,0 +1,403 @@
+import asyncio
+import json
+import mmap
+import os
+import shutil
+import time
+from collections import deque
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from config import settings
+from core.histogram import make_histogram
+from core.logger import logger
+from schemas.Benchmark import SBenchmarkModelResult, SBenchmarkSample, SGenerateRequest
+from schemas.Suites import SSuite, SSuiteCheckpoint, SSuiteReport
+from services.Benchmark import BenchmarkService
+
+
+class _Row(NamedTuple):
+    """Строка набора: промпт или причина, по которой его не удалось прочитать"""
+
+    index: int
+    end: int
+    prompt: Optional[str]
+    error: Optional[str]
+
+
+def read_rows(
+    path: str,
+    prompt_field: str = "prompt",
+    offset: int = 0,
+    row: int = 0,
+    use_mmap: bool = False,
+) -> Iterator[_Row]:
+    """
+    Строки JSONL-набора по одной, начиная со смещения offset (row - номер
+    строки на этом смещении). Строка - JSON-строка с промптом или объект с
+    полем prompt_field; пустые строки пропускаются и не занимают номер.
+    use_mmap - чтение через отображение файла в память: страницы подгружает
+    и вытесняет ОС, и большой файл не проходит через буфер процесса
+    """
+    with open(path, "rb") as file:
+        if not use_mmap:
+            file.seek(offset)
+            yield from _parse_rows(file, prompt_field, offset, row)
+            return
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            mapped.seek(offset)
+            yield from _parse_rows(
+                iter(mapped.readline, b""), prompt_field, offset, row
+            )
+
+
+def _parse_rows(
+    lines: Iterable[bytes], prompt_field: str, offset: int, row: int
+) -> Iterator[_Row]:
+    for line in lines:
+        offset += len(line)
+        if not line.strip():
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError as e:
+            yield _Row(row, offset, None, f"Некорректная строка набора: {e}")
+        else:
+            if isinstance(value, dict):
+                value = value.get(prompt_field)
+            if isinstance(value, str):
+                yield _Row(row, offset, value, None)
+            else:
+                yield _Row(
+                    row, offset, None, f"В строке набора нет промпта ({prompt_field})"
+                )
+        row += 1
+
+
+class _ModelSummary:
+    """Сводка по модели из потока замеров, память не зависит от их числа"""
+
+    __slots__ = (
+        "requests",
+        "errors",
+        "output_tokens",
+        "cost",
+        "error_examples",
+        "latency",
+        "ttft",
+        "tokens_per_second",
+    )
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.output_tokens = 0
+        self.cost = 0.0
+        self.error_examples: dict[str, None] = {}
+        self.latency = make_histogram("latency")
+        self.ttft = make_histogram("ttft")
+        self.tokens_per_second = make_histogram("tokens_per_second")
+
+    def add(self, sample: SBenchmarkSample) -> None:
+        self.requests += 1
+        if not sample.success:
+            self.errors += 1
+            if sample.error and len(self.error_examples) < 5:
+                self.error_examples[sample.error] = None
+            return
+        if sample.cached:
+            # Ответ из кеша или объединенного вызова - не замер провайдера
+            return
+        self.output_tokens += sample.output_tokens
+        self.cost += sample.cost or 0.0
+        self.latency.record(sample.latency_seconds)
+        if sample.ttft_seconds is not None:
+            self.ttft.record(sample.ttft_seconds)
+        if sample.tokens_per_second is not None:
+            self.tokens_per_second.record(sample.tokens_per_second)
+
+    def result(self, model: str) -> SBenchmarkModelResult:
+        return SBenchmarkModelResult(
+            model=model,
+            requests=self.requests,
+            errors=self.errors,
+            error_rate=self.errors / self.requests if self.requests else 0.0,
+            latency_seconds=self.latency.summary(),
+            ttft_seconds=self.ttft.summary(),
+            tokens_per_second=self.tokens_per_second.summary(),
+            output_tokens=self.output_tokens,
+            total_cost=self.cost,
+            error_examples=list(self.error_examples),
+        )
+
+
+class SuiteRunner:
+    """
+    Именованные наборы бенчмарков из JSONL-файлов на диске.
+
+    Строки набора читаются генератором по мере освобождения слотов и
+    разворачиваются по матрице моделей и повторов; каждый замер сразу
+    дописывается строкой в results.jsonl каталога набора. Контрольная точка
+    хранит первую строку, у которой выполнены не все замеры, и ее смещение
+    в файле набора: после сбоя прогон продолжается с нее, а уже записанные
+    замеры следующих строк (они завершаются не по порядку) не повторяются.
+    """
+
+    SUITE_FILE = "suite.json"
+    CHECKPOINT_FILE = "checkpoint.json"
+    RESULTS_FILE = "results.jsonl"
+    REPORT_FILE = "report.json"
+
+    def __init__(
+        self,
+        benchmark_service: BenchmarkService,
+        root: Optional[str] = None,
+        checkpoint_interval: float = 1.0,
+        window: int = 1024,
+        use_mmap: bool = False,
+    ) -> None:
+        """
+        :param benchmark_service: Сервис замеров
+        :param root: Каталог наборов (по умолчанию SUITES_DIR)
+        :param checkpoint_interval: Период сохранения контрольной точки (в секундах)
+        :param window: Сколько строк может быть начато после первой незавершенной
+        :param use_mmap: Читать набор через mmap
+        """
+        self.benchmark_service = benchmark_service
+        self.root = root or settings.SUITES_DIR
+        self.checkpoint_interval = checkpoint_interval
+        self.window = window
+        self.use_mmap = use_mmap
+
+    def path(self, name: str, filename: str) -> str:
+        return os.path.join(self.root, name, filename)
+
+    def open_suite(
+        self, name: str, suite: Optional[SSuite] = None, restart: bool = False
+    ) -> SSuite:
+        """
+        Параметры набора: без suite - сохраненные при первом запуске.
+        Продолжить набор с другими параметрами нельзя, только начать заново
+        """
+        saved = self._load(self.path(name, self.SUITE_FILE), SSuite)
+        if restart:
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+        elif suite is not None and saved is not None and suite != saved:
+            raise ValueError(
+                f"Набор {name} уже запускался с другими параметрами, "
+                f"для нового прогона нужен перезапуск"
+            )
+        suite = suite or saved
+        if suite is None:
+            raise ValueError(f"Набор {name} не найден: нужны файл набора и модели")
+        os.makedirs(os.path.join(self.root, name), exist_ok=True)
+        self._save(self.path(name, self.SUITE_FILE), suite)
+        return suite
+
+    async def run(self, suite: SSuite) -> SSuiteReport:
+        stat = os.stat(suite.dataset)
+        checkpoint = self._load(
+            self.path(suite.name, self.CHECKPOINT_FILE), SSuiteCheckpoint
+        ) or SSuiteCheckpoint(
+            dataset_size=stat.st_size,
+            dataset_mtime=stat.st_mtime,
+            started_at=time.time(),
+        )
+        if (checkpoint.dataset_size, checkpoint.dataset_mtime) != (
+            stat.st_size,
+            stat.st_mtime,
+        ):
+            raise ValueError(
+                f"Файл набора {suite.dataset} изменился после первого запуска, "
+                f"продолжить прогон нельзя"
+            )
+        if checkpoint.finished_at is not None:
+            return self.report(suite, checkpoint)
+        if checkpoint.row:
+            logger.info(f"Набор {suite.name} продолжен со строки {checkpoint.row}")
+
+        results_path = self.path(suite.name, self.RESULTS_FILE)
+        resume_offset = checkpoint.results_offset
+        recorded = self._recorded(results_path, resume_offset, checkpoint.row)
+        results = open(results_path, "ab")
+        cells_per_row = len(suite.models) * suite.repetitions
+        slots = asyncio.Semaphore(suite.concurrency or settings.BENCHMARK_CONCURRENCY)
+        # Начатые строки по порядку: [номер, смещение следующей строки,
+        # смещение результатов до первого замера строки, осталось замеров]
+        window: deque[list] = deque()
+        room = asyncio.Event()
+        tasks: set[asyncio.Task] = set()
+        failures: list[BaseException] = []
+        last_save = time.monotonic()
+
+        def save(force: bool = False) -> None:
+            nonlocal last_save
+            if not force and time.monotonic() - last_save < self.checkpoint_interval:
+                return
+            # Замеры строк до контрольной точки должны попасть в файл раньше нее
+            results.flush()
+            checkpoint.results_offset = min(
+                (entry[2] for entry in window), default=results.tell()
+            )
+            self._save(self.path(suite.name, self.CHECKPOINT_FILE), checkpoint)
+            last_save = time.monotonic()
+
+        def advance() -> None:
+            while window and window[0][3] == 0:
+                row, end, _, _ = window.popleft()
+                checkpoint.row, checkpoint.offset = row + 1, end
+                room.set()
+            save()
+
+        async def measure(row: _Row, entry: list, model: str, repetition: int) -> None:
+            try:
+                if row.error is not None:
+                    sample = SBenchmarkSample(
+                        model=model,
+                        prompt_index=row.index,
+                        repetition=repetition,
+                        success=False,
+                        error=row.error,
+                        latency_seconds=0.0,
+                    )
+                else:
+                    sample = await self.benchmark_service.measure(
+                        SGenerateRequest(
+                            prompt=row.prompt,
+                            model=model,
+                            max_tokens=suite.max_tokens,
+                            stream=suite.stream,
+                            cache=suite.cache,
+                        ),
+                        row.index,
+                        repetition,
+                    )
+                results.write(sample.model_dump_json().encode() + b"\n")
+                entry[3] -= 1
+                advance()
+            finally:
+                slots.release()
+
+        def finished(task: asyncio.Task) -> None:
+            tasks.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                failures.append(task.exception())
+
+        try:
+            for row in read_rows(
+                suite.dataset,
+                suite.prompt_field,
+                checkpoint.offset,
+                checkpoint.row,
+                self.use_mmap,
+            ):
+                while len(window) >= self.window:
+                    room.clear()
+                    await room.wait()
+                if failures:
+                    raise failures[0]
+                cells = [
+                    (model, repetition)
+                    for repetition in range(suite.repetitions)
+                    for model in suite.models
+                    if (row.index, model, repetition) not in recorded
+                ]
+                # Часть замеров строки записана прошлым прогоном до results.tell()
+                entry = [
+                    row.index,
+                    row.end,
+                    resume_offset if len(cells) < cells_per_row else results.tell(),
+                    len(cells),
+                ]
+                window.append(entry)
+                for model, repetition in cells:
+                    await slots.acquire()
+                    task = asyncio.create_task(measure(row, entry, model, repetition))
+                    tasks.add(task)
+                    task.add_done_callback(finished)
+                advance()
+            while tasks:
+                await asyncio.wait(set(tasks))
+            if failures:
+                raise failures[0]
+            checkpoint.finished_at = time.time()
+        finally:
+            # Прерванные замеры не записаны и будут выполнены при продолжении
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            save(force=True)
+            results.close()
+
+        report = self.report(suite, checkpoint)
+        self._save(self.path(suite.name, self.REPORT_FILE), report)
+        logger.info(
+            f"Набор {suite.name} выполнен: строк {report.rows}, "
+            f"замеров {report.total_requests}, ошибок {report.errors}"
+        )
+        return report
+
+    def report(self, suite: SSuite, checkpoint: SSuiteCheckpoint) -> SSuiteReport:
+        """
+        Сводка по моделям одним проходом по файлу результатов
+        """
+        summaries = {model: _ModelSummary() for model in suite.models}
+        results_path = self.path(suite.name, self.RESULTS_FILE)
+        if os.path.exists(results_path):
+            with open(results_path, "rb") as file:
+                for line in file:
+                    sample = SBenchmarkSample.model_validate_json(line)
+                    summaries.setdefault(sample.model, _ModelSummary()).add(sample)
+        results = [summary.result(model) for model, summary in summaries.items()]
+        return SSuiteReport(
+            name=suite.name,
+            rows=checkpoint.row,
+            total_requests=sum(result.requests for result in results),
+            errors=sum(result.errors for result in results),
+            finished=checkpoint.finished_at is not None,
+            results=results,
+        )
+
+    @staticmethod
+    def _recorded(path: str, offset: int, row: int) -> set[tuple[int, str, int]]:
+        """
+        Замеры строк от row, уже записанные прошлым прогоном. Смотрится только
+        хвост файла после offset; оборванная при сбое последняя строка
+        отрезается
+        """
+        recorded: set[tuple[int, str, int]] = set()
+        if not os.path.exists(path):
+            return recorded
+        with open(path, "r+b") as file:
+            file.seek(offset)
+            position = offset
+            for line in file:
+                if not line.endswith(b"\n"):
+                    file.truncate(position)
+                    break
+                position += len(line)
+                sample = json.loads(line)
+                if sample["prompt_index"] >= row:
+                    recorded.add(
+                        (sample["prompt_index"], sample["model"], sample["repetition"])
+                    )
+        return recorded
+
+    @staticmethod
+    def _load(path: str, schema):
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as file:
+            return schema.model_validate_json(file.read())
+
+    @staticmethod
+    def _save(path: str, value) -> None:
+        # Запись через временный файл: при сбое остается прежняя версия
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(value.model_dump_json(indent=2))
+        os.replace(temporary, path)
+
+
+__all__ = ["SuiteRunner", "read_rows"]
@@ -0,0 +1,113 @@
+"""
+Прогон именованного набора бенчмарков из JSONL-файла.
+
+    python suite.py smoke --dataset prompts.jsonl --models openai/gpt-4o-mini mock/instant
+    python suite.py smoke              # продолжить с контрольной точки
+    python suite.py smoke --restart    # начать заново
+
+Строка набора - JSON-строка с промптом или объект с полем --prompt-field.
+Результаты пишутся в SUITES_DIR/<имя>/results.jsonl по мере выполнения,
+сводка - в report.json. По SIGTERM/SIGINT прогон останавливается и
+продолжается следующим запуском с той же строки.
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import sys
+
+# Раннер не берет фоновые задачи из общей очереди
+os.environ["JOBS_WORKERS"] = "0"
+
+from config import settings
+from core.lifespan import lifespan
+from api.dependencies.services import (
+    get_benchmark_service,
+    get_completion_cache,
+    get_histogram_service,
+    get_http_client,
+    get_models_cache,
+    get_resilience,
+    get_result_service,
+    get_upstream_limiter,
+)
+from schemas.Benchmark import ECacheMode
+from schemas.Suites import SSuite
+from services.Suites import SuiteRunner
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("name", help="Имя набора")
+    parser.add_argument("--dataset", help="JSONL-файл с промптами")
+    parser.add_argument("--models", nargs="+", help="Идентификаторы моделей")
+    parser.add_argument("--repetitions", type=int, default=1)
+    parser.add_argument("--max-tokens", type=int, default=512)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument(
+        "--cache", choices=[mode.value for mode in ECacheMode], default="off"
+    )
+    parser.add_argument("--concurrency", type=int)
+    parser.add_argument("--prompt-field", default="prompt")
+    parser.add_argument("--mmap", action="store_true", help="Читать набор через mmap")
+    parser.add_argument("--restart", action="store_true", help="Начать набор заново")
+    return parser.parse_args()
+
+
+async def main() -> None:
+    args = parse_args()
+    suite = None
+    if args.dataset or args.models:
+        if not (args.dataset and args.models):
+            sys.exit("Для нового набора нужны --dataset и --models")
+        suite = SSuite(
+            name=args.name,
+            dataset=os.path.abspath(args.dataset),
+            models=args.models,
+            repetitions=args.repetitions,
+            max_tokens=args.max_tokens,
+            stream=args.stream,
+            cache=ECacheMode(args.cache),
+            concurrency=args.concurrency,
+            prompt_field=args.prompt_field,
+        )
+
+    async with lifespan(None):
+        runner = SuiteRunner(
+            get_benchmark_service(
+                client=get_http_client(),
+                histogram_service=get_histogram_service(),
+                models_local_cache=get_models_cache(),
+                completions_cache=get_completion_cache(),
+                result_service=get_result_service(),
+                limiter=get_upstream_limiter(),
+                resilient_caller=get_resilience(),
+            ),
+            checkpoint_interval=settings.SUITE_CHECKPOINT_INTERVAL,
+            use_mmap=args.mmap,
+        )
+        # Ошибки не выходят из lifespan: иначе пулы и журнал не будут закрыты
+        error = None
+        try:
+            suite = runner.open_suite(args.name, suite, restart=args.restart)
+            run = asyncio.create_task(runner.run(suite))
+            loop = asyncio.get_running_loop()
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(signum, run.cancel)
+            report = await run
+        except (ValueError, OSError) as e:
+            error = str(e)
+        except asyncio.CancelledError:
+            error = (
+                f"Набор {args.name} остановлен, "
+                f"продолжение: python suite.py {args.name}"
+            )
+
+    if error is not None:
+        sys.exit(error)
+    print(report.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,27 @@
+"""
+Отдельный процесс-воркер фоновых задач без HTTP-сервера.
+
+    JOBS_WORKERS=4 python worker.py
+
+Берет задачи из общей очереди в Redis наравне с воркерами в процессах API;
+по SIGTERM/SIGINT возвращает незавершенные задачи в очередь.
+"""
+
+import asyncio
+import signal
+
+from core.lifespan import lifespan
+
+
+async def main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    async with lifespan(None):
+        await stop.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())